@@ -26,17 +26,9 @@ $pageAllowed = false;
 if (in_array($PAGE, $alwaysAllowedPages)) {
     $pageExists = true;
     $pageAllowed = true;
-} else {
-    foreach ($data as $category => $details) {
-        foreach ($details['urls'] as $pageName => $pageDetails) {
-            $urlPath = parse_url($pageDetails['url'], PHP_URL_PATH);
-            if ($PAGE == $urlPath) {
-                $pageExists = true;
-                $pageAllowed = true;
-                break 2;
-            }
-        }
-    }
+} else if (isset($navIndex['pages'][$PAGE])) {
+    $pageExists = true;
+    $pageAllowed = true;
 }
 
 // Handle 404 errors
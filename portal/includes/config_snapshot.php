@@ -0,0 +1,81 @@
+<?php
+// Validated snapshots of the portal's JSON files, kept current by
+// shared/scripts/modules/watcher/config_watcher.py under cache/snapshots/:
+//   <name>.php     return array('version', 'etag', 'source' => [inode, mtime, size], 'data')
+//   manifest.php   return array('version', 'files' => name => ['version', 'etag'], 'rejected' => name => source)
+// Snapshots are PHP files, so OPcache serves an unchanged one without parsing.
+
+function config_snapshot_dir($portalDir) {
+    return $portalDir . '/cache/snapshots';
+}
+
+// Manifest of the snapshots, or null if the watcher has not run
+function config_snapshot_manifest($portalDir) {
+    static $manifests = array();
+    if (!array_key_exists($portalDir, $manifests)) {
+        $file = config_snapshot_dir($portalDir) . '/manifest.php';
+        $manifest = is_file($file) ? include $file : null;
+        $manifests[$portalDir] = (is_array($manifest) && $manifest['format'] == 1) ? $manifest : null;
+    }
+    return $manifests[$portalDir];
+}
+
+// Decoded contents of a JSON file of the portal, e.g. 'config/rbac.json'.
+// The snapshot is used while it was taken from the file on disk; a file the
+// watcher rejected as invalid keeps its last valid snapshot, and a file
+// changed while the watcher is stopped is decoded directly.
+function load_config_snapshot($portalDir, $name, $default = array()) {
+    $source = $portalDir . '/' . $name;
+    if (!file_exists($source)) {
+        return $default;
+    }
+    $stat = array(fileinode($source), filemtime($source), filesize($source));
+
+    $snapshotFile = config_snapshot_dir($portalDir) . '/' . $name . '.php';
+    $snapshot = is_file($snapshotFile) ? include $snapshotFile : null;
+    if (!is_array($snapshot) || $snapshot['format'] != 1) {
+        $snapshot = null;
+    }
+    if ($snapshot !== null) {
+        if ($snapshot['source'] == $stat) {
+            return $snapshot['data'];
+        }
+        $manifest = config_snapshot_manifest($portalDir);
+        if (isset($manifest['rejected'][$name]) && $manifest['rejected'][$name] == $stat) {
+            return $snapshot['data'];
+        }
+    }
+
+    $data = json_decode(file_get_contents($source), true);
+    if ($data === null) {
+        error_log("Failed to decode JSON from " . $name);
+        return $snapshot !== null ? $snapshot['data'] : $default;
+    }
+    return $data;
+}
+
+// Version of a watched file, or of the whole portal if no name is given; 0 if unknown
+function config_snapshot_version($portalDir, $name = null) {
+    $manifest = config_snapshot_manifest($portalDir);
+    if ($manifest === null) {
+        return 0;
+    }
+    if ($name === null) {
+        return $manifest['version'];
+    }
+    return isset($manifest['files'][$name]) ? $manifest['files'][$name]['version'] : 0;
+}
+
+// ETag of a watched file's current snapshot, or null if unknown
+function config_snapshot_etag($portalDir, $name) {
+    $manifest = config_snapshot_manifest($portalDir);
+    return isset($manifest['files'][$name]) ? $manifest['files'][$name]['etag'] : null;
+}
+
+// True if nothing changed after the version the caller holds; answered from
+// the manifest alone, so it trusts the watcher to be running
+function config_unchanged_since($portalDir, $version, $name = null) {
+    $current = config_snapshot_version($portalDir, $name);
+    return $current != 0 && $current <= $version;
+}
+?>
@@ -73,29 +73,20 @@ if (!isset($_SESSION[$APP."_user_name"])) {
 }
 
 // Initialize menu data
+require_once(__DIR__ . '/config_snapshot.php');
+require_once(__DIR__ . '/nav_index.php');
 $data = array();
-$menuFile = $DIR.'/config/menu-bar.json';
+$navIndex = load_nav_index($DIR);
 
-// Debug output
-error_log("Attempting to read menu file: " . $menuFile);
-
-if (file_exists($menuFile)) {
-    $jsonContent = file_get_contents($menuFile);
-    if ($jsonContent !== false) {
-        $data = json_decode($jsonContent, true);
-        if ($data !== null) {
-            ksort($data);
-        } else {
-            error_log("Failed to decode JSON from menu-bar.json");
-            $data = array(); // Fallback to empty array
-        }
-    } else {
-        error_log("Failed to read contents of menu-bar.json");
-        $data = array(); // Fallback to empty array
+if ($navIndex === null) {
+    // The index is missing or stale: compile it from the menu itself
+    $data = load_config_snapshot($DIR, 'config/menu-bar.json');
+    if (!is_array($data)) {
+        $data = array();
     }
-} else {
-    error_log("Menu file not found at: " . $menuFile);
-    $data = array(); // Fallback to empty array
+    ksort($data);
+
+    $navIndex = build_nav_index($data);
 }
 
 $alertMessage = '';
@@ -0,0 +1,95 @@
+<?php
+// Precompiled navigation index (config/menu-index.json), written by
+// shared/scripts/modules/rbac/nav_index.py after every menu update:
+//   menus:     role => menu key => ['type', 'img', 'links' => [title => url]]
+//   pages:     url path => allowed roles
+//   positions: menu key => title => position in menu-bar.json
+
+// Load the index if it was compiled from the current menu-bar.json
+function load_nav_index($portalDir) {
+    $indexFile = $portalDir . '/config/menu-index.json';
+    $menuFile = $portalDir . '/config/menu-bar.json';
+    if (!file_exists($indexFile) || !file_exists($menuFile)) {
+        return null;
+    }
+    $index = load_config_snapshot($portalDir, 'config/menu-index.json', null);
+    if (!is_array($index) || !isset($index['format']) || $index['format'] != 1) {
+        return null;
+    }
+    $source = array(fileinode($menuFile), filemtime($menuFile), filesize($menuFile));
+    if (!isset($index['source']) || $index['source'] != $source) {
+        error_log("Navigation index is stale, falling back to menu-bar.json");
+        return null;
+    }
+    return $index;
+}
+
+// Compile the index from parsed menu-bar.json data, mirroring nav_index.py
+function build_nav_index($data) {
+    $index = array('menus' => array(), 'pages' => array(), 'positions' => array());
+    foreach ($data as $key => $entry) {
+        if (!is_array($entry) || !isset($entry['urls']) || !is_array($entry['urls'])) {
+            continue;
+        }
+        $position = 0;
+        foreach ($entry['urls'] as $title => $info) {
+            $index['positions'][$key][$title] = $position++;
+            $roles = isset($info['roles']) ? $info['roles'] : array();
+            $url = isset($info['url']) ? $info['url'] : '';
+
+            $path = (string) parse_url($url, PHP_URL_PATH);
+            if (!isset($index['pages'][$path])) {
+                $index['pages'][$path] = array();
+            }
+            $index['pages'][$path] = array_values(array_unique(array_merge($index['pages'][$path], $roles)));
+
+            foreach ($roles as $role) {
+                if (!isset($index['menus'][$role][$key])) {
+                    $index['menus'][$role][$key] = array(
+                        'type' => isset($entry['type']) ? $entry['type'] : null,
+                        'img' => isset($entry['img']) ? $entry['img'] : '',
+                        'links' => array()
+                    );
+                }
+                $index['menus'][$role][$key]['links'][$title] = $url;
+            }
+        }
+    }
+    return $index;
+}
+
+// Menu visible to a user: the menus of their roles merged in menu order
+function nav_menu_for_roles($navIndex, $roles) {
+    $menu = array();
+    $merged = 0;
+    foreach ($roles as $userRole) {
+        $userRole = str_replace("'", "", $userRole);
+        if (!isset($navIndex['menus'][$userRole])) {
+            continue;
+        }
+        if ($merged++ == 0) {
+            $menu = $navIndex['menus'][$userRole];
+            continue;
+        }
+        foreach ($navIndex['menus'][$userRole] as $key => $entry) {
+            if (isset($menu[$key])) {
+                $menu[$key]['links'] += $entry['links'];
+            } else {
+                $menu[$key] = $entry;
+            }
+        }
+    }
+
+    // A single role's menu is already ordered; merged menus are re-sorted
+    if ($merged > 1) {
+        ksort($menu);
+        foreach ($menu as $key => $entry) {
+            $positions = $navIndex['positions'][$key];
+            uksort($menu[$key]['links'], function ($a, $b) use ($positions) {
+                return $positions[$a] - $positions[$b];
+            });
+        }
+    }
+    return $menu;
+}
+?>
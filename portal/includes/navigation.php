@@ -102,6 +102,109 @@
                 </ul>
             </nav>
 
+            <!-- Search Results -->
+            <div class="modal fade" id="search_results_modal" tabindex="-1" role="dialog" aria-hidden="true">
+                <div class="modal-dialog modal-lg" role="document">
+                    <div class="modal-content">
+                        <div class="modal-header">
+                            <h5 class="modal-title" id="search_results_title">Search</h5>
+                            <button type="button" class="close" data-dismiss="modal" aria-label="Close">
+                                <span aria-hidden="true">&times;</span>
+                            </button>
+                        </div>
+                        <div class="modal-body">
+                            <div id="search_facets" class="mb-2"></div>
+                            <ul class="list-group" id="search_results"></ul>
+                        </div>
+                    </div>
+                </div>
+            </div>
+
+            <script>
+                /**
+                 * Runs a document search and shows the ranked results
+                 * @param {string} query Search words
+                 * @param {Object} filters Facet filters: tags and category lists
+                 */
+                function runDocumentSearch(query, filters) {
+                    const data = {
+                        request_payload: {
+                            request_type: "documents",
+                            data: {
+                                action_type: "search",
+                                app: "<?php echo $APP; ?>",
+                                query: query,
+                                filters: filters
+                            }
+                        }
+                    };
+
+                    $.ajax({
+                        type: "POST",
+                        url: "run_python_script.php",
+                        data: JSON.stringify(data),
+                        contentType: 'application/json',
+                        dataType: "json",
+                        success: function(response) {
+                            if (!response.success) {
+                                showToastr('error', response.error || 'Search failed', 'error');
+                                return;
+                            }
+                            renderSearchResults(query, filters, response);
+                        },
+                        error: function(jqXHR, textStatus, errorThrown) {
+                            console.error('Error:', textStatus, errorThrown);
+                            showToastr('error', 'Search failed', 'error');
+                        }
+                    });
+                }
+
+                /**
+                 * Fills the search results modal
+                 * @param {string} query Search words
+                 * @param {Object} filters Facet filters of the search
+                 * @param {Object} response Search response
+                 */
+                function renderSearchResults(query, filters, response) {
+                    const escape = (text) => $('<div>').text(text).html();
+                    $('#search_results_title').text(response.total + ' results for "' + query + '"');
+
+                    const facets = $('#search_facets').empty();
+                    $.each(response.facets.tags, function(tag, count) {
+                        const active = (filters.tags || []).includes(tag);
+                        $('<span class="badge mr-1 ' + (active ? 'badge-primary' : 'badge-secondary') + '" style="cursor: pointer"></span>')
+                            .text(tag + ' (' + count + ')')
+                            .on('click', function() {
+                                const tags = active
+                                    ? filters.tags.filter((selected) => selected !== tag)
+                                    : (filters.tags || []).concat([tag]);
+                                runDocumentSearch(query, Object.assign({}, filters, {tags: tags}));
+                            })
+                            .appendTo(facets);
+                    });
+
+                    const list = $('#search_results').empty();
+                    response.results.forEach(function(result) {
+                        list.append(
+                            '<li class="list-group-item">' +
+                                '<strong>' + escape(result.title) + '</strong> ' +
+                                '<span class="text-muted">' + escape(result.category) + '</span><br>' +
+                                result.tags.map((tag) => '<span class="badge badge-light mr-1">' + escape(tag) + '</span>').join('') +
+                            '</li>'
+                        );
+                    });
+                    $('#search_results_modal').modal('show');
+                }
+
+                $('#search_form').on('submit', function(event) {
+                    event.preventDefault();
+                    const query = $('#search_word').val().trim();
+                    if (query) {
+                        runDocumentSearch(query, {});
+                    }
+                });
+            </script>
+
             <!-- Main Sidebar -->
             <aside class="main-sidebar sidebar-dark-primary elevation-4">
                 <a href="" class="brand-link">
@@ -130,91 +233,49 @@
                             role="menu" 
                             data-accordion="false">
                             <?php
-                            foreach ($data as $key => $value) {
+                            foreach (nav_menu_for_roles($navIndex, $adom_groups) as $key => $value) {
                                 // Handle single menu items
                                 if ($value['type'] == 'single') {
-                                    foreach ($value['urls'] as $title => $info) {
-                                        $displayLink = false;
-                                        foreach ($adom_groups as $userRole) {
-                                            $userRole = str_replace("'", "", $userRole);
-                                            foreach ($info['roles'] as $role) {
-                                                if ($role == $userRole) {
-                                                    $displayLink = true;
-                                                    break;
-                                                }
-                                            }
-                                        }
-                                        
-                                        if ($displayLink) {
-                                            ?>
-                                            <li class="nav-item">
-                                                <a href="<?php echo $info['url']; ?>" 
-                                                   class="nav-link <?php if ($URI == $info['url']) echo 'active'; ?>">
-                                                    <i class="nav-icon <?php echo $value['img']; ?>"></i>
-                                                    <p><?php echo $title; ?></p>
-                                                </a>
-                                            </li>
-                                            <?php
-                                        }
-                                    }
-                                }
-                                // Handle category menu items
-                                else if ($value['type'] == 'category') {
-                                    $category_authorized = false;
-                                    foreach ($value['urls'] as $title => $info) {
-                                        $displayLink = false;
-                                        foreach ($adom_groups as $userRole) {
-                                            $userRole = str_replace("'", "", $userRole);
-                                            foreach ($info['roles'] as $role) {
-                                                if ($role == $userRole) {
-                                                    $category_authorized = true;
-                                                    break 2;
-                                                }
-                                            }
-                                        }
-                                    }
-
-                                    if ($category_authorized) {
+                                    foreach ($value['links'] as $title => $url) {
                                         ?>
                                         <li class="nav-item">
-                                            <a href="#" class="nav-link">
-                                                <i class="nav-icon <?php echo htmlspecialchars($value['img'], ENT_QUOTES, 'UTF-8'); ?>"></i>
-                                                <p>
-                                                    <?php echo htmlspecialchars($key, ENT_QUOTES, 'UTF-8'); ?>
-                                                    <i class="right fas fa-angle-left"></i>
-                                                </p>
+                                            <a href="<?php echo $url; ?>" 
+                                               class="nav-link <?php if ($URI == $url) echo 'active'; ?>">
+                                                <i class="nav-icon <?php echo $value['img']; ?>"></i>
+                                                <p><?php echo $title; ?></p>
                                             </a>
-                                            <ul class="nav nav-treeview">
-                                                <?php
-                                                foreach ($value['urls'] as $title => $info) {
-                                                    $displayLink = false;
-                                                    foreach ($adom_groups as $userRole) {
-                                                        $userRole = str_replace("'", "", $userRole);
-                                                        foreach ($info['roles'] as $role) {
-                                                            if ($role == $userRole) {
-                                                                $displayLink = true;
-                                                                break;
-                                                            }
-                                                        }
-                                                    }
-
-                                                    if ($displayLink) {
-                                                        ?>
-                                                        <li class="nav-item">
-                                                            <a href="<?php echo $info['url']; ?>" class="nav-link">
-                                                                <i class="far fa-circle nav-icon"></i>
-                                                                <p><?php echo htmlspecialchars($title, ENT_QUOTES, 'UTF-8'); ?></p>
-                                                            </a>
-                                                        </li>
-                                                        <?php
-                                                    }
-                                                }
-                                                ?>
-                                            </ul>
                                         </li>
                                         <?php
                                     }
                                 }
+                                // Handle category menu items
+                                else if ($value['type'] == 'category') {
+                                    ?>
+                                    <li class="nav-item">
+                                        <a href="#" class="nav-link">
+                                            <i class="nav-icon <?php echo htmlspecialchars($value['img'], ENT_QUOTES, 'UTF-8'); ?>"></i>
+                                            <p>
+                                                <?php echo htmlspecialchars($key, ENT_QUOTES, 'UTF-8'); ?>
+                                                <i class="right fas fa-angle-left"></i>
+                                            </p>
+                                        </a>
+                                        <ul class="nav nav-treeview">
+                                            <?php
+                                            foreach ($value['links'] as $title => $url) {
+                                                ?>
+                                                <li class="nav-item">
+                                                    <a href="<?php echo $url; ?>" class="nav-link">
+                                                        <i class="far fa-circle nav-icon"></i>
+                                                        <p><?php echo htmlspecialchars($title, ENT_QUOTES, 'UTF-8'); ?></p>
+                                                    </a>
+                                                </li>
+                                                <?php
+                                            }
+                                            ?>
+                                        </ul>
+                                    </li>
+                                    <?php
+                                }
                             }
                             ?>
                         </ul>
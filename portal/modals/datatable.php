@@ -33,13 +33,23 @@ $table_id = isset($posted_data['table_id']) ? $posted_data['table_id'] : $table_
 $exclude_columns = isset($posted_data['exclude_columns']) ? $posted_data['exclude_columns'] : array();
 $fixed_width_columns = isset($posted_data['fixed_width_columns']) ? $posted_data['fixed_width_columns'] : array();
 
-// Load data from JSON file
-$file_path = __DIR__ . "/../$root_data_dir/$TYPE.json";
-$file_contents = file_get_contents($file_path);
-$file_data = json_decode($file_contents, true);
-
-$table_data = $file_data[$data_key];
-$headers = isset($posted_data['header_key']) ? $file_data[$posted_data['header_key']] : $file_data['headers'];
+// Server-side mode: rows are paged by the Python query engine through
+// run_python_script.php, e.g. {"request_type": "documents"} or {"request_type": "rbac"}
+$server_side = isset($posted_data['server_side']) ? $posted_data['server_side'] : null;
+
+if ($server_side && isset($posted_data['headers'])) {
+    // Headers are known to the caller, the table file is never loaded here
+    $table_data = array();
+    $headers = $posted_data['headers'];
+} else {
+    // Load data from JSON file
+    $file_path = __DIR__ . "/../$root_data_dir/$TYPE.json";
+    $file_contents = file_get_contents($file_path);
+    $file_data = json_decode($file_contents, true);
+
+    $table_data = $server_side ? array() : $file_data[$data_key];
+    $headers = isset($posted_data['header_key']) ? $file_data[$posted_data['header_key']] : $file_data['headers'];
+}
 ?>
 
 <script>
@@ -65,6 +75,7 @@ $(document).ready(function() {
 
     // Get excluded columns
     var exclude_columns = <?php echo json_encode($exclude_columns); ?>;
+    var serverSide = <?php echo json_encode($server_side); ?>;
 
     // Initialize DataTable
     $('#table_' + TYPE + ' thead tr')
@@ -79,7 +90,30 @@ $(document).ready(function() {
         language: {
             emptyTable: "No data available in table"
         },
-        data: <?php echo json_encode($table_data); ?>,
+        serverSide: !!serverSide,
+        processing: !!serverSide,
+        data: serverSide ? undefined : <?php echo json_encode($table_data); ?>,
+        ajax: serverSide ? function(params, callback) {
+            fetch('run_python_script.php', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    request_payload: {
+                        request_type: serverSide.request_type,
+                        data: {
+                            action_type: 'query_table',
+                            app: serverSide.app || "<?php echo $APP; ?>",
+                            params: params
+                        }
+                    }
+                })
+            })
+            .then(response => response.json())
+            .then(callback)
+            .catch(error => console.error('Error:', error));
+        } : undefined,
         initComplete: function() {
             var api = this.api();
 
@@ -97,16 +131,21 @@ $(document).ready(function() {
                         var regexr = '({search})';
                         var cursorPosition = this.selectionStart;
 
-                        api
-                            .column(colIdx)
-                            .search(
-                                this.value != '' ?
-                                regexr.replace('{search}', '(((' + this.value + ')))') :
-                                '',
-                                this.value != '',
-                                this.value == ''
-                            )
-                            .draw();
+                        if (serverSide) {
+                            // The server matches plain substrings
+                            api.column(colIdx).search(this.value).draw();
+                        } else {
+                            api
+                                .column(colIdx)
+                                .search(
+                                    this.value != '' ?
+                                    regexr.replace('{search}', '(((' + this.value + ')))') :
+                                    '',
+                                    this.value != '',
+                                    this.value == ''
+                                )
+                                .draw();
+                        }
 
                         $(this)
                             .focus()[0]
@@ -118,9 +157,10 @@ $(document).ready(function() {
         buttons: ["csv", "excel", "pdf"]
     });
 
-    // Custom search function
+    // Custom search function (client-side tables only)
     $.fn.dataTable.ext.search.push(
         function(settings, searchData, index, rowData, counter) {
+            if (serverSide) return true;
             var searchValue = table.search().toLowerCase();
             if (!searchValue) return true;
 
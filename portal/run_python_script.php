@@ -9,6 +9,10 @@ include('config.php');
 // Configure logging
 $log_file = '/var/www/html/shared/scripts/modules/debug.log';
 
+// Persistent worker daemon socket and the request types it preloads
+$worker_socket = getenv('PORTAL_WORKER_SOCKET') ?: '/run/portal/worker.sock';
+$worker_request_types = ['documents', 'rbac'];
+
 /**
  * Logs a message to the debug log file
  * @param string $message Message to log
@@ -23,6 +27,72 @@ function log_message($message) {
     );
 }
 
+/**
+ * Sends a request to the persistent Python worker
+ * @param string $socket_path Unix socket of the worker daemon
+ * @param string $request JSON encoded request payload
+ * @return array|null Decoded worker response, or null if the request never
+ *                    reached the worker; once it is sent, failures come back
+ *                    as an error response so the action is not run again
+ */
+function run_via_worker($socket_path, $request) {
+    if (!file_exists($socket_path)) {
+        return null;
+    }
+
+    $conn = @stream_socket_client("unix://$socket_path", $errno, $errstr, 1);
+    if (!$conn) {
+        log_message("Worker unavailable: $errstr");
+        return null;
+    }
+
+    stream_set_timeout($conn, 30);
+    $written = fwrite($conn, $request . "\n");
+    if ($written === false || $written === 0) {
+        fclose($conn);
+        log_message("Worker unavailable: request could not be sent");
+        return null;
+    }
+
+    // Read the whole newline-terminated response, however long it is
+    $response = '';
+    while (!feof($conn)) {
+        $line = fgets($conn);
+        if ($line === false) {
+            break;
+        }
+        $response .= $line;
+        if (substr($response, -1) === "\n") {
+            break;
+        }
+    }
+    $meta = stream_get_meta_data($conn);
+    fclose($conn);
+
+    $error = null;
+    if ($meta['timed_out']) {
+        $error = "Worker timed out";
+    } elseif (substr($response, -1) !== "\n") {
+        $error = "Incomplete worker response";
+    } else {
+        $decoded = json_decode(rtrim($response, "\n"), true);
+        if (!is_array($decoded) || !array_key_exists('status', $decoded)) {
+            $error = "Invalid worker response";
+        }
+    }
+
+    if ($error !== null) {
+        log_message("$error: " . substr($response, 0, 1000));
+        return [
+            'status' => 1,
+            'output' => $error,
+            'action' => 'unknown',
+            'elapsed_ms' => 0
+        ];
+    }
+    return $decoded;
+}
+
 // Log current user information
 $current_user_name = get_current_user();
 log_message("Current User Running the Script: $current_user_name");
@@ -44,6 +114,19 @@ if (!$request_payload) {
     die("Missing request payload");
 }
 
+// Document search results are filtered by the caller's ADOM groups, taken
+// from the session rather than trusted from the request
+if (is_array($request_payload)
+    && ($request_payload['request_type'] ?? null) === 'documents'
+    && ($request_payload['data']['action_type'] ?? null) === 'search') {
+    if (session_status() === PHP_SESSION_NONE) {
+        session_start();
+    }
+    $adom_groups_string = $_SESSION[$APP."_adom_groups"] ?? '';
+    $adom_groups = array_filter(explode(",", str_replace(["[", "]", "'"], "", $adom_groups_string)));
+    $request_payload['data']['roles'] = array_values($adom_groups);
+}
+
 // Format request for processing
 $request_to_process = is_array($request_payload) 
     ? json_encode($request_payload, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE)
@@ -88,11 +171,24 @@ $directory = isset($script_directory) && !empty($script_directory)
 // Prepare command with proper escaping
 $escaped_request = escapeshellarg($request_to_process);
 $command = "/opt/python-venv/bin/python3 $directory/$script $escaped_request";
-log_message("Command to Execute: $command");
 
-// Execute command and capture output
-exec($command . ' 2>&1', $output, $status);
-$output_text = implode("\n", $output);
+// Prefer the persistent worker, falling back to spawning the script
+$worker_response = null;
+if (in_array($request_type, $worker_request_types) && empty($data['request_payload']['script_directory'])) {
+    $worker_response = run_via_worker($worker_socket, $request_to_process);
+}
+
+if ($worker_response !== null) {
+    $output_text = $worker_response['output'];
+    $status = $worker_response['status'];
+    log_message("Worker Action: " . $worker_response['action'] . " (" . $worker_response['elapsed_ms'] . " ms)");
+} else {
+    log_message("Command to Execute: $command");
+
+    // Execute command and capture output
+    exec($command . ' 2>&1', $output, $status);
+    $output_text = implode("\n", $output);
+}
 
 log_message("Command Output: $output_text");
 log_message("Command Status: $status");
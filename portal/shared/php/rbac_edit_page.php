@@ -8,14 +8,11 @@ if (!$request) {
     exit;
 }
 
-// Get configuration files
-$config_dir = __DIR__ . '/../../config/';
-$rbac_file = $config_dir . 'rbac.json';
-$menu_file = $config_dir . 'menu-bar.json';
-
-// Load configurations
-$rbac_data = json_decode(file_get_contents($rbac_file), true);
-$menu_data = json_decode(file_get_contents($menu_file), true);
+// Load configurations from their validated snapshots
+require_once(__DIR__ . '/../../includes/config_snapshot.php');
+$portal_dir = dirname(__DIR__, 2);
+$rbac_data = load_config_snapshot($portal_dir, 'config/rbac.json');
+$menu_data = load_config_snapshot($portal_dir, 'config/menu-bar.json');
 
 // Extract request data
 $page_name = $request['request_payload']['data']['page_name'];
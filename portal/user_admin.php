@@ -1,22 +1,24 @@
 <?php
 include('header.php');
 
-// Load configuration files
-$menu_bar_file_path = __DIR__ . '/config/menu-bar.json';
-$rbac_file_path = __DIR__ . '/config/rbac.json';
-
-// Load and parse JSON data
-$menu_bar_data = file_exists($menu_bar_file_path) ? file_get_contents($menu_bar_file_path) : '{}';
-$data = json_decode($menu_bar_data, true) ?: [];
-
-$rbac_file_data = file_exists($rbac_file_path) ? file_get_contents($rbac_file_path) : '{}';
-$rbac_data = json_decode($rbac_file_data, true) ?: [];
+// Load configuration files from their validated snapshots
+$data = load_config_snapshot(__DIR__, 'config/menu-bar.json') ?: [];
+$rbac_data = load_config_snapshot(__DIR__, 'config/rbac.json') ?: [];
 
 // Extract configuration data
 $rbac_groups = $rbac_data["adom_groups"];
 $categories = $rbac_data["category_list"];
 $icons = $rbac_data["icon_list"];
 
+// Latest daily log summaries written by shared/scripts/modules/log_maintenance.py
+$log_summaries = array();
+foreach (array_slice(array_reverse(glob(__DIR__ . '/logs/summary/*.json') ?: array()), 0, 7) as $summary_file) {
+    $summary = json_decode(file_get_contents($summary_file), true);
+    if ($summary !== null) {
+        $log_summaries[] = $summary;
+    }
+}
+
 // Handle login submission
 if (isset($_POST['login_submit'])) {
     if ($_POST['login_user'] === 'test' && $_POST['login_passwd'] === 'test123') {
@@ -105,6 +107,37 @@ if (isset($_POST['login_submit'])) {
                         </div>
                     </div>
                 </div>
+                <div class="col-md-4">
+                    <div class="card card-info">
+                        <div class="card-header">
+                            <h3 class="card-title">Login Activity</h3>
+                        </div>
+                        <div class="card-body p-0">
+                            <table class="table table-sm mb-0">
+                                <thead>
+                                    <tr>
+                                        <th>Date</th>
+                                        <th>Logins</th>
+                                        <th>Failed</th>
+                                        <th>Users</th>
+                                        <th>Client Errors</th>
+                                    </tr>
+                                </thead>
+                                <tbody>
+                                    <?php foreach ($log_summaries as $summary) { ?>
+                                        <tr>
+                                            <td><?php echo htmlspecialchars($summary['date'], ENT_QUOTES, 'UTF-8'); ?></td>
+                                            <td><?php echo (int) $summary['access']['success']; ?></td>
+                                            <td><?php echo (int) $summary['access']['failed']; ?></td>
+                                            <td><?php echo count($summary['access']['logins_per_user']); ?></td>
+                                            <td><?php echo (int) $summary['client']['total']; ?></td>
+                                        </tr>
+                                    <?php } ?>
+                                </tbody>
+                            </table>
+                        </div>
+                    </div>
+                </div>
             </div>
 
             <!-- Tables Row -->
@@ -308,6 +341,8 @@ function loadTable() {
         root_data_dir: "config",
         data_key: "pages_table_data",
         header_key: "pages_table_headers",
+        headers: ["Name", "File", "Type", "Roles", "Actions"],
+        server_side: { request_type: "rbac" },
         row_height: 30
     };
 
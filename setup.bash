@@ -33,6 +33,38 @@ warn() {
     echo -e "${YELLOW}[$(date +'%Y-%m-%d %H:%M:%S')] WARNING:${NC} $1"
 }
 
+# Install, enable and (re)start a daemon as a systemd service running as apache
+# Usage: install_service <name> <description> <command> [extra [Service] lines]
+install_service() {
+    local name=$1 description=$2 command=$3 extra=$4
+    if ! command -v systemctl >/dev/null 2>&1; then
+        warn "systemd not found, start $name manually as $APACHE_USER: $command"
+        return
+    fi
+    log "Installing $name service..."
+    cat > /etc/systemd/system/$name.service <<UNIT
+[Unit]
+Description=$description
+After=network.target
+
+[Service]
+Type=simple
+User=$APACHE_USER
+Group=$APACHE_GROUP
+Environment=PORTAL_WEB_ROOT=$WEB_ROOT
+ExecStart=$command
+Restart=on-failure
+RestartSec=5
+$extra
+
+[Install]
+WantedBy=multi-user.target
+UNIT
+    systemctl daemon-reload
+    systemctl enable $name.service
+    systemctl restart $name.service || warn "$name failed to start, see: journalctl -u $name"
+}
+
 # Check if running as root
 if [ "$EUID" -ne 0 ]; then
     error "Please run as root"
@@ -50,6 +82,19 @@ log "Creating required directories..."
 mkdir -p $WEB_ROOT/portal/logs/{access,errors,client,python}
 mkdir -p $PYTHON_VENV
 
+# Runtime directory for the persistent Python worker socket
+mkdir -p /run/portal
+chown $APACHE_USER:$APACHE_GROUP /run/portal
+chmod 770 /run/portal
+
+# Private directory for the encrypted Vault secret cache
+mkdir -p /var/cache/portal
+chown $APACHE_USER:$APACHE_GROUP /var/cache/portal
+chmod 700 /var/cache/portal
+
+# Validated config snapshots written by the config watcher, included by PHP
+mkdir -p $WEB_ROOT/portal/cache/snapshots
+
 # Set base ownership and permissions
 log "Setting base ownership and permissions..."
 chown -R $APACHE_USER:$APACHE_GROUP $WEB_ROOT
@@ -109,6 +154,19 @@ else
     warn "Python virtual environment not found at $PYTHON_VENV. Please set up virtual environment manually."
 fi
 
+# Persistent Python worker serving run_python_script.php over a Unix socket;
+# systemd recreates /run/portal for it on every boot
+WORKER_SOCKET="/run/portal/worker.sock"
+install_service portal-worker "Portal Python worker" \
+    "$PYTHON_VENV/bin/python3 $WEB_ROOT/shared/scripts/modules/worker/worker.py --socket $WORKER_SOCKET" \
+    "RuntimeDirectory=portal
+RuntimeDirectoryMode=0770
+Environment=PORTAL_WORKER_SOCKET=$WORKER_SOCKET"
+
+# Config watcher keeping the validated snapshots of every application current
+install_service portal-config-watcher "Portal config snapshot watcher" \
+    "$PYTHON_VENV/bin/python3 $WEB_ROOT/shared/scripts/modules/watcher/config_watcher.py --all"
+
 # Verify critical files and directories
 log "Verifying setup..."
 
@@ -143,5 +201,7 @@ echo "1. Test LDAP authentication"
 echo "2. Verify log file creation"
 echo "3. Check vault token access"
 echo "4. Restart Apache service if needed"
+echo "5. Check the Python worker: systemctl status portal-worker"
+echo "6. Check the config watcher: systemctl status portal-config-watcher"
 
 exit 0
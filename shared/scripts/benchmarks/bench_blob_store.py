@@ -0,0 +1,123 @@
+#!/opt/python-venv/bin/python3
+"""
+Blob Store Benchmark
+Stores the same synthetic documents, some with inline base64 screenshots
+drawn from a shared pool, in the previous layout (one {uuid}.json body file
+per document) and in the blob store, and compares space and body
+read/write latency
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import shutil
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'documents'))
+
+# Point the document store at a scratch tree before the modules read WEB_ROOT
+WORK_DIR = tempfile.mkdtemp(prefix='portal-bench-')
+os.environ['PORTAL_WEB_ROOT'] = WORK_DIR
+
+from file_operations import atomic_write
+from document_store import docs_directory, body_file, write_body, read_body, document_metadata
+from blob_store import blob_usage, body_codec
+
+APP = 'bench'
+WORDS = ("interface bgp neighbor route policy firewall rule vlan trunk access switch router "
+         "outage escalation ticket change window rollback verify config backup restore").split()
+
+def make_record(n, images, rng):
+    paragraphs = []
+    for _ in range(rng.randint(3, 30)):
+        paragraphs.append("<p>" + " ".join(rng.choices(WORDS, k=rng.randint(20, 80))) + "</p>")
+    if rng.random() < 0.4:
+        for image in rng.sample(images, rng.randint(1, 3)):
+            paragraphs.insert(rng.randrange(len(paragraphs)), f'<img src="data:image/png;base64,{image}">')
+    return {
+        "app": APP,
+        "title": f"Document {n}",
+        "category": f"category-{n % 8}",
+        "adom": "admin",
+        "tags": [f"tag-{n % 20}"],
+        "summernote_content": "".join(paragraphs),
+        "created_date": "2026-01-01 00:00:00"
+    }
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def tree_bytes(path):
+    total = 0
+    for directory, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    return total
+
+def report(name, stored_bytes, write_ms, read_ms):
+    print(f"{name}||{stored_bytes / 1024 / 1024:.2f} MB||"
+          f"write p50 {percentile(write_ms, 0.5):.3f} ms p99 {percentile(write_ms, 0.99):.3f} ms||"
+          f"read p50 {percentile(read_ms, 0.5):.3f} ms p99 {percentile(read_ms, 0.99):.3f} ms")
+
+def main():
+    """
+    Main function to run the blob store benchmark
+    """
+    parser = argparse.ArgumentParser(description="Compare the blob store with per-document body files")
+    parser.add_argument('--docs', type=int, default=2000, help="Documents to store")
+    parser.add_argument('--images', type=int, default=40, help="Distinct screenshots in the pool")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed of the corpus")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Screenshots are already compressed, so their bytes are close to random
+    images = [base64.b64encode(rng.randbytes(rng.randint(20000, 120000))).decode() for _ in range(args.images)]
+    records = [make_record(n, images, rng) for n in range(args.docs)]
+
+    try:
+        os.makedirs(docs_directory(APP), exist_ok=True)
+        print(f"documents||{args.docs}||body codec {body_codec()}")
+        print("layout||stored||write||read")
+
+        # Previous layout: the whole record, images inline, in {uuid}.json
+        write_ms = []
+        for n, record in enumerate(records):
+            def write_file():
+                payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+                atomic_write(body_file(APP, f"doc-{n}"), payload)
+            write_ms.append(timed(write_file)[0])
+        read_ms = [timed(lambda: read_body(APP, f"doc-{n}", {}))[0] for n in range(args.docs)]
+        file_bytes = sum(os.path.getsize(body_file(APP, f"doc-{n}")) for n in range(args.docs))
+        report("body files", file_bytes, write_ms, read_ms)
+
+        # Blob store: compressed bodies, images extracted and deduplicated
+        write_ms = []
+        metadata = []
+        for record in records:
+            elapsed, result = timed(lambda: write_body(APP, record))
+            write_ms.append(elapsed)
+            metadata.append(document_metadata(result['record'], result['blobs']))
+        read_ms = [timed(lambda: read_body(APP, f"doc-{n}", metadata[n]))[0] for n in range(args.docs)]
+        usage = blob_usage(APP)
+        blob_bytes = usage['body_bytes'] + usage['image_bytes']
+        report("blob store", blob_bytes, write_ms, read_ms)
+
+        print(f"blob store detail||{usage['bodies']} bodies {usage['body_bytes'] / 1024 / 1024:.2f} MB||"
+              f"{usage['images']} images {usage['image_bytes'] / 1024 / 1024:.2f} MB")
+        print(f"space saved||{(1 - blob_bytes / file_bytes) * 100:.1f}%")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/opt/python-venv/bin/python3
+"""
+Config Snapshot Benchmark
+Writes a synthetic menu-bar.json and rbac.json, lets the config watcher
+snapshot them, then times what a request pays to get the data: decoding
+the file, reading the validated snapshot, and an "unchanged since N" check.
+Also times how long an edit takes to reach the snapshot with inotify.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'watcher'))
+
+# Point the portal at a scratch tree before the modules read WEB_ROOT
+WORK_DIR = tempfile.mkdtemp(prefix='portal-bench-')
+os.environ['PORTAL_WEB_ROOT'] = WORK_DIR
+
+import threading
+import config_snapshots
+from config_snapshots import read_config, unchanged_since, snapshot_version
+from config_watcher import ConfigWatcher
+
+APP = 'bench'
+ROLES = ['admin', 'netops', 'secops', 'voice', 'user']
+
+def make_menu(pages):
+    menu = {}
+    for n in range(pages):
+        category = f"category-{n % 25}"
+        entry = menu.setdefault(category, {"type": "category", "img": "fas fa-folder", "urls": {}})
+        entry["urls"][f"Page {n}"] = {"url": f"page_{n}.php", "roles": ROLES[:1 + n % len(ROLES)]}
+    return menu
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    """
+    Main function to run the config snapshot benchmark
+    """
+    parser = argparse.ArgumentParser(description="Compare decoding config files with validated snapshots")
+    parser.add_argument('--pages', type=int, default=2000, help="Pages in the synthetic menu")
+    parser.add_argument('--repeat', type=int, default=500, help="Reads per measurement")
+    parser.add_argument('--edits', type=int, default=20, help="Edits timed through the watcher")
+    args = parser.parse_args()
+
+    config_dir = os.path.join(WORK_DIR, APP, 'portal', 'config')
+    menu_file = os.path.join(config_dir, 'menu-bar.json')
+    try:
+        os.makedirs(config_dir)
+        menu = make_menu(args.pages)
+        with open(menu_file, 'w') as menu_out:
+            json.dump(menu, menu_out, indent=4)
+        with open(os.path.join(config_dir, 'rbac.json'), 'w') as rbac_out:
+            json.dump({"adom_groups": ROLES, "category_list": sorted({key for key in menu}),
+                       "icon_list": ["fas fa-folder"]}, rbac_out, indent=4)
+
+        watcher = ConfigWatcher([APP])
+        thread = threading.Thread(target=watcher.run, daemon=True)
+        thread.start()
+        while snapshot_version(APP, 'config/menu-bar.json') == 0:
+            time.sleep(0.01)
+
+        print(f"menu-bar.json||{os.path.getsize(menu_file) / 1024:.0f} KB||{args.pages} pages")
+        print("read||p50 ms||p99 ms")
+
+        def decode():
+            with open(menu_file, 'rb') as menu_in:
+                json.load(menu_in)
+        for name, func in (
+            ("decode file", decode),
+            ("snapshot", lambda: read_config(APP, 'config/menu-bar.json')),
+            ("unchanged since", lambda: unchanged_since(APP, 0, 'config/menu-bar.json')),
+        ):
+            samples = timed(func, args.repeat)
+            print(f"{name}||{percentile(samples, 0.5):.3f}||{percentile(samples, 0.99):.3f}")
+
+        # Edit to snapshot latency: rewrite the file and wait for a new version
+        latency = []
+        for n in range(args.edits):
+            before = snapshot_version(APP, 'config/menu-bar.json')
+            menu[f"category-{n % 25}"]["urls"][f"Added {n}"] = {"url": f"added_{n}.php", "roles": ["admin"]}
+            start = time.perf_counter()
+            with open(menu_file, 'w') as menu_out:
+                json.dump(menu, menu_out, indent=4)
+            while snapshot_version(APP, 'config/menu-bar.json') == before:
+                time.sleep(0.002)
+            latency.append((time.perf_counter() - start) * 1000)
+        print(f"edit to snapshot||p50 {percentile(latency, 0.5):.0f} ms||p99 {percentile(latency, 0.99):.0f} ms||"
+              f"mode {'inotify' if watcher.inotify else 'polling'}")
+
+        watcher.stop()
+        os.write(watcher.wake_write, b'\0')
+        thread.join(timeout=5)
+        print(f"snapshot cache||{config_snapshots.snapshot_cache.stats()}")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/opt/python-venv/bin/python3
+"""
+Duplicate Detection Micro-Benchmark
+Compares list scans with the hashed indexes in data_index for docs.json table
+rows and config tags
+"""
+
+import os
+import sys
+import time
+import argparse
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+
+from data_index import RowIndex, append_unique
+
+def best_of(func, repeat):
+    """
+    Run a function several times and keep the fastest run
+
+    Args:
+        func (callable): Function to time
+        repeat (int): Number of runs
+
+    Returns:
+        float: Fastest run in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def make_rows(count):
+    return [[f"Document {n}", [f"tag-{n % 50}", f"tag-{n % 7}"], f"category-{n % 10}", "admin"]
+            for n in range(count)]
+
+def main():
+    """
+    Main function to run the duplicate detection micro-benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark duplicate detection on large stores")
+    parser.add_argument('--rows', type=int, default=100000, help="Rows and tags in the store")
+    parser.add_argument('--new', type=int, default=50, help="Rows or tags added per operation")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    new_rows = [[f"New {n}", ["pasted"], "category-0", "admin"] for n in range(args.new)]
+
+    def linear_rows():
+        data = list(rows)
+        for row in new_rows:
+            if row not in data:
+                data.append(row)
+
+    def indexed_rows():
+        index = RowIndex(list(rows))
+        for row in new_rows:
+            index.add(row)
+
+    tags = [f"tag{n}" for n in range(args.rows)]
+    new_tags = [f"pasted{n}" for n in range(args.new)]
+
+    def linear_tags():
+        existing = list(tags)
+        for tag in new_tags:
+            if tag not in existing:
+                existing.append(tag)
+
+    def indexed_tags():
+        append_unique(list(tags), new_tags)
+
+    print("case||linear_ms||indexed_ms")
+    print(f"{args.new} rows into {args.rows}||{best_of(linear_rows, args.repeat):.2f}"
+          f"||{best_of(indexed_rows, args.repeat):.2f}")
+    print(f"{args.new} tags into {args.rows}||{best_of(linear_tags, args.repeat):.2f}"
+          f"||{best_of(indexed_tags, args.repeat):.2f}")
+
+if __name__ == "__main__":
+    main()
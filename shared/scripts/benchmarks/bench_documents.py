@@ -0,0 +1,172 @@
+#!/opt/python-venv/bin/python3
+"""
+Document Save Benchmark
+Measures save_document latency as the corpus grows, comparing the sharded
+store (index + per-document bodies) with the legacy monolithic docs.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+
+# Point the modules at a scratch tree before they read WEB_ROOT
+BENCH_ROOT = tempfile.mkdtemp(prefix='portal-bench-')
+os.environ['PORTAL_WEB_ROOT'] = BENCH_ROOT
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'documents'))
+
+import documents
+from file_operations import FileLock
+from document_store import docs_directory, index_file, body_file, init_index, document_metadata
+
+def make_document(app, n, body_bytes):
+    """
+    Build a synthetic save request
+
+    Args:
+        app (str): Application identifier
+        n (int): Sequence number used for unique titles
+        body_bytes (int): Approximate size of summernote_content
+
+    Returns:
+        dict: Document data as sent by the portal
+    """
+    paragraph = f"<p>Document {n} lorem ipsum dolor sit amet consectetur.</p>"
+    return {
+        "action_type": "save",
+        "app": app,
+        "file_name": f"Document {n}",
+        "category": f"category-{n % 10}",
+        "adom": "admin",
+        "tags": [f"tag-{n % 50}", f"tag-{n % 7}"],
+        "summernote_content": paragraph * max(1, body_bytes // len(paragraph)),
+        "vzid": "bench",
+        "user_email": "bench@example.com"
+    }
+
+def seed_sharded(app, corpus_size, body_bytes):
+    """
+    Create a sharded store with corpus_size documents
+
+    Args:
+        app (str): Application identifier
+        corpus_size (int): Number of documents
+        body_bytes (int): Body size per document
+    """
+    os.makedirs(docs_directory(app), exist_ok=True)
+    index_data = init_index({})
+    for n in range(corpus_size):
+        doc = make_document(app, n, body_bytes)
+        doc_id = str(uuid.uuid4())
+        record = {"app": app, "title": doc["file_name"], "category": doc["category"],
+                  "adom": doc["adom"], "tags": doc["tags"],
+                  "summernote_content": doc["summernote_content"], "created_date": "2025-01-01 00:00:00"}
+        with open(body_file(app, doc_id), 'w') as f:
+            json.dump(record, f, separators=(',', ':'))
+        index_data["data"].append([doc["file_name"], doc["tags"], doc["category"], doc["adom"]])
+        index_data["documents"][doc_id] = document_metadata(record)
+    with FileLock(index_file(app)) as file_lock:
+        file_lock.write(index_data)
+
+def seed_legacy(app, corpus_size, body_bytes):
+    """
+    Create a monolithic docs.json with corpus_size embedded documents
+
+    Args:
+        app (str): Application identifier
+        corpus_size (int): Number of documents
+        body_bytes (int): Body size per document
+    """
+    os.makedirs(docs_directory(app), exist_ok=True)
+    index_data = {"data": [], "headers": ["Title", "Tags", "Category", "ADOM"]}
+    for n in range(corpus_size):
+        doc = make_document(app, n, body_bytes)
+        index_data["data"].append([doc["file_name"], doc["tags"], doc["category"], doc["adom"]])
+        index_data[str(uuid.uuid4())] = {"app": app, "title": doc["file_name"], "category": doc["category"],
+                                          "adom": doc["adom"], "tags": doc["tags"],
+                                          "summernote_content": doc["summernote_content"],
+                                          "created_date": "2025-01-01 00:00:00"}
+    with FileLock(index_file(app)) as file_lock:
+        file_lock.write(index_data)
+
+def legacy_save(data):
+    """
+    Save a document the way the monolithic layout did: parse and rewrite all of docs.json
+
+    Args:
+        data (dict): Document data
+    """
+    with FileLock(index_file(data["app"])) as file_lock:
+        existing_data = file_lock.read()['data']
+        new_row = [data["file_name"], data["tags"], data["category"], data["adom"]]
+        if new_row not in existing_data["data"]:
+            existing_data["data"].append(new_row)
+        existing_data[str(uuid.uuid4())] = {
+            "app": data["app"], "title": data["file_name"], "category": data["category"],
+            "adom": data["adom"], "tags": data["tags"],
+            "summernote_content": data["summernote_content"],
+            "created_date": datetime_now()
+        }
+        file_lock.write(existing_data)
+
+def datetime_now():
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+def time_saves(save, app, corpus_size, saves, body_bytes):
+    """
+    Time a series of saves against a seeded store
+
+    Returns:
+        list: Latency of each save in milliseconds
+    """
+    latencies = []
+    for n in range(saves):
+        doc = make_document(app, corpus_size + n, body_bytes)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            save(doc)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    """
+    Main function to run the document save benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark save_document latency against corpus size")
+    parser.add_argument('--sizes', default='100,1000,5000', help="Comma separated corpus sizes")
+    parser.add_argument('--saves', type=int, default=20, help="Saves timed per corpus size")
+    parser.add_argument('--body-bytes', type=int, default=20000, help="Body size per document")
+    parser.add_argument('--skip-legacy', action='store_true', help="Only benchmark the sharded store")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print("corpus||sharded_p50_ms||sharded_max_ms||legacy_p50_ms||legacy_max_ms")
+    try:
+        for corpus_size in sizes:
+            app = f"sharded{corpus_size}"
+            seed_sharded(app, corpus_size, args.body_bytes)
+            sharded = time_saves(documents.save_document, app, corpus_size, args.saves, args.body_bytes)
+
+            legacy = [float('nan')]
+            if not args.skip_legacy:
+                app = f"legacy{corpus_size}"
+                seed_legacy(app, corpus_size, args.body_bytes)
+                legacy = time_saves(legacy_save, app, corpus_size, args.saves, args.body_bytes)
+
+            print(f"{corpus_size}||{statistics.median(sharded):.2f}||{max(sharded):.2f}"
+                  f"||{statistics.median(legacy):.2f}||{max(legacy):.2f}")
+    finally:
+        shutil.rmtree(BENCH_ROOT, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
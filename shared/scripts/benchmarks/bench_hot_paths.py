@@ -0,0 +1,362 @@
+#!/opt/python-venv/bin/python3
+"""
+RBAC and Documents Hot Path Benchmark
+Seeds synthetic rbac.json, menu-bar.json and docs.json fixtures at a
+configurable scale, drives save_page_rbac, update_menu_nav_data,
+save_document and update_documents_config from concurrent writer
+processes, and reports throughput, p50/p99 latency, lock wait and peak RSS.
+Results can be saved as a baseline and later runs compared against it.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import statistics
+import multiprocessing
+from contextlib import redirect_stdout
+
+# Point the modules at a scratch tree before they read WEB_ROOT
+BENCH_ROOT = tempfile.mkdtemp(prefix='portal-bench-')
+os.environ['PORTAL_WEB_ROOT'] = BENCH_ROOT
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'rbac'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'documents'))
+
+import rbac
+import documents
+import file_operations
+from file_operations import FileLock
+from document_store import docs_directory, index_file, body_file, init_index, document_metadata
+
+# Metrics compared in regression mode and whether higher is better
+COMPARED_METRICS = {
+    "throughput_ops_s": True,
+    "p50_ms": False,
+    "p99_ms": False,
+}
+
+def app_config_dir(app):
+    return f"{BENCH_ROOT}/{app}/portal/config"
+
+def make_page(n, categories, roles, rng):
+    """
+    Build the rbac.json entry of a synthetic page
+
+    Every third page is a single link, the others belong to a category.
+
+    Returns:
+        tuple: (filename, page entry)
+    """
+    filename = f"page{n}.php"
+    page_data = {
+        "link_name": f"Page {n}",
+        "link_type": "single" if n % 3 == 0 else "category",
+        "url": filename,
+        "roles": rng.sample(roles, min(len(roles), rng.randint(1, 3)))
+    }
+    if page_data["link_type"] == "category":
+        page_data["category"] = f"Category {n % categories}"
+    return filename, page_data
+
+def seed_rbac(app, pages, categories, roles, seed):
+    """
+    Create rbac.json with the given number of pages and build menu-bar.json from it
+
+    Args:
+        app (str): Application identifier
+        pages (int): Number of pages
+        categories (int): Number of menu categories
+        roles (int): Number of roles
+        seed (int): Random seed for page roles
+    """
+    rng = random.Random(seed)
+    role_names = [f"role{n}" for n in range(roles)]
+    rbac_data = {
+        "pages": {},
+        "categories": {},
+        "adom_groups": list(role_names),
+        "roles": list(role_names),
+        "pages_version": 0
+    }
+    for n in range(pages):
+        filename, page_data = make_page(n, categories, role_names, rng)
+        rbac_data["pages"][filename] = page_data
+        if "category" in page_data:
+            category = rbac_data["categories"].setdefault(page_data["category"], {
+                "icon": "fas fa-folder", "urls": {}, "name": page_data["category"]
+            })
+            category["urls"][filename] = {}
+
+    os.makedirs(app_config_dir(app), exist_ok=True)
+    with FileLock(f"{app_config_dir(app)}/rbac.json") as file_lock:
+        file_lock.write(rbac_data)
+    with redirect_stdout(io.StringIO()):
+        rbac.update_menu_nav_data(app)
+        rbac.update_pages_table(app)
+
+def seed_documents(app, corpus_size, body_bytes, tags):
+    """
+    Create a sharded document store and its config.json
+
+    Args:
+        app (str): Application identifier
+        corpus_size (int): Number of documents
+        body_bytes (int): Body size per document
+        tags (int): Number of distinct tags
+    """
+    os.makedirs(docs_directory(app), exist_ok=True)
+    index_data = init_index({})
+    for n in range(corpus_size):
+        doc = make_document(app, n, body_bytes, tags)
+        doc_id = f"seed-{n}"
+        record = {"app": app, "title": doc["file_name"], "category": doc["category"],
+                  "adom": doc["adom"], "tags": doc["tags"],
+                  "summernote_content": doc["summernote_content"], "created_date": "2025-01-01 00:00:00"}
+        with open(body_file(app, doc_id), 'w') as f:
+            json.dump(record, f, separators=(',', ':'))
+        index_data["data"].append([doc["file_name"], doc["tags"], doc["category"], doc["adom"]])
+        index_data["documents"][doc_id] = document_metadata(record)
+    with FileLock(index_file(app)) as file_lock:
+        file_lock.write(index_data)
+
+    config_data = {"data": [], app: {"docs": {
+        "categories": [f"category-{n}" for n in range(10)],
+        "tags": [f"tag-{n}" for n in range(tags)]
+    }}}
+    with FileLock(f"{app_config_dir(app)}/config.json") as file_lock:
+        file_lock.write(config_data)
+
+def make_document(app, n, body_bytes, tags, new_tag=False):
+    """
+    Build a synthetic save request
+
+    Args:
+        app (str): Application identifier
+        n (int): Sequence number used for unique titles
+        body_bytes (int): Approximate size of summernote_content
+        tags (int): Number of distinct seeded tags
+        new_tag (bool): Include a tag the config does not know yet
+
+    Returns:
+        dict: Document data as sent by the portal
+    """
+    paragraph = f"<p>Document {n} lorem ipsum dolor sit amet consectetur.</p>"
+    doc_tags = [f"tag-{n % tags}", f"tag-{(n * 7) % tags}"]
+    if new_tag:
+        doc_tags.append(f"new-{n}")
+    return {
+        "action_type": "save",
+        "app": app,
+        "file_name": f"Document {n}",
+        "category": f"category-{n % 10}",
+        "adom": "admin",
+        "tags": doc_tags,
+        "summernote_content": paragraph * max(1, body_bytes // len(paragraph)),
+        "vzid": "bench",
+        "user_email": "bench@example.com"
+    }
+
+def op_save_page_rbac(args, app, worker, n):
+    # Mostly edits of existing pages, with every tenth save adding a page
+    rng = random.Random(worker * 1000003 + n)
+    role_names = [f"role{r}" for r in range(args.roles)]
+    if n % 10 == 9:
+        page_number = args.pages + worker * args.ops + n
+    else:
+        page_number = rng.randrange(args.pages)
+    filename, page_data = make_page(page_number, args.categories, role_names, rng)
+    rbac.save_page_rbac({
+        "link_name": page_data["link_name"],
+        "link_type": page_data["link_type"],
+        "filename": filename,
+        "category": page_data.get("category"),
+        "new_adom_groups": page_data["roles"],
+        "app": app,
+        "image": "fas fa-folder"
+    })
+
+def op_update_menu_nav_data(args, app, worker, n):
+    rbac.update_menu_nav_data(app)
+
+def op_save_document(args, app, worker, n):
+    documents.save_document(make_document(app, args.documents + worker * args.ops + n,
+                                          args.body_bytes, args.tags))
+
+def op_update_documents_config(args, app, worker, n):
+    # Every tenth call introduces a new tag and takes the write path
+    number = worker * args.ops + n
+    documents.update_documents_config(make_document(app, number, 1, args.tags, new_tag=n % 10 == 9))
+
+# Workload name -> (fixture kind, operation)
+WORKLOADS = {
+    "save_page_rbac": ("rbac", op_save_page_rbac),
+    "update_menu_nav_data": ("rbac", op_update_menu_nav_data),
+    "save_document": ("documents", op_save_document),
+    "update_documents_config": ("documents", op_update_documents_config),
+}
+
+def run_writer(job):
+    """
+    Run one writer process: a series of operations against a seeded app
+
+    Args:
+        job (tuple): (args, workload name, app, worker number, start time)
+
+    Returns:
+        dict: Latencies in milliseconds, lock wait seconds, wall clock span
+              and peak RSS in KiB
+    """
+    args, workload, app, worker, start_at = job
+    operation = WORKLOADS[workload][1]
+
+    # Start every writer together so they contend for the same locks
+    time.sleep(max(start_at - time.time(), 0))
+
+    latencies = []
+    wait_before = file_operations.lock_stats["wait_seconds"]
+    started = time.time()
+    for n in range(args.ops):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            operation(args, app, worker, n)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "latencies": latencies,
+        "lock_wait_seconds": file_operations.lock_stats["wait_seconds"] - wait_before,
+        "started": started,
+        "finished": time.time(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def run_workload(args, workload):
+    """
+    Seed a fresh app and drive a workload from args.processes writers
+
+    Args:
+        args (argparse.Namespace): Benchmark settings
+        workload (str): Name from WORKLOADS
+
+    Returns:
+        dict: Aggregated metrics of the run
+    """
+    fixture = WORKLOADS[workload][0]
+    app = f"bench_{workload}"
+    if fixture == "rbac":
+        seed_rbac(app, args.pages, args.categories, args.roles, args.seed)
+    else:
+        seed_documents(app, args.documents, args.body_bytes, args.tags)
+
+    context = multiprocessing.get_context('fork')
+    with context.Pool(args.processes) as pool:
+        start_at = time.time() + 0.2
+        results = pool.map(run_writer, [(args, workload, app, worker, start_at)
+                                        for worker in range(args.processes)])
+
+    latencies = [latency for result in results for latency in result["latencies"]]
+    lock_wait = sum(result["lock_wait_seconds"] for result in results)
+    wall = max(result["finished"] for result in results) - min(result["started"] for result in results)
+    return {
+        "ops": len(latencies),
+        "throughput_ops_s": len(latencies) / max(wall, 1e-9),
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 0.99),
+        "lock_wait_ms_per_op": lock_wait * 1000 / len(latencies),
+        "peak_rss_mb": max(result["max_rss_kb"] for result in results) / 1024
+    }
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a saved baseline
+
+    Args:
+        results (dict): Workload name -> metrics of this run
+        baseline (dict): Saved benchmark output
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        list: (workload, metric, baseline value, current value) regressions
+    """
+    regressions = []
+    for workload, metrics in results.items():
+        base = baseline.get("results", {}).get(workload)
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if higher_is_better:
+                regressed = metrics[metric] < base[metric] * (1 - tolerance)
+            else:
+                regressed = metrics[metric] > base[metric] * (1 + tolerance)
+            if regressed:
+                regressions.append((workload, metric, base[metric], metrics[metric]))
+    return regressions
+
+def main():
+    """
+    Main function to run the hot path benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark rbac and documents hot paths under concurrent writers")
+    parser.add_argument('--workloads', default=",".join(WORKLOADS), help="Comma separated workloads")
+    parser.add_argument('--processes', type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument('--ops', type=int, default=50, help="Operations per writer")
+    parser.add_argument('--pages', type=int, default=500, help="Pages in rbac.json")
+    parser.add_argument('--categories', type=int, default=20, help="Menu categories")
+    parser.add_argument('--roles', type=int, default=30, help="Roles")
+    parser.add_argument('--documents', type=int, default=2000, help="Documents in docs.json")
+    parser.add_argument('--body-bytes', type=int, default=20000, help="Body size per document")
+    parser.add_argument('--tags', type=int, default=200, help="Distinct document tags")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed for the fixtures")
+    parser.add_argument('--save', help="Write the results to a baseline JSON file")
+    parser.add_argument('--compare', help="Compare against a baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    workloads = args.workloads.split(',')
+    unknown = [workload for workload in workloads if workload not in WORKLOADS]
+    if unknown:
+        parser.error(f"Unknown workloads: {', '.join(unknown)}")
+
+    results = {}
+    print("workload||processes||ops||throughput_ops_s||p50_ms||p99_ms||lock_wait_ms_per_op||peak_rss_mb")
+    try:
+        for workload in workloads:
+            metrics = results[workload] = run_workload(args, workload)
+            print(f"{workload}||{args.processes}||{metrics['ops']}||{metrics['throughput_ops_s']:.1f}"
+                  f"||{metrics['p50_ms']:.2f}||{metrics['p99_ms']:.2f}"
+                  f"||{metrics['lock_wait_ms_per_op']:.2f}||{metrics['peak_rss_mb']:.1f}")
+    finally:
+        shutil.rmtree(BENCH_ROOT, ignore_errors=True)
+
+    settings = {key: value for key, value in vars(args).items()
+                if key not in ('save', 'compare', 'tolerance', 'workloads')}
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump({"settings": settings, "results": results}, baseline_file, indent=4)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("settings") != settings:
+            print("WARNING||baseline was recorded with different settings")
+        regressions = compare(results, baseline, args.tolerance)
+        for workload, metric, base, current in regressions:
+            print(f"REGRESSION||{workload}||{metric}||{base:.2f}||{current:.2f}")
+        if regressions:
+            sys.exit(1)
+        print(f"OK||no regressions beyond {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/opt/python-venv/bin/python3
+"""
+Document Revision Benchmark
+Edits synthetic documents of growing size with small changes and compares
+storing every version as a full body with the delta-encoded revision
+history: stored bytes per version, write latency and the latency of
+reading the latest and the oldest revision
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'documents'))
+
+# Point the document store at a scratch tree before the modules read WEB_ROOT
+WORK_DIR = tempfile.mkdtemp(prefix='portal-bench-')
+os.environ['PORTAL_WEB_ROOT'] = WORK_DIR
+
+import revisions
+from document_store import docs_directory, write_body, write_revision, document_metadata
+from blob_store import blob_usage, body_codec
+
+APP = 'bench'
+WORDS = ("interface bgp neighbor route policy firewall rule vlan trunk access switch router "
+         "outage escalation ticket change window rollback verify config backup restore").split()
+
+def make_paragraphs(count, rng):
+    return ["<p>" + " ".join(rng.choices(WORDS, k=rng.randint(20, 80))) + "</p>" for _ in range(count)]
+
+def edit(paragraphs, rng):
+    # A typical edit: reword a sentence, sometimes add or drop a paragraph
+    paragraphs = list(paragraphs)
+    position = rng.randrange(len(paragraphs))
+    roll = rng.random()
+    if roll < 0.7:
+        paragraphs[position] = "<p>" + " ".join(rng.choices(WORDS, k=rng.randint(20, 80))) + "</p>"
+    elif roll < 0.85:
+        paragraphs.insert(position, make_paragraphs(1, rng)[0])
+    elif len(paragraphs) > 1:
+        del paragraphs[position]
+    return paragraphs
+
+def make_record(paragraphs, version):
+    return {
+        "app": APP,
+        "title": f"Runbook v{version}",
+        "category": "runbooks",
+        "adom": "admin",
+        "tags": ["network"],
+        "summernote_content": "".join(paragraphs),
+        "created_date": "2026-01-01 00:00:00"
+    }
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def stored_bytes():
+    usage = blob_usage(APP)
+    logs = 0
+    directory = revisions.revisions_directory(APP)
+    if os.path.isdir(directory):
+        logs = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith('.json'))
+    return usage['body_bytes'] + usage['delta_bytes'] + logs
+
+def reset_store():
+    shutil.rmtree(os.path.join(WORK_DIR, APP), ignore_errors=True)
+    os.makedirs(docs_directory(APP), exist_ok=True)
+    revisions.content_cache.entries.clear()
+
+def main():
+    """
+    Main function to run the revision benchmark
+    """
+    parser = argparse.ArgumentParser(description="Compare full-body versions with delta-encoded revisions")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000],
+                        help="Document sizes in paragraphs")
+    parser.add_argument('--edits', type=int, default=100, help="Edits per document")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed of the corpus")
+    args = parser.parse_args()
+
+    try:
+        print(f"edits||{args.edits}||body codec {body_codec()}||snapshot every "
+              f"{revisions.REVISION_SNAPSHOT_INTERVAL} revisions")
+        print("body KB||layout||stored KB per version||write p50 ms||write p99 ms||read latest ms||read oldest ms")
+        for size in args.sizes:
+            rng = random.Random(args.seed)
+            versions = [make_paragraphs(size, rng)]
+            for _ in range(args.edits):
+                versions.append(edit(versions[-1], rng))
+            records = [make_record(paragraphs, n + 1) for n, paragraphs in enumerate(versions)]
+            body_kb = len(records[0]['summernote_content']) / 1024
+
+            # Every version saved as a new full body
+            reset_store()
+            write_ms = [timed(lambda: write_body(APP, record))[0] for record in records[1:]]
+            per_version = stored_bytes() / len(records)
+            print(f"{body_kb:.0f}||full bodies||{per_version / 1024:.1f}||"
+                  f"{percentile(write_ms, 0.5):.2f}||{percentile(write_ms, 0.99):.2f}||-||-")
+
+            # Revision history, seeded like a document saved before its first edit
+            reset_store()
+            doc_id = f"doc-{size}"
+            first = write_body(APP, records[0])
+            metadata = document_metadata(first['record'], first['blobs'])
+            write_ms = []
+            for record in records[1:]:
+                elapsed, result = timed(lambda: write_revision(APP, doc_id, metadata, record))
+                if not result['success']:
+                    print(f"ERROR||write_revision||{result['error']}")
+                    sys.exit(1)
+                metadata = result['metadata']
+                write_ms.append(elapsed)
+            per_version = stored_bytes() / len(records)
+
+            # Reads from a cold process: nothing reconstructed yet
+            revisions.content_cache.entries.clear()
+            latest_ms, latest = timed(lambda: revisions.read_revision(APP, doc_id))
+            revisions.content_cache.entries.clear()
+            oldest_ms, oldest = timed(lambda: revisions.read_revision(APP, doc_id, 1))
+            assert latest['record']['summernote_content'] == records[-1]['summernote_content']
+            assert oldest['record']['summernote_content'] == records[0]['summernote_content']
+            print(f"{body_kb:.0f}||revisions||{per_version / 1024:.1f}||"
+                  f"{percentile(write_ms, 0.5):.2f}||{percentile(write_ms, 0.99):.2f}||"
+                  f"{latest_ms:.2f}||{oldest_ms:.2f}")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/opt/python-venv/bin/python3
+"""
+Document Search Benchmark
+Builds a synthetic document store, rebuilds its search index, then times
+incremental indexing of new documents and cold and warm queries of
+different selectivity
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import shutil
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'documents'))
+
+# Point the document store at a scratch tree before the modules read WEB_ROOT
+WORK_DIR = tempfile.mkdtemp(prefix='portal-bench-')
+os.environ['PORTAL_WEB_ROOT'] = WORK_DIR
+
+import search_index
+from file_operations import FileLock, json_cache
+from document_store import docs_directory, index_file, body_file
+
+APP = 'bench'
+ROLES = ['admin', 'netops', 'secops', 'voice']
+
+def make_vocabulary(size, rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+def make_record(n, vocabulary, weights, rng):
+    words = rng.choices(vocabulary, cum_weights=weights, k=rng.randint(40, 240))
+    paragraphs = [" ".join(words[i:i + 40]) for i in range(0, len(words), 40)]
+    return {
+        "app": APP,
+        "title": " ".join(rng.choices(vocabulary[:2000], k=4)) + f" {n}",
+        "category": f"category-{n % 12}",
+        "adom": ROLES[n % len(ROLES)],
+        "tags": [f"tag-{n % 40}", f"site-{n % 7}"],
+        "summernote_content": "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs),
+        "created_date": "2026-01-01 00:00:00"
+    }
+
+def seed(count, vocabulary, weights, rng):
+    """
+    Write document bodies and a docs.json index for the benchmark app
+    """
+    os.makedirs(docs_directory(APP), exist_ok=True)
+    documents = {}
+    rows = []
+    for n in range(count):
+        doc_id = f"{n:08d}-0000-4000-8000-000000000000"
+        record = make_record(n, vocabulary, weights, rng)
+        with open(body_file(APP, doc_id), 'w') as body:
+            json.dump(record, body, separators=(',', ':'))
+        documents[doc_id] = {key: value for key, value in record.items() if key != 'summernote_content'}
+        rows.append([record['title'], record['tags'], record['category'], record['adom']])
+    with FileLock(index_file(APP), compact=True) as file_lock:
+        file_lock.write({"headers": ["Title", "Tags", "Category", "ADOM"], "data": rows, "documents": documents})
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def drop_caches():
+    # What a fresh CLI process sees: nothing parsed or mapped yet
+    search_index.segment_cache.entries.clear()
+    search_index.snapshot_cache.entries.clear()
+    json_cache.entries.clear()
+
+def main():
+    """
+    Main function to run the search benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the document search index")
+    parser.add_argument('--docs', type=int, default=100000, help="Documents in the store")
+    parser.add_argument('--saves', type=int, default=200, help="Documents indexed incrementally")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per warm query")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed of the corpus")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(30000, rng)
+    # Zipf-like term distribution, as in natural text
+    weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    try:
+        elapsed, _ = timed(lambda: seed(args.docs, vocabulary, weights, rng))
+        print(f"seed||{args.docs} documents||{elapsed / 1000:.1f} s")
+
+        elapsed, result = timed(lambda: search_index.rebuild_index(APP))
+        print(f"rebuild||{result['indexed']} documents||{elapsed / 1000:.1f} s")
+        directory = search_index.search_directory(APP)
+        index_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"index size||{index_bytes / 1024 / 1024:.1f} MB")
+
+        save_ms = []
+        for n in range(args.docs, args.docs + args.saves):
+            record = make_record(n, vocabulary, weights, rng)
+            elapsed, result = timed(lambda: search_index.index_document(APP, f"new-{n}", record))
+            if not result['success']:
+                print(f"ERROR||index_document||{result['error']}")
+                sys.exit(1)
+            save_ms.append(elapsed)
+        with open(search_index.manifest_file(APP)) as manifest:
+            segments = len(json.load(manifest)['segments'])
+        print(f"incremental index||p50 {percentile(save_ms, 0.5):.2f} ms||"
+              f"p99 {percentile(save_ms, 0.99):.2f} ms||{segments} segments")
+
+        queries = [
+            ("rare term", vocabulary[20000], None),
+            ("mid term", vocabulary[500], None),
+            ("common term", vocabulary[3], None),
+            ("three terms", " ".join(vocabulary[i] for i in (40, 900, 7000)), None),
+            ("term + tag facet", vocabulary[500], {"tags": ["tag-4"]}),
+            ("facet only", "", {"tags": ["tag-4"], "category": ["category-4"]}),
+        ]
+
+        print("query||matches||cold ms||warm p50 ms||warm p99 ms")
+        for name, query, filters in queries:
+            drop_caches()
+            cold, result = timed(lambda: search_index.search_documents(APP, query, roles=['admin', 'netops'],
+                                                                       filters=filters))
+            warm = [
+                timed(lambda: search_index.search_documents(APP, query, roles=['admin', 'netops'],
+                                                            filters=filters))[0]
+                for _ in range(args.repeat)
+            ]
+            print(f"{name}||{result['total']}||{cold:.1f}||{percentile(warm, 0.5):.2f}||"
+                  f"{percentile(warm, 0.99):.2f}")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
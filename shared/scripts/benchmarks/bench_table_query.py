@@ -0,0 +1,78 @@
+#!/opt/python-venv/bin/python3
+"""
+DataTables Query Benchmark
+Times server-side page requests against a large docs.json table: cold
+(new process, sidecar index on disk), warm (worker-style in-memory index)
+and filtered, and compares the response size with shipping the whole table
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+
+import table_query
+from file_operations import FileLock, json_cache
+from table_query import query_table
+
+def page_request(start, search="", column=0, direction="asc"):
+    return {
+        "draw": 1,
+        "start": start,
+        "length": 25,
+        "search": {"value": search},
+        "order": [{"column": column, "dir": direction}],
+        "columns": [{"search": {"value": ""}} for _ in range(4)]
+    }
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def main():
+    """
+    Main function to run the table query benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark DataTables server-side queries")
+    parser.add_argument('--rows', type=int, default=50000, help="Rows in docs.json")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='portal-bench-')
+    path = os.path.join(work_dir, 'docs.json')
+    try:
+        rows = [[f"Document {n}", [f"tag-{n % 50}", f"tag-{n % 7}"], f"category-{n % 10}", "admin"]
+                for n in range(args.rows)]
+        with FileLock(path, compact=True) as file_lock:
+            file_lock.write({"data": rows, "headers": ["Title", "Tags", "Category", "ADOM"]})
+        full_bytes = len(json.dumps(rows))
+
+        print("case||ms||response_bytes")
+        cases = [
+            ("first sort, builds index", lambda: query_table(path, "data", page_request(0))),
+            ("same column, page 100", lambda: query_table(path, "data", page_request(2500))),
+            ("descending, last page", lambda: query_table(path, "data", page_request(args.rows - 25, direction="desc"))),
+            ("global search", lambda: query_table(path, "data", page_request(0, search="document 4999"))),
+            ("repeat global search", lambda: query_table(path, "data", page_request(0, search="tag-3"))),
+        ]
+        for name, case in cases:
+            elapsed, result = timed(case)
+            print(f"{name}||{elapsed:.2f}||{len(json.dumps(result))}")
+
+        # A fresh process: no parsed table or index in memory, sidecar on disk
+        json_cache.invalidate(os.path.abspath(path))
+        table_query.table_index_cache.invalidate(path)
+        elapsed, result = timed(lambda: query_table(path, "data", page_request(100)))
+        print(f"cold process, sidecar index||{elapsed:.2f}||{len(json.dumps(result))}")
+        print(f"whole table inlined||-||{full_bytes}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
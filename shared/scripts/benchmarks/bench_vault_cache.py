@@ -0,0 +1,100 @@
+#!/opt/python-venv/bin/python3
+"""
+Vault Secret Cache Benchmark
+Runs the secret lookups of one login (six LDAP settings plus the ADOM list)
+against a local fake Vault and reports Vault round trips and latency with a
+cold cache, a warm in-memory cache, the disk tier in a new process, and a
+slow Vault with expired entries
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+
+from fake_vault import make_server
+from vault import vault_utility
+from vault.vault_utility import VaultUtility, SecretCache
+
+LDAP_PREFIX = "wens/portal/framework/config/ldap"
+LOGIN_KEYS = [f"{LDAP_PREFIX}/{name}" for name in
+              ("username", "password", "adom_server", "international_server", "base_dn", "user_fqdn")]
+LOGIN_KEYS.append("wens/portal/bench/config/access/adom")
+
+def run_logins(server, cache, logins):
+    """
+    Time a series of logins
+
+    Args:
+        server: Fake Vault server
+        cache (SecretCache): Secret cache used by the VaultUtility instances
+        logins (int): Number of logins
+
+    Returns:
+        tuple: (Vault requests made, mean login latency in ms)
+    """
+    before = server.requests.get("total", 0)
+    start = time.perf_counter()
+    for _ in range(logins):
+        # Every login script constructs its own VaultUtility
+        vault = VaultUtility(vault_url=f"http://127.0.0.1:{server.server_address[1]}",
+                             token="bench-token", cache=cache)
+        for key in LOGIN_KEYS:
+            vault.get_value_for_key(key)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return server.requests.get("total", 0) - before, elapsed_ms / logins
+
+def main():
+    """
+    Main function to run the vault cache benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Vault secret cache against a fake Vault")
+    parser.add_argument('--logins', type=int, default=20, help="Logins per scenario")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="Fake Vault latency per request")
+    args = parser.parse_args()
+
+    server = make_server(secrets={key: {"value": f"value-of-{key}"} for key in LOGIN_KEYS},
+                         latency=args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cache_dir = tempfile.mkdtemp(prefix='portal-vault-bench-')
+    cache_file = os.path.join(cache_dir, 'vault_cache.bin')
+
+    print("scenario||vault_requests_per_login||ms_per_login")
+    try:
+        uncached = SecretCache(cache_file='')
+        vault_utility.VAULT_CACHE_TTL = 0
+        requests, latency = run_logins(server, uncached, args.logins)
+        print(f"no cache||{requests / args.logins:.1f}||{latency:.2f}")
+        vault_utility.VAULT_CACHE_TTL = 300
+
+        warm = SecretCache(cache_file=cache_file)
+        requests, latency = run_logins(server, warm, 1)
+        print(f"cold cache||{requests:.1f}||{latency:.2f}")
+        requests, latency = run_logins(server, warm, args.logins)
+        print(f"warm memory||{requests / args.logins:.1f}||{latency:.2f}")
+
+        # A fresh process only has the disk tier
+        requests, latency = run_logins(server, SecretCache(cache_file=cache_file), 1)
+        disk_tier = "on" if warm.fernet is not None else "off (cryptography missing or directory not owned)"
+        print(f"new process, disk tier {disk_tier}||{requests:.1f}||{latency:.2f}")
+
+        # Expired entries while Vault hangs are served stale after the revalidate timeout
+        for entry in warm.entries.values():
+            entry["fetched_at"] -= entry["ttl"] + 1
+        server.latency = 5.0
+        requests, latency = run_logins(server, warm, 1)
+        print(f"expired, vault slow||{requests:.1f}||{latency:.2f}")
+        print(f"cache stats||{warm.stats}")
+    finally:
+        server.latency = 0
+        server.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
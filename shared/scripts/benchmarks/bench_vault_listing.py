@@ -0,0 +1,81 @@
+#!/opt/python-venv/bin/python3
+"""
+Vault Tree Traversal Benchmark
+Walks a synthetic secret tree on a local fake Vault with
+VaultUtility.iter_secrets at several concurrency limits, with and without
+value reads, and reports total and time-to-first-result latency
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+
+from vault.vault_utility import VaultUtility, SecretCache
+
+def make_tree(apps, leaves):
+    """
+    Build a secret tree shaped like the portal's: apps with config folders
+
+    Args:
+        apps (int): Number of application folders
+        leaves (int): Secrets per application
+
+    Returns:
+        dict: Secret path to secret data
+    """
+    return {
+        f"wens/portal/app{a}/config/{'access' if n % 2 else 'settings'}/key{n}": {"value": f"{a}-{n}"}
+        for a in range(apps) for n in range(leaves)
+    }
+
+def main():
+    """
+    Main function to run the traversal benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark concurrent Vault tree traversal")
+    parser.add_argument('--apps', type=int, default=20, help="Application folders in the tree")
+    parser.add_argument('--leaves', type=int, default=50, help="Secrets per application")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="Fake Vault latency per request")
+    parser.add_argument('--workers', default='1,8,32', help="Comma separated concurrency limits")
+    args = parser.parse_args()
+
+    # Run the fake Vault in its own process so it does not share our GIL
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as secrets_file:
+        json.dump(make_tree(args.apps, args.leaves), secrets_file)
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_vault.py'),
+         '--port', '0', '--secrets', secrets_file.name, '--latency-ms', str(args.latency_ms)],
+        stdout=subprocess.PIPE, text=True
+    )
+    vault_url = server.stdout.readline().split()[-1]
+    vault = VaultUtility(vault_url=vault_url, token="bench-token", cache=SecretCache(cache_file=''))
+
+    print(f"tree: {args.apps * args.leaves} secrets, {args.latency_ms} ms per request")
+    print("mode||max_workers||total_s||first_result_ms||requests||max_in_flight")
+    try:
+        for keys_only in (False, True):
+            for workers in [int(w) for w in args.workers.split(',')]:
+                stats = {}
+                start = time.perf_counter()
+                first = None
+                for _ in vault.iter_secrets("wens", keys_only=keys_only, max_workers=workers, stats=stats):
+                    if first is None:
+                        first = (time.perf_counter() - start) * 1000
+                total = time.perf_counter() - start
+                mode = "keys only" if keys_only else "keys+values"
+                print(f"{mode}||{workers}||{total:.2f}||{first:.1f}||"
+                      f"{stats['lists'] + stats['reads']}||{stats['max_in_flight']}")
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(secrets_file.name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/opt/python-venv/bin/python3
+"""
+Fake Vault Server
+Minimal HTTP stand-in for the Vault endpoints VaultUtility uses (token
+lookup, mounts, kv-v2 read and list), with injectable latency and outages
+for exercising the secret cache locally
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class FakeVaultHandler(BaseHTTPRequestHandler):
+    """
+    Request handler answering from the server's in-memory secret store
+    """
+
+    # Keep-alive, like the real Vault, without Nagle delays between header and body
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def handle_request(self, method):
+        server = self.server
+        with server.lock:
+            server.requests[method] = server.requests.get(method, 0) + 1
+            server.requests["total"] = server.requests.get("total", 0) + 1
+
+        path = self.path.split('?', 1)[0]
+        if path == '/fake/stats':
+            return self.send_json(200, {"requests": server.requests})
+
+        if server.latency:
+            time.sleep(server.latency)
+        if server.down:
+            return self.send_json(503, {"errors": ["Vault is sealed"]})
+
+        mount = f"/v1/{server.mount}/"
+        if path == '/v1/auth/token/lookup-self':
+            return self.send_json(200, {"data": {"id": "fake"}})
+        if path == '/v1/sys/mounts':
+            return self.send_json(200, {"data": {f"{server.mount}/": {"type": "kv", "options": {"version": "2"}}}})
+        if method == 'GET' and path.startswith(f"{mount}data/"):
+            key = path[len(f"{mount}data/"):]
+            if key not in server.secrets:
+                return self.send_json(404, {"errors": []})
+            return self.send_json(200, {
+                "lease_duration": 0,
+                "data": {"data": server.secrets[key], "metadata": {"version": 1, "custom_metadata": None}}
+            })
+        if method == 'LIST' and path.startswith(f"{mount}metadata"):
+            prefix = path[len(f"{mount}metadata"):].strip('/')
+            prefix = f"{prefix}/" if prefix else ""
+            keys = sorted({
+                key[len(prefix):].split('/', 1)[0] + ('/' if '/' in key[len(prefix):] else '')
+                for key in server.secrets if key.startswith(prefix)
+            })
+            if not keys:
+                return self.send_json(404, {"errors": []})
+            return self.send_json(200, {"data": {"keys": keys}})
+        return self.send_json(404, {"errors": [f"no handler for {method} {path}"]})
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_LIST(self):
+        self.handle_request('LIST')
+
+def make_server(port=0, secrets=None, mount='kv', latency=0.0):
+    """
+    Create a fake Vault server
+
+    Args:
+        port (int): TCP port, 0 picks a free one
+        secrets (dict): Secret path to secret data
+        mount (str): kv-v2 mount point
+        latency (float): Seconds added to every request
+
+    Returns:
+        ThreadingHTTPServer: Server with secrets, latency, down and requests attributes
+    """
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeVaultHandler)
+    server.secrets = dict(secrets or {})
+    server.mount = mount
+    server.latency = latency
+    server.down = False
+    server.requests = {}
+    server.lock = threading.Lock()
+    return server
+
+def main():
+    """
+    Main function to run the fake Vault server
+    """
+    parser = argparse.ArgumentParser(description="Run a fake Vault server for local testing")
+    parser.add_argument('--port', type=int, default=8200, help="Port to listen on")
+    parser.add_argument('--secrets', help="JSON file mapping secret paths to secret data")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Latency added to every request")
+    args = parser.parse_args()
+
+    secrets = {}
+    if args.secrets:
+        with open(args.secrets) as secrets_file:
+            secrets = json.load(secrets_file)
+
+    server = make_server(args.port, secrets, latency=args.latency_ms / 1000)
+    print(f"Fake Vault listening on http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
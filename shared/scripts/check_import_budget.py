@@ -0,0 +1,115 @@
+#!/opt/python-venv/bin/python3
+"""
+Import Budget Check
+Measures the cold import time of each module configuration chain in a fresh
+interpreter and fails if a chain exceeds its budget or eagerly loads a heavy module
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULES_DIR = os.path.join(SCRIPTS_DIR, 'modules')
+
+# Configuration chains: name -> (directory placed on sys.path, module to import)
+CONFIG_CHAINS = {
+    'modules': (MODULES_DIR, 'modules_config'),
+    'rbac': (os.path.join(MODULES_DIR, 'rbac'), 'rbac_config'),
+    'documents': (os.path.join(MODULES_DIR, 'documents'), 'documents_config'),
+    'vault': (os.path.join(MODULES_DIR, 'vault'), 'vault_config'),
+    'ldap': (os.path.join(MODULES_DIR, 'ldap'), 'ldap_config'),
+}
+
+# Modules that must never be imported just by loading a configuration chain
+HEAVY_MODULES = ['pandas', 'numpy', 'psutil', 'requests', 'ldap', 'hvac']
+
+DEFAULT_BUDGET_MS = 50
+
+# Runs inside the child interpreter so each chain is measured from a cold start
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{
+    "elapsed_ms": elapsed_ms,
+    "heavy_loaded": [m for m in {heavy!r} if m in sys.modules]
+}}))
+"""
+
+def measure_chain(path, module, python=sys.executable):
+    """
+    Import a configuration module in a fresh interpreter and time it
+
+    Args:
+        path (str): Directory containing the module
+        module (str): Module name to import
+        python (str): Interpreter to use
+
+    Returns:
+        dict: Elapsed import time and heavy modules that were loaded, or an error
+    """
+    code = PROBE.format(path=path, module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run([python, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "import failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def check_budget(budget_ms, chains=None, repeat=3):
+    """
+    Check every configuration chain against the import budget
+
+    Args:
+        budget_ms (float): Maximum allowed import time per chain in milliseconds
+        chains (list): Chain names to check, defaults to all
+        repeat (int): Number of cold runs per chain, the fastest is kept
+
+    Returns:
+        dict: Per-chain results with an 'ok' flag
+    """
+    report = {}
+    for name in chains or CONFIG_CHAINS:
+        path, module = CONFIG_CHAINS[name]
+        runs = [measure_chain(path, module) for _ in range(repeat)]
+        errors = [run for run in runs if "error" in run]
+        if errors:
+            report[name] = {"ok": False, "error": errors[0]["error"]}
+            continue
+
+        best = min(runs, key=lambda run: run["elapsed_ms"])
+        report[name] = {
+            "ok": best["elapsed_ms"] <= budget_ms and not best["heavy_loaded"],
+            "elapsed_ms": round(best["elapsed_ms"], 2),
+            "heavy_loaded": best["heavy_loaded"]
+        }
+    return report
+
+def main():
+    """
+    Main function to run the import budget check
+    """
+    parser = argparse.ArgumentParser(description="Check import time of module configuration chains")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum import time per chain in milliseconds")
+    parser.add_argument('--chain', action='append', choices=list(CONFIG_CHAINS),
+                        help="Chain to check (repeatable), defaults to all")
+    parser.add_argument('--repeat', type=int, default=3, help="Cold runs per chain")
+    args = parser.parse_args()
+
+    report = check_budget(args.budget_ms, args.chain, args.repeat)
+    for name, result in report.items():
+        status = "OK" if result["ok"] else "FAIL"
+        if "error" in result:
+            print(f"{status}||{name}||{result['error']}")
+        else:
+            heavy = ",".join(result["heavy_loaded"]) or "-"
+            print(f"{status}||{name}||{result['elapsed_ms']}ms||heavy={heavy}")
+
+    sys.exit(0 if all(result["ok"] for result in report.values()) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Lazy Imports
+Defers loading of heavy modules until the first attribute access
+"""
+
+import sys
+import types
+import importlib
+
+class LazyModule(types.ModuleType):
+    """
+    Module placeholder that imports the real module on first attribute access
+    """
+
+    def __init__(self, name):
+        """
+        Initialize the placeholder
+
+        Args:
+            name (str): Fully qualified name of the module to load
+        """
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = name
+
+    def _load(self):
+        """
+        Import the real module and adopt its namespace
+
+        Returns:
+            module: The loaded module
+        """
+        module = importlib.import_module(self.__dict__['_lazy_target'])
+        # Copy the namespace so later lookups bypass __getattr__ entirely
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        target = self.__dict__['_lazy_target']
+        state = "loaded" if target in sys.modules else "not loaded"
+        return f"<lazy module '{target}' ({state})>"
+
+def lazy_import(name):
+    """
+    Return a module that is only imported when first used
+
+    Args:
+        name (str): Fully qualified module name
+
+    Returns:
+        module: The real module if already imported, otherwise a LazyModule
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+def is_loaded(name):
+    """
+    Check whether a module has actually been imported
+
+    Args:
+        name (str): Fully qualified module name
+
+    Returns:
+        bool: True if the module is present in sys.modules
+    """
+    return name in sys.modules
@@ -0,0 +1,220 @@
+"""
+Config Snapshots
+Validated, pre-serialized copies of an application's menu and RBAC config
+files (WATCHER_FILES), kept current by watcher/config_watcher.py
+
+For each watched file the watcher writes, under portal/cache/snapshots/:
+  {relative path}.json  compact JSON: version, etag, source and data
+  {relative path}.php   the same as a PHP array, included through OPcache
+and a manifest (manifest.json and manifest.php) with the version of every
+file, the application version (the highest file version) and the source
+signature of files it rejected as invalid.
+
+Versions only increase, so "unchanged since N" is a comparison. A snapshot
+is trusted while its source signature matches the file on disk; a file the
+watcher rejected keeps serving its last valid snapshot, and a file changed
+behind a stopped watcher is read directly.
+"""
+
+import os
+import logging
+from modules_config import *
+from file_operations import JsonCache
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_DIRECTORY_NAME = 'cache/snapshots'
+SNAPSHOT_MANIFEST_NAME = 'manifest'
+
+# Parsed snapshots and manifests by path, validated by file signature
+snapshot_cache = JsonCache(max_entries=64)
+
+def portal_directory(app):
+    return f"{WEB_ROOT}/{app}/portal"
+
+def snapshot_directory(app):
+    """
+    Get the snapshot directory of an application
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        str: Directory path with trailing slash
+    """
+    return f"{portal_directory(app)}/{SNAPSHOT_DIRECTORY_NAME}/"
+
+def snapshot_file(app, name, extension='json'):
+    """
+    Get the path of a snapshot
+
+    Args:
+        app (str): Application identifier
+        name (str): Watched file path relative to the portal directory, e.g. "config/rbac.json"
+        extension (str): "json" or "php"
+
+    Returns:
+        str: Snapshot file path
+    """
+    return f"{snapshot_directory(app)}{name}.{extension}"
+
+def manifest_file(app, extension='json'):
+    return f"{snapshot_directory(app)}{SNAPSHOT_MANIFEST_NAME}.{extension}"
+
+def source_signature(stat_result):
+    """
+    Build the source signature readers compare before trusting a snapshot
+
+    Uses what PHP gets from a single cached stat: fileinode, filemtime and
+    filesize, as nav_index.source_signature does.
+
+    Args:
+        stat_result (os.stat_result): Result of os.stat on the watched file
+
+    Returns:
+        list: [inode, mtime in whole seconds, size]
+    """
+    return [stat_result.st_ino, int(stat_result.st_mtime), stat_result.st_size]
+
+def reject_constant(name):
+    raise ValueError(f"Invalid JSON constant: {name}")
+
+def parse_strict(payload):
+    """
+    Parse JSON as PHP's json_decode would accept it
+
+    Args:
+        payload (bytes): File contents
+
+    Returns:
+        Parsed data
+
+    Raises:
+        ValueError: If the payload is not valid JSON
+    """
+    return json.loads(payload, parse_constant=reject_constant)
+
+def load_cached(path):
+    """
+    Read a JSON file through the snapshot cache
+
+    Args:
+        path (str): File path
+
+    Returns:
+        Parsed data, or None if the file is missing or unreadable
+    """
+    try:
+        with open(path, 'rb') as data_file:
+            signature = JsonCache.signature(os.fstat(data_file.fileno()))
+            data = snapshot_cache.get(path, signature)
+            if data is JsonCache.MISSING:
+                data = json.load(data_file)
+                snapshot_cache.put(path, signature, data)
+    except (OSError, ValueError):
+        return None
+    return data
+
+def read_manifest(app):
+    """
+    Read the snapshot manifest of an application
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        dict: Manifest, or None if the watcher has not written one
+    """
+    manifest = load_cached(manifest_file(app))
+    if not isinstance(manifest, dict) or manifest.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return manifest
+
+def snapshot_version(app, name=None):
+    """
+    Get the version of a watched file, or of the whole application
+
+    Args:
+        app (str): Application identifier
+        name (str): Watched file path relative to the portal directory, None for the application
+
+    Returns:
+        int: Version, 0 if unknown
+    """
+    manifest = read_manifest(app)
+    if manifest is None:
+        return 0
+    if name is None:
+        return manifest.get('version', 0)
+    return manifest.get('files', {}).get(name, {}).get('version', 0)
+
+def unchanged_since(app, version, name=None):
+    """
+    Check whether a watched file, or any file of the application, changed
+    after a version the caller already has
+
+    Only answers from the manifest, so a file changed while the watcher
+    is stopped is not noticed; read_config always checks the file itself.
+
+    Args:
+        app (str): Application identifier
+        version (int): Version the caller holds
+        name (str): Watched file path relative to the portal directory, None for any file
+
+    Returns:
+        bool: True if nothing changed after that version
+    """
+    current = snapshot_version(app, name)
+    return current != 0 and current <= int(version or 0)
+
+def read_config(app, name):
+    """
+    Read a watched JSON file from its validated snapshot
+
+    Args:
+        app (str): Application identifier
+        name (str): File path relative to the portal directory, e.g. "config/rbac.json"
+
+    Returns:
+        dict: Success status, data, version, etag and where the data came
+              from ("snapshot", or "file" without a version), or an error message
+    """
+    source_path = f"{portal_directory(app)}/{name}"
+    try:
+        source = source_signature(os.stat(source_path))
+    except FileNotFoundError:
+        return {"success": False, "error": f"{name} not found"}
+
+    snapshot = load_cached(snapshot_file(app, name))
+    if isinstance(snapshot, dict) and snapshot.get('format') == SNAPSHOT_FORMAT:
+        current = snapshot.get('source') == source
+        if not current:
+            # The watcher rejected the file on disk: keep the last valid version
+            manifest = read_manifest(app) or {}
+            current = manifest.get('rejected', {}).get(name) == source
+        if current:
+            return {
+                "success": True,
+                "data": snapshot['data'],
+                "version": snapshot['version'],
+                "etag": snapshot['etag'],
+                "from": "snapshot"
+            }
+    else:
+        snapshot = None
+
+    # The watcher is stopped or has not caught up yet
+    try:
+        with open(source_path, 'rb') as source_file:
+            data = parse_strict(source_file.read())
+    except (OSError, ValueError) as e:
+        logging.error(f"Failed to read {source_path}: {str(e)}")
+        if snapshot is None:
+            return {"success": False, "error": f"Failed to read {name}: {str(e)}"}
+        return {
+            "success": True,
+            "data": snapshot['data'],
+            "version": snapshot['version'],
+            "etag": snapshot['etag'],
+            "from": "snapshot"
+        }
+    return {"success": True, "data": data, "version": 0, "etag": None, "from": "file"}
@@ -0,0 +1,107 @@
+"""
+Data Index
+Hashed membership indexes maintained alongside order-preserving JSON lists
+"""
+
+def freeze(value):
+    """
+    Build the canonical hashable key of a JSON value
+
+    Args:
+        value: JSON value (typically a table row list)
+
+    Returns:
+        Hashable equivalent: lists become tuples, dicts become sorted item tuples
+    """
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    return value
+
+def append_unique(items, new_items, seen=None):
+    """
+    Append values that are not yet present, preserving order
+
+    A handful of candidates is checked by scanning the list; larger batches
+    build a membership set once instead of scanning per value.
+
+    Args:
+        items (list): List of hashable values, updated in place
+        new_items (iterable): Candidate values
+        seen (set): Existing membership set for items, built if needed and not given
+
+    Returns:
+        list: Values that were appended
+    """
+    new_items = list(new_items)
+    if seen is None:
+        if len(new_items) <= RowIndex.SCAN_LIMIT:
+            added = []
+            for item in new_items:
+                if item not in items:
+                    items.append(item)
+                    added.append(item)
+            return added
+        seen = set(items)
+
+    added = []
+    for item in new_items:
+        if item not in seen:
+            seen.add(item)
+            items.append(item)
+            added.append(item)
+    return added
+
+class RowIndex:
+    """
+    Hashed index over the rows of a JSON table, kept in step with the list.
+
+    Building the key set costs far more than a single list scan (rows are
+    nested lists that must be frozen in Python), so the first few lookups
+    scan the list and the index is only built once a caller does enough
+    lookups for it to pay off. Bulk inserts are then linear instead of
+    quadratic while one-off saves stay as cheap as before.
+    """
+
+    # Lookups answered by scanning before the key set is built
+    SCAN_LIMIT = 8
+
+    def __init__(self, rows):
+        """
+        Attach to a row list
+
+        Args:
+            rows (list): Table rows, updated in place by add()
+        """
+        self.rows = rows
+        self.keys = None
+        self.lookups = 0
+
+    def _build(self):
+        self.keys = {freeze(row) for row in self.rows}
+
+    def __contains__(self, row):
+        if self.keys is None:
+            self.lookups += 1
+            if self.lookups <= self.SCAN_LIMIT:
+                return row in self.rows
+            self._build()
+        return freeze(row) in self.keys
+
+    def add(self, row):
+        """
+        Append a row if it is not already present
+
+        Args:
+            row (list): Table row
+
+        Returns:
+            bool: True if the row was appended
+        """
+        if row in self:
+            return False
+        self.rows.append(row)
+        if self.keys is not None:
+            self.keys.add(freeze(row))
+        return True
@@ -0,0 +1,308 @@
+"""
+Blob Store
+Content-addressed storage for document bodies, revision deltas and images
+
+Blobs are named by the SHA-256 of their content, so identical bodies and
+images are stored once. Bodies are compressed (zstd when available, else
+gzip) and the codec is part of the blob name; images are stored as-is under
+their extension so the web server can serve them directly. Garbage
+collection is given the reference count of every blob, counted from the
+document index, and removes blobs nobody references once they are older
+than a grace period.
+"""
+
+import re
+import gzip
+import time
+import hashlib
+import binascii
+from documents_config import *
+from file_operations import atomic_write
+from instrumentation import timed_phase
+
+# Body codecs by name, with the suffix they add to the blob name
+CODEC_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+INLINE_IMAGE_PATTERN = re.compile(
+    r'''(src\s*=\s*)(["'])data:image/([a-z+.-]+);base64,([A-Za-z0-9+/=\s]+)\2''',
+    re.IGNORECASE
+)
+
+# zstandard module once imported, False if it is not installed
+zstd_module = None
+
+def zstandard():
+    """
+    Import the optional zstandard package
+
+    Returns:
+        module: zstandard, or None if it is not installed
+    """
+    global zstd_module
+    if zstd_module is None:
+        try:
+            import zstandard as module
+        except ImportError:
+            module = False
+        zstd_module = module
+    return zstd_module or None
+
+def body_codec():
+    """
+    Get the codec new bodies are compressed with
+
+    Returns:
+        str: "zstd" if configured and installed, otherwise "gzip"
+    """
+    if BLOB_BODY_CODEC == 'zstd' and zstandard() is not None:
+        return 'zstd'
+    return 'gzip'
+
+def compress(payload, codec):
+    if codec == 'zstd':
+        return zstandard().ZstdCompressor(level=BLOB_ZSTD_LEVEL).compress(payload)
+    return gzip.compress(payload, compresslevel=BLOB_GZIP_LEVEL, mtime=0)
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard() is None:
+            raise RuntimeError("zstandard is required to read zstd compressed blobs")
+        return zstandard().ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def blob_directory(app):
+    """
+    Get the blob directory of an application, next to docs.json
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        str: Directory path with trailing slash
+    """
+    return f"{WEB_ROOT}/{app}/portal/data/{app}/docs/{BLOB_DIRECTORY_NAME}/"
+
+def blob_url_base(app):
+    return f"/{app}/portal/data/{app}/docs/{BLOB_DIRECTORY_NAME}/"
+
+def blob_path(app, name):
+    """
+    Get the path of a blob, fanned out by the first two hash digits
+
+    Args:
+        app (str): Application identifier
+        name (str): Blob name
+
+    Returns:
+        str: Blob file path
+    """
+    return f"{blob_directory(app)}{name[:2]}/{name}"
+
+def blob_url(app, name):
+    return f"{blob_url_base(app)}{name[:2]}/{name}"
+
+def store_blob(app, name, payload):
+    """
+    Write a blob unless it already exists
+
+    An existing blob has its mtime refreshed, so garbage collection gives
+    a blob that is about to be referenced again its full grace period.
+
+    Args:
+        app (str): Application identifier
+        name (str): Blob name
+        payload (bytes): Stored bytes
+
+    Returns:
+        bool: True if the blob was written, False if it was deduplicated
+    """
+    path = blob_path(app, name)
+    try:
+        os.utime(path)
+        return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, payload)
+    return True
+
+def put_body(app, payload, kind='json'):
+    """
+    Store a serialized document body or revision delta
+
+    Args:
+        app (str): Application identifier
+        payload (bytes): Uncompressed body JSON
+        kind (str): "json" for a full body, "delta" for a revision delta
+
+    Returns:
+        str: Blob name: content hash, kind and the codec suffix
+    """
+    digest = hashlib.sha256(payload).hexdigest()
+
+    # The same content stored with another codec is reused as is
+    for suffix in CODEC_SUFFIXES.values():
+        name = f"{digest}.{kind}{suffix}"
+        try:
+            os.utime(blob_path(app, name))
+            return name
+        except FileNotFoundError:
+            continue
+
+    codec = body_codec()
+    name = f"{digest}.{kind}{CODEC_SUFFIXES[codec]}"
+    with timed_phase("serialize"):
+        data = compress(payload, codec)
+    store_blob(app, name, data)
+    return name
+
+def get_body(app, name):
+    """
+    Read a document body or revision delta
+
+    Args:
+        app (str): Application identifier
+        name (str): Blob name from put_body
+
+    Returns:
+        bytes: Uncompressed JSON
+    """
+    codec = next(codec for codec, suffix in CODEC_SUFFIXES.items() if name.endswith(suffix))
+    with open(blob_path(app, name), 'rb') as blob:
+        data = blob.read()
+    with timed_phase("parse"):
+        return decompress(data, codec)
+
+def put_image(app, data, extension):
+    """
+    Store an image
+
+    Args:
+        app (str): Application identifier
+        data (bytes): Image file contents
+        extension (str): File extension from BLOB_IMAGE_TYPES
+
+    Returns:
+        str: Blob name: content hash and extension
+    """
+    name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+    store_blob(app, name, data)
+    return name
+
+def extract_inline_images(app, html):
+    """
+    Move base64 data URI images out of summernote HTML into image blobs
+
+    Images of types outside BLOB_IMAGE_TYPES or with undecodable data are
+    left inline.
+
+    Args:
+        app (str): Application identifier
+        html (str): Summernote HTML
+
+    Returns:
+        str: HTML with the data URIs replaced by blob URLs
+    """
+    if 'data:image/' not in html:
+        return html
+
+    def replace(match):
+        extension = BLOB_IMAGE_TYPES.get(match.group(3).lower())
+        if extension is None:
+            return match.group(0)
+        try:
+            data = base64.b64decode(match.group(4))
+        except (binascii.Error, ValueError):
+            return match.group(0)
+        quote = match.group(2)
+        return f"{match.group(1)}{quote}{blob_url(app, put_image(app, data, extension))}{quote}"
+
+    return INLINE_IMAGE_PATTERN.sub(replace, html)
+
+def referenced_images(app, html):
+    """
+    Find the image blobs an HTML body links to, extracted or uploaded
+
+    Args:
+        app (str): Application identifier
+        html (str): Summernote HTML
+
+    Returns:
+        list: Distinct image blob names in order of appearance
+    """
+    pattern = re.escape(blob_url_base(app)) + r'[0-9a-f]{2}/([0-9a-f]{64}\.[a-z]+)'
+    return list(dict.fromkeys(re.findall(pattern, html)))
+
+def blob_entries(app):
+    """
+    List the blob files of an application
+
+    Returns:
+        list: os.DirEntry objects of the blobs, temp files excluded
+    """
+    entries = []
+    try:
+        fanout = [entry for entry in os.scandir(blob_directory(app)) if entry.is_dir()]
+    except FileNotFoundError:
+        return entries
+    for directory in fanout:
+        entries.extend(entry for entry in os.scandir(directory.path) if not entry.name.startswith('.'))
+    return entries
+
+def collect_garbage(app, refs, grace_seconds=BLOB_GC_GRACE_SECONDS, dry_run=False):
+    """
+    Delete blobs no document references
+
+    A blob is written before the index references it, and an existing blob
+    is touched when it is reused, so a blob younger than the grace period
+    may belong to a save still in progress and is kept.
+
+    Args:
+        app (str): Application identifier
+        refs (dict): Blob name to reference count
+        grace_seconds (float): Minimum age of an unreferenced blob to delete it
+        dry_run (bool): Only report what would be deleted
+
+    Returns:
+        dict: Success status, deleted blob count and freed bytes
+    """
+    cutoff = time.time() - grace_seconds
+    deleted = 0
+    freed_bytes = 0
+    for entry in blob_entries(app):
+        if refs.get(entry.name, 0) > 0:
+            continue
+        stat = entry.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        if not dry_run:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+        deleted += 1
+        freed_bytes += stat.st_size
+
+    return {"success": True, "deleted": deleted, "freed_bytes": freed_bytes, "dry_run": dry_run}
+
+def blob_usage(app):
+    """
+    Summarize the space used by the blob store
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        dict: Blob count and stored bytes for bodies, revision deltas and images
+    """
+    usage = {"bodies": 0, "body_bytes": 0, "deltas": 0, "delta_bytes": 0, "images": 0, "image_bytes": 0}
+    for entry in blob_entries(app):
+        if '.json.' in entry.name:
+            count, size = "bodies", "body_bytes"
+        elif '.delta.' in entry.name:
+            count, size = "deltas", "delta_bytes"
+        else:
+            count, size = "images", "image_bytes"
+        usage[size] += entry.stat().st_size
+        usage[count] += 1
+    return usage
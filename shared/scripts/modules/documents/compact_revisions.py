@@ -0,0 +1,80 @@
+#!/opt/python-venv/bin/python3
+"""
+Revision Compaction
+Drops the oldest revisions of every document with history, keeping the
+latest ones. The blobs of dropped revisions are freed by manage_blobs.py --gc
+"""
+
+import sys
+import argparse
+from documents_config import *
+from file_operations import FileLock
+from migrate_docs import discover_apps
+from document_store import index_file
+from revisions import compact_revisions
+
+def compact_app(app, keep):
+    """
+    Compact the revision history of every document of an application
+
+    Args:
+        app (str): Application identifier
+        keep (int): Revisions kept per document
+
+    Returns:
+        dict: Success status, compacted document count and dropped revisions
+    """
+    with FileLock(index_file(app), mode=FileLock.READ) as file_lock:
+        result = file_lock.read()
+    if not result['success']:
+        return result
+
+    doc_ids = [
+        doc_id for doc_id, metadata in result['data'].get('documents', {}).items()
+        if metadata.get('revision', 0) > keep
+    ]
+    compacted = 0
+    dropped = 0
+    for doc_id in doc_ids:
+        result = compact_revisions(app, doc_id, keep)
+        if not result['success']:
+            return result
+        if result['dropped']:
+            compacted += 1
+            dropped += result['dropped']
+    return {"success": True, "documents": compacted, "dropped": dropped}
+
+def main():
+    """
+    Main function to compact revision histories
+    """
+    parser = argparse.ArgumentParser(description="Drop old document revisions")
+    parser.add_argument('apps', nargs='*', help="Applications to compact")
+    parser.add_argument('--all', action='store_true', help="Compact every application under WEB_ROOT")
+    parser.add_argument('--keep', type=int, default=REVISION_KEEP,
+                        help="Revisions kept per document (default: %(default)s)")
+    args = parser.parse_args()
+
+    apps = discover_apps() if args.all else args.apps
+    if not apps:
+        parser.error("No applications given")
+    if args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    failed = False
+    for app in apps:
+        try:
+            result = compact_app(app, args.keep)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if not result['success']:
+            failed = True
+            print(f"ERROR||{app}||{result['error']}")
+        else:
+            print(f"OK||{app}||dropped {result['dropped']} revisions of {result['documents']} documents")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Document Store
+Sharded storage for documents: a small docs.json index holding the table rows
+and per-document metadata, with each body in the content-addressed blob
+store. An edited document keeps its versions in a revision log instead of a
+single body blob. Bodies written by earlier layouts ({uuid}.json files, or
+records embedded in docs.json) stay readable.
+"""
+
+from documents_config import *
+from file_operations import FileLock
+from instrumentation import timed_phase
+from blob_store import extract_inline_images, referenced_images, put_body, get_body
+from revisions import revision_file, start_log, add_revision, cache_revision_content, read_revision, revision_blobs
+
+def docs_directory(app):
+    """
+    Get the document directory of an application
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        str: Directory path with trailing slash
+    """
+    return f"{WEB_ROOT}/{app}/portal/data/{app}/docs/"
+
+def index_file(app):
+    """
+    Get the path of the docs.json index of an application
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        str: Index file path
+    """
+    return f"{docs_directory(app)}{DOCS_INDEX_NAME}"
+
+def body_file(app, doc_id):
+    """
+    Get the path of a document body file
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+
+    Returns:
+        str: Body file path
+    """
+    return f"{docs_directory(app)}{doc_id}.json"
+
+def init_index(index_data):
+    """
+    Ensure an index has the table and metadata sections
+
+    Args:
+        index_data (dict): Parsed docs.json content, updated in place
+
+    Returns:
+        dict: The same index
+    """
+    if "data" not in index_data:
+        index_data["data"] = []
+        index_data["headers"] = list(DOCS_INDEX_HEADERS)
+    index_data.setdefault("documents", {})
+    return index_data
+
+def document_metadata(data_dict, blobs=None):
+    """
+    Strip the body from a document record for the index
+
+    Args:
+        data_dict (dict): Full document record
+        blobs (dict): Blob names of the stored body: "body" and "images"
+
+    Returns:
+        dict: Record without summernote_content, with the blob names
+    """
+    metadata = {key: value for key, value in data_dict.items() if key != 'summernote_content'}
+    if blobs:
+        metadata.update(blobs)
+    return metadata
+
+def document_row(metadata):
+    """
+    Build the docs.json table row of a document
+
+    Args:
+        metadata (dict): Document metadata or full record
+
+    Returns:
+        list: Title, tags, category and ADOM
+    """
+    return [metadata.get('title'), metadata.get('tags'), metadata.get('category'), metadata.get('adom')]
+
+def release_row(index_data, doc_id):
+    """
+    Remove the table row of a document unless another document shares it
+
+    Rows are deduplicated, so documents with the same title, tags, category
+    and ADOM are listed by one row.
+
+    Args:
+        index_data (dict): Parsed docs.json content, updated in place
+        doc_id (str): Document uuid whose row is released
+    """
+    row = document_row(index_data["documents"][doc_id])
+    shared = any(
+        other_id != doc_id and document_row(metadata) == row
+        for other_id, metadata in index_data["documents"].items()
+    )
+    if not shared and row in index_data["data"]:
+        index_data["data"].remove(row)
+
+def document_blobs(metadata):
+    """
+    List the blobs a document references
+
+    Args:
+        metadata (dict): Document metadata from the index
+
+    Returns:
+        list: Body and image blob names
+    """
+    names = list(metadata.get('images', []))
+    if metadata.get('body'):
+        names.append(metadata['body'])
+    return names
+
+def legacy_document_ids(index_data):
+    """
+    Find documents still embedded in docs.json by the monolithic layout
+
+    Args:
+        index_data (dict): Parsed docs.json content
+
+    Returns:
+        list: Document uuids whose full record lives in the index
+    """
+    return [
+        key for key, value in index_data.items()
+        if key not in DOCS_INDEX_KEYS and isinstance(value, dict)
+    ]
+
+def write_body(app, data_dict):
+    """
+    Store a document body in the blob store
+
+    Inline base64 images are moved into image blobs first, so the body
+    only links to them. Blobs are immutable and written before any index
+    references them, so they need no lock of their own.
+
+    Args:
+        app (str): Application identifier
+        data_dict (dict): Full document record
+
+    Returns:
+        dict: Success status, the stored record and its blob names, or an
+              error message
+    """
+    try:
+        record = dict(data_dict)
+        if record.get('summernote_content'):
+            record['summernote_content'] = extract_inline_images(app, str(record['summernote_content']))
+        with timed_phase("serialize"):
+            payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+        blobs = {
+            "body": put_body(app, payload),
+            "images": referenced_images(app, str(record.get('summernote_content') or ''))
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to write document body: {str(e)}"
+        }
+    return {"success": True, "record": record, "blobs": blobs}
+
+def read_body(app, doc_id, metadata=None):
+    """
+    Read the current version of a document from its revision history, the
+    blob store, a legacy {uuid}.json body file or a record embedded in a
+    legacy index
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        metadata (dict): The document's index metadata, looked up if not given
+
+    Returns:
+        dict: Full document record, or None if not found
+    """
+    if metadata is None or not (metadata.get('body') or metadata.get('revision')):
+        try:
+            with open(body_file(app, doc_id), 'rb') as body:
+                return json.load(body)
+        except FileNotFoundError:
+            pass
+
+    if metadata is None:
+        with FileLock(index_file(app), mode=FileLock.READ) as file_lock:
+            result = file_lock.read()
+        if not result['success']:
+            return None
+        metadata = result['data'].get('documents', {}).get(doc_id)
+        if metadata is None:
+            return result['data'].get(doc_id)
+
+    if metadata.get('revision'):
+        result = read_revision(app, doc_id, metadata['revision'])
+        return result['record'] if result['success'] else None
+    if metadata.get('body'):
+        return json.loads(get_body(app, metadata['body']))
+    return None
+
+def write_revision(app, doc_id, metadata, data_dict, user=None):
+    """
+    Store a new version of an existing document in its revision history
+
+    The caller holds the docs.json write lock, so revisions of a document
+    are appended one at a time. A document without history gets a log
+    whose first revision is its current body.
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        metadata (dict): Current index metadata of the document
+        data_dict (dict): Full record of the new version
+        user (str): Email of the editing user
+
+    Returns:
+        dict: Success status, the stored record and the index metadata of
+              the new version, or an error message
+    """
+    try:
+        if not (metadata.get('body') or metadata.get('revision')):
+            # Body of an earlier layout: store it as the first snapshot
+            previous = read_body(app, doc_id, metadata)
+            if previous is None:
+                return {"success": False, "error": f"Body of document {doc_id} not found"}
+            body_result = write_body(app, previous)
+            if not body_result['success']:
+                return body_result
+            metadata = document_metadata(body_result['record'], body_result['blobs'])
+
+        record = dict(data_dict)
+        record['summernote_content'] = extract_inline_images(app, str(record.get('summernote_content') or ''))
+        images = referenced_images(app, record['summernote_content'])
+
+        with FileLock(revision_file(app, doc_id), compact=True, backup_generations=0) as file_lock:
+            result = file_lock.read(use_cache=False)
+            if not result['success']:
+                return result
+            log = result['data'] if result['data'].get('revisions') else start_log(metadata)
+            entry = add_revision(app, doc_id, log, record, images, user)
+            write_result = file_lock.write(log)
+            if not write_result['success']:
+                return write_result
+        cache_revision_content(app, doc_id, entry, record['summernote_content'])
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to write document revision: {str(e)}"
+        }
+
+    metadata = document_metadata(record, {"images": images, "revision": entry['revision']})
+    return {"success": True, "record": record, "metadata": metadata}
+
+def migrate_index(app, dry_run=False):
+    """
+    Move document bodies of earlier layouts into the blob store: records
+    embedded in a monolithic docs.json and {uuid}.json body files
+
+    Safe to run repeatedly: blobs are written before the index is
+    rewritten, old body files are only removed afterwards, and already
+    migrated documents are skipped.
+
+    Args:
+        app (str): Application identifier
+        dry_run (bool): Only report what would be migrated
+
+    Returns:
+        dict: Success status and number of migrated documents
+    """
+    with FileLock(index_file(app), compact=True) as file_lock:
+        result = file_lock.read()
+        if not result['success']:
+            return result
+
+        index_data = init_index(result['data'])
+        embedded_ids = legacy_document_ids(index_data)
+        file_ids = [
+            doc_id for doc_id, metadata in index_data["documents"].items()
+            if not (metadata.get('body') or metadata.get('revision'))
+        ]
+        if dry_run or not (embedded_ids or file_ids):
+            return {"success": True, "migrated": len(embedded_ids) + len(file_ids), "dry_run": dry_run}
+
+        # Write every blob before the index references it
+        migrated = {}
+        for doc_id in embedded_ids + file_ids:
+            record = index_data[doc_id] if doc_id in index_data else read_body(app, doc_id, {})
+            if record is None:
+                continue
+            write_result = write_body(app, record)
+            if not write_result['success']:
+                return write_result
+            migrated[doc_id] = document_metadata(write_result['record'], write_result['blobs'])
+
+        for doc_id, metadata in migrated.items():
+            index_data.pop(doc_id, None)
+            index_data["documents"][doc_id] = metadata
+
+        write_result = file_lock.write(index_data)
+        if not write_result['success']:
+            return write_result
+
+    for doc_id in file_ids:
+        if doc_id in migrated:
+            try:
+                os.unlink(body_file(app, doc_id))
+            except FileNotFoundError:
+                pass
+
+    return {"success": True, "migrated": len(migrated), "dry_run": dry_run}
+
+def count_blob_refs(app):
+    """
+    Count the documents referencing each blob, in any kept revision
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        dict: Success status and blob name to reference count, or an error
+    """
+    with FileLock(index_file(app), mode=FileLock.READ) as file_lock:
+        result = file_lock.read()
+    if not result['success']:
+        return result
+
+    refs = {}
+    for doc_id, metadata in result['data'].get('documents', {}).items():
+        names = set(document_blobs(metadata))
+        if metadata.get('revision'):
+            with FileLock(revision_file(app, doc_id), mode=FileLock.READ) as file_lock:
+                log_result = file_lock.read(use_cache=False)
+            if not log_result['success']:
+                return log_result
+            names.update(revision_blobs(log_result['data']))
+        for name in names:
+            refs[name] = refs.get(name, 0) + 1
+    return {"success": True, "refs": refs}
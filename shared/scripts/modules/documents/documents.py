@@ -1,7 +1,8 @@
 #!/opt/python-venv/bin/python3
 """
 Document Management System
-Handles document operations including saving, updating, and configuration management
+Handles document operations including saving, updating, deleting, revision
+history and configuration management
 """
 
 import uuid
@@ -10,6 +11,34 @@ import os
 from documents_config import *
 from modules_config import *
 from file_operations import FileLock
+from data_index import RowIndex, append_unique
+from document_store import (index_file, write_body, write_revision, read_body, init_index,
+                            document_metadata, document_row, release_row)
+from revisions import read_revision, list_revisions, delete_revisions
+from logging_config import setup_logger
+from instrumentation import RequestTrace
+from table_query import query_table
+from search_index import index_document, remove_document, search_documents
+
+def config_needs_update(existing_data, app, category, tags):
+    """
+    Check whether a document introduces a new category or tag
+
+    Args:
+        existing_data (dict): Current configuration data
+        app (str): Application identifier
+        category (str): Document category
+        tags (list): Document tags
+
+    Returns:
+        bool: True if the configuration must be written
+    """
+    docs_config = existing_data.get(app, {}).get('docs', {})
+    if "data" not in existing_data or category not in docs_config.get('categories', []):
+        return True
+
+    existing_tags = set(docs_config.get('tags', []))
+    return any(len(tag) > 1 and tag not in existing_tags for tag in tags)
 
 def update_documents_config(data):
     """
@@ -22,10 +51,18 @@ def update_documents_config(data):
         app = data.get('app')
         category = data.get('category')
         tags = data.get('tags')
-        config_file = f"/var/www/html/{app}/portal/config/config.json"
+        config_file = f"{WEB_ROOT}/{app}/portal/config/config.json"
 
-        with FileLock(config_file) as file_lock:
+        # Check under a shared lock so concurrent saves with known tags don't serialize
+        with FileLock(config_file, mode=FileLock.READ) as file_lock:
             result = file_lock.read()
+            existing_data = result['data'] if result['success'] else {}
+            if not config_needs_update(existing_data, app, category, tags):
+                return True
+
+            # Take the exclusive lock and merge into a private copy
+            file_lock.upgrade()
+            result = file_lock.read(use_cache=False)
             if result['success']:
                 existing_data = result['data']
             else:
@@ -39,14 +76,9 @@ def update_documents_config(data):
             existing_categories = existing_data.get(app, {}).get('docs', {}).get('categories', [])
             existing_tags = existing_data.get(app, {}).get('docs', {}).get('tags', [])
 
-            # Add new tags if they don't exist
-            for tag in tags:
-                if len(tag) > 1 and tag not in existing_tags:
-                    existing_tags.append(tag)
-
-            # Add new category if it doesn't exist
-            if category not in existing_categories:
-                existing_categories.append(category)
+            # Add new tags and category if they don't exist, keeping UI order
+            append_unique(existing_tags, (tag for tag in tags if len(tag) > 1))
+            append_unique(existing_categories, [category])
 
             # Update the configuration structure
             if app not in existing_data:
@@ -58,10 +90,9 @@ def update_documents_config(data):
             existing_data[app]['docs']['tags'] = existing_tags
 
             # Write updated configuration
-            with FileLock(config_file) as locked_file:
-                write_result = locked_file.write(existing_data)
-                if not write_result['success']:
-                    raise Exception(f"Failed to write config: {write_result.get('error')}")
+            write_result = file_lock.write(existing_data)
+            if not write_result['success']:
+                raise Exception(f"Failed to write config: {write_result.get('error')}")
 
     except Exception as e:
         print(f"Error in update_documents_config: {e}")
@@ -87,67 +118,221 @@ def save_document(data):
     summernote_content = data.get('summernote_content')
 
     # Set up paths
-    documentation_directory = f"/var/www/html/{app}/portal/data/{app}/docs/"
-    docs_file = f"/var/www/html/{app}/portal/data/{app}/docs/docs.json"
+    docs_file = index_file(app)
 
     # Generate metadata
     unique_id = str(uuid.uuid4())
     created_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    # Read existing documents
-    with FileLock(docs_file) as file_lock:
+    # Prepare document data
+    data_dict = {
+        "app": app,
+        "title": file_name,
+        "category": category,
+        "adom": adom,
+        "tags": tags,
+        "summernote_content": summernote_content,
+        "created_date": created_date
+    }
+
+    # Write the body and its images to the blob store before the index references them
+    body_result = write_body(app, data_dict)
+    if not body_result['success']:
+        print(body_result['error'])
+        return False
+    metadata = document_metadata(body_result['record'], body_result['blobs'])
+
+    # Add the table row and metadata to the index
+    with FileLock(docs_file, compact=True) as file_lock:
         result = file_lock.read()
         if result['success']:
-            existing_data = result['data']
+            existing_data = init_index(result['data'])
         else:
             print(result['error'])
             return False
 
-        # Initialize data structure if needed
-        if "data" not in existing_data:
-            existing_data["data"] = []
-            existing_data["headers"] = ["Title", "Tags", "Category", "ADOM"]
-
-        # Prepare document data
-        file_name_and_path = f"{documentation_directory}{unique_id}.json"
-        data_dict = {
-            "app": app,
-            "title": file_name,
-            "category": category,
-            "adom": adom,
-            "tags": tags,
-            "summernote_content": summernote_content,
-            "created_date": created_date
-        }
-
         # Add new document data
         new_row = [file_name, tags, category, adom]
-        if new_row not in existing_data["data"]:
-            existing_data["data"].append(new_row)
-        existing_data[unique_id] = data_dict
+        RowIndex(existing_data["data"]).add(new_row)
+        existing_data["documents"][unique_id] = metadata
 
-        # Write updated document data
+        # Write updated document data under the lock already held
         update_config_file = False
-        with FileLock(docs_file) as locked_file:
-            write_result = locked_file.write(existing_data)
-            if write_result['success']:
-                update_config_file = True
-                print("Created Doc")
+        write_result = file_lock.write(existing_data)
+        if write_result['success']:
+            update_config_file = True
+            print("Created Doc")
 
-        # Update configuration if needed
-        if update_config_file:
-            update_documents_config(data)
+    # Update configuration if needed
+    if update_config_file:
+        update_documents_config(data)
 
-def delete_document(data, args):
+        # Make the document searchable
+        index_result = index_document(app, unique_id, body_result['record'])
+        if not index_result['success']:
+            print(index_result['error'])
+
+def update_document(data):
     """
-    Delete a document and update configurations
-    
+    Save a new version of an existing document
+
+    The previous versions stay readable from the document's revision
+    history. Fields missing from the request keep their current value.
+
+    Args:
+        data (dict): Document data including doc_id, content and metadata
+    """
+    app = data.get('app')
+    doc_id = data.get('doc_id')
+    docs_file = index_file(app)
+
+    with FileLock(docs_file, compact=True) as file_lock:
+        result = file_lock.read()
+        if result['success']:
+            existing_data = init_index(result['data'])
+        else:
+            print(result['error'])
+            return False
+
+        metadata = existing_data["documents"].get(doc_id)
+        if metadata is None:
+            print(f"Document not found: {doc_id}")
+            return False
+
+        # Keep the fields the request leaves out
+        data_dict = {key: value for key, value in metadata.items() if key not in ('body', 'images', 'revision')}
+        for field, key in (('title', 'file_name'), ('category', 'category'), ('adom', 'adom'), ('tags', 'tags')):
+            if data.get(key) is not None:
+                data_dict[field] = data[key]
+        data_dict["updated_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if data.get('summernote_content') is not None:
+            data_dict["summernote_content"] = data['summernote_content']
+        else:
+            current = read_body(app, doc_id, metadata)
+            data_dict["summernote_content"] = (current or {}).get('summernote_content', '')
+
+        revision_result = write_revision(app, doc_id, metadata, data_dict, user=data.get('user_email'))
+        if not revision_result['success']:
+            print(revision_result['error'])
+            return False
+
+        # Move the document to its new table row
+        release_row(existing_data, doc_id)
+        existing_data["documents"][doc_id] = revision_result['metadata']
+        RowIndex(existing_data["data"]).add(document_row(revision_result['metadata']))
+
+        write_result = file_lock.write(existing_data)
+        if not write_result['success']:
+            print(write_result['error'])
+            return False
+        print(f"Updated Doc||revision {revision_result['metadata']['revision']}")
+
+    record = revision_result['record']
+    update_documents_config(dict(data, category=record.get('category'), tags=record.get('tags') or []))
+
+    # Replace the indexed version
+    index_result = index_document(app, doc_id, record)
+    if not index_result['success']:
+        print(index_result['error'])
+    return True
+
+def delete_document(data):
+    """
+    Delete a document with its revision history
+
+    Its blobs are left to blob garbage collection, so they are only
+    removed once no other document references them.
+
     Args:
-        data (dict): Document data
-        args: Additional arguments for deletion
+        data (dict): Document data including app and doc_id
     """
-    # Implementation for delete_document
-    pass
+    app = data.get('app')
+    doc_id = data.get('doc_id')
+    docs_file = index_file(app)
+
+    with FileLock(docs_file, compact=True) as file_lock:
+        result = file_lock.read()
+        if result['success']:
+            existing_data = init_index(result['data'])
+        else:
+            print(result['error'])
+            return False
+
+        if doc_id not in existing_data["documents"]:
+            print(f"Document not found: {doc_id}")
+            return False
+
+        release_row(existing_data, doc_id)
+        del existing_data["documents"][doc_id]
+
+        write_result = file_lock.write(existing_data)
+        if not write_result['success']:
+            print(write_result['error'])
+            return False
+        print("Deleted Doc")
+
+    delete_revisions(app, doc_id)
+    index_result = remove_document(app, doc_id)
+    if not index_result['success']:
+        print(index_result['error'])
+    return True
+
+def get_document(data):
+    """
+    Read a document, its current version or an earlier revision
+
+    Args:
+        data (dict): Request data including app, doc_id and an optional revision
+
+    Returns:
+        dict: Success status and the full record, or an error message
+    """
+    app = data.get('app')
+    doc_id = data.get('doc_id')
+    if data.get('revision') is not None:
+        return read_revision(app, doc_id, data['revision'])
+
+    record = read_body(app, doc_id)
+    if record is None:
+        return {"success": False, "error": f"Document not found: {doc_id}"}
+    return {"success": True, "record": record}
+
+def handle_request(request_data):
+    """
+    Dispatch a decoded request payload to the matching document action
+
+    Args:
+        request_data (dict): Request payload containing 'data' with an 'action_type'
+    """
+    data = request_data['data']
+    action_type = data.get('action_type')
+
+    if action_type == 'save':
+        save_document(data)
+    elif action_type == 'update':
+        update_document(data)
+    elif action_type == 'delete':
+        delete_document(data)
+    elif action_type == 'get':
+        print(json.dumps(get_document(data)))
+    elif action_type == 'revisions':
+        print(json.dumps(list_revisions(data.get('app'), data.get('doc_id'))))
+    elif action_type == 'query_table':
+        # DataTables server-side request for the document table
+        print(json.dumps(query_table(index_file(data.get('app')), "data", data.get('params') or {})))
+    elif action_type == 'search':
+        # Navbar search; roles are set from the session by run_python_script.php
+        print(json.dumps(search_documents(
+            data.get('app'),
+            data.get('query'),
+            roles=data.get('roles'),
+            filters=data.get('filters'),
+            limit=data.get('limit', SEARCH_RESULT_LIMIT),
+            offset=data.get('offset', 0)
+        )))
+    else:
+        print(f"Unknown action type: {action_type}")
+        sys.exit(1)
 
 def main():
     """
@@ -163,16 +348,9 @@ def main():
             print(payload)
             sys.exit(1)
 
-        data = request_data['data']
-        action_type = data.get('action_type')
-
-        if action_type == 'save':
-            save_document(data)
-        elif action_type == 'delete':
-            delete_document(data, args)
-        else:
-            print(f"Unknown action type: {action_type}")
-            sys.exit(1)
+        action = f"documents.{request_data.get('data', {}).get('action_type')}"
+        with RequestTrace(action, setup_logger('documents'), IMPORT_STARTED):
+            handle_request(request_data)
 
     except Exception as e:
         print(f"Error in main: {e}")
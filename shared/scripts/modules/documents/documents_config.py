@@ -10,4 +10,78 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import all shared configurations
-from modules_config import *
\ No newline at end of file
+from modules_config import *
+
+# Document store layout
+DOCS_INDEX_NAME = 'docs.json'
+DOCS_INDEX_HEADERS = ["Title", "Tags", "Category", "ADOM"]
+
+# Top-level docs.json keys that belong to the index itself
+DOCS_INDEX_KEYS = ('headers', 'data', 'documents')
+# Full-text search index, kept in a directory next to docs.json
+SEARCH_DIRECTORY_NAME = 'search'
+SEARCH_MANIFEST_NAME = 'manifest.json'
+SEARCH_INDEX_FORMAT = 1
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Term frequency weight of a token in each indexed field
+SEARCH_FIELD_WEIGHTS = {"title": 3, "tags": 2, "category": 2, "summernote_content": 1}
+
+# Indexed token length bounds
+SEARCH_MIN_TOKEN_LENGTH = 2
+SEARCH_MAX_TOKEN_LENGTH = 40
+
+# Segments are merged on save while the merged segment stays this small;
+# larger merges are left to rebuild_search.py --optimize
+SEARCH_MERGE_MAX_DOCS = 20000
+
+# Results per query by default and at most, and facet values reported
+SEARCH_RESULT_LIMIT = 20
+SEARCH_MAX_RESULTS = 200
+SEARCH_FACET_LIMIT = 20
+
+# Role sets whose hidden documents are remembered per index version
+SEARCH_ROLE_SETS_CACHED = 16
+
+# Content-addressed blob store for document bodies and images, next to docs.json
+BLOB_DIRECTORY_NAME = 'blobs'
+
+# Body compression: zstd when the zstandard package is installed, else gzip
+BLOB_BODY_CODEC = os.getenv('PORTAL_BLOB_CODEC', 'zstd')
+BLOB_ZSTD_LEVEL = 3
+BLOB_GZIP_LEVEL = 6
+
+# Image types stored as blobs, by MIME subtype, with their file extension
+BLOB_IMAGE_TYPES = {"png": "png", "jpeg": "jpg", "jpg": "jpg", "gif": "gif"}
+
+# Unreferenced blobs younger than this survive garbage collection, so an
+# image uploaded for a document that is still being edited is kept
+BLOB_GC_GRACE_SECONDS = 24 * 60 * 60
+
+# Revision history: one log per document, in a directory next to docs.json
+REVISIONS_DIRECTORY_NAME = 'revisions'
+REVISION_LOG_FORMAT = 1
+
+# Every Nth revision is a full snapshot, so reading any revision applies
+# fewer than N deltas
+REVISION_SNAPSHOT_INTERVAL = 16
+
+# A delta larger than this fraction of the body is stored as a snapshot
+REVISION_DELTA_MAX_RATIO = 0.5
+
+# Unchanged runs shorter than this are inlined in a delta instead of copied
+REVISION_MIN_COPY = 32
+
+# Changed regions longer than this are diffed tag by tag and word by word,
+# up to a token count where a snapshot is cheaper than the diff
+REVISION_REFINE_CHARS = 256
+REVISION_REFINE_MAX_TOKENS = 50000
+
+# Revisions kept per document by compact_revisions.py
+REVISION_KEEP = 50
+
+# Reconstructed bodies kept in memory per process
+REVISION_CACHE_ENTRIES = 64
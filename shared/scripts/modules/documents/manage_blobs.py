@@ -0,0 +1,58 @@
+#!/opt/python-venv/bin/python3
+"""
+Blob Store Maintenance
+Reports blob store usage and reference counts, and garbage collects blobs
+no document references
+"""
+
+import sys
+import argparse
+from documents_config import *
+from migrate_docs import discover_apps
+from document_store import count_blob_refs
+from blob_store import blob_usage, collect_garbage
+
+def main():
+    """
+    Main function to maintain blob stores
+    """
+    parser = argparse.ArgumentParser(description="Maintain the document blob store")
+    parser.add_argument('apps', nargs='*', help="Applications to maintain")
+    parser.add_argument('--all', action='store_true', help="Maintain every application under WEB_ROOT")
+    parser.add_argument('--gc', action='store_true', help="Delete unreferenced blobs")
+    parser.add_argument('--grace', type=float, default=BLOB_GC_GRACE_SECONDS,
+                        help="Seconds an unreferenced blob is kept (default: %(default)s)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what garbage collection would delete")
+    args = parser.parse_args()
+
+    apps = discover_apps() if args.all else args.apps
+    if not apps:
+        parser.error("No applications given")
+
+    failed = False
+    for app in apps:
+        try:
+            result = count_blob_refs(app)
+            if not result['success']:
+                raise Exception(result['error'])
+            refs = result['refs']
+            shared = sum(1 for count in refs.values() if count > 1)
+            print(f"OK||{app}||{len(refs)} blobs referenced, {shared} shared by several documents")
+
+            if args.gc:
+                result = collect_garbage(app, refs, grace_seconds=args.grace, dry_run=args.dry_run)
+                action = "would delete" if args.dry_run else "deleted"
+                print(f"OK||{app}||{action} {result['deleted']} blobs, {result['freed_bytes']} bytes")
+
+            usage = blob_usage(app)
+            print(f"OK||{app}||{usage['bodies']} bodies, {usage['body_bytes']} bytes||"
+                  f"{usage['deltas']} deltas, {usage['delta_bytes']} bytes||"
+                  f"{usage['images']} images, {usage['image_bytes']} bytes")
+        except Exception as e:
+            failed = True
+            print(f"ERROR||{app}||{str(e)}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
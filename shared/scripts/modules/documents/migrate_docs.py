@@ -0,0 +1,58 @@
+#!/opt/python-venv/bin/python3
+"""
+Document Store Migration
+One-shot tool that moves document bodies of earlier layouts (records
+embedded in a monolithic docs.json, per-document {uuid}.json files) into the
+blob store, leaving docs.json as a small index
+"""
+
+import sys
+import glob
+import argparse
+from documents_config import *
+from document_store import migrate_index
+
+def discover_apps():
+    """
+    Find every application with a docs.json under WEB_ROOT
+
+    Returns:
+        list: Application identifiers
+    """
+    pattern = os.path.join(WEB_ROOT, '*', 'portal', 'data', '*', 'docs', DOCS_INDEX_NAME)
+    apps = []
+    for path in sorted(glob.glob(pattern)):
+        parts = os.path.relpath(path, WEB_ROOT).split(os.sep)
+        # {app}/portal/data/{app}/docs/docs.json
+        if parts[0] == parts[3]:
+            apps.append(parts[0])
+    return apps
+
+def main():
+    """
+    Main function to migrate document stores
+    """
+    parser = argparse.ArgumentParser(description="Move document bodies into the blob store")
+    parser.add_argument('apps', nargs='*', help="Applications to migrate")
+    parser.add_argument('--all', action='store_true', help="Migrate every application under WEB_ROOT")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be migrated")
+    args = parser.parse_args()
+
+    apps = discover_apps() if args.all else args.apps
+    if not apps:
+        parser.error("No applications given")
+
+    failed = False
+    for app in apps:
+        result = migrate_index(app, dry_run=args.dry_run)
+        if result['success']:
+            action = "would migrate" if args.dry_run else "migrated"
+            print(f"OK||{app}||{action} {result['migrated']} documents")
+        else:
+            failed = True
+            print(f"ERROR||{app}||{result['error']}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/opt/python-venv/bin/python3
+"""
+Search Index Rebuild
+Rebuilds the document search index of applications from docs.json and the
+document bodies, or merges an existing index into a single segment
+"""
+
+import sys
+import argparse
+from documents_config import *
+from migrate_docs import discover_apps
+from search_index import rebuild_index, optimize_index
+
+def main():
+    """
+    Main function to rebuild or optimize search indexes
+    """
+    parser = argparse.ArgumentParser(description="Rebuild the document search index")
+    parser.add_argument('apps', nargs='*', help="Applications to rebuild")
+    parser.add_argument('--all', action='store_true', help="Rebuild every application under WEB_ROOT")
+    parser.add_argument('--optimize', action='store_true',
+                        help="Merge the existing segments into one instead of re-reading documents")
+    args = parser.parse_args()
+
+    apps = discover_apps() if args.all else args.apps
+    if not apps:
+        parser.error("No applications given")
+
+    failed = False
+    for app in apps:
+        try:
+            result = optimize_index(app) if args.optimize else rebuild_index(app)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if not result['success']:
+            failed = True
+            print(f"ERROR||{app}||{result['error']}")
+        elif args.optimize:
+            print(f"OK||{app}||merged {result['merged']} segments")
+        else:
+            print(f"OK||{app}||indexed {result['indexed']} documents, {result['missing']} bodies missing")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+"""
+Document Revisions
+Revision history of documents, stored as deltas against the previous body
+with periodic full snapshots
+
+Each document with history has a small revision log next to docs.json,
+listing its revisions with the fields of each version and the blob holding
+its body: a full snapshot (the same record blob a new document is saved
+as) or a delta of the summernote HTML against the previous revision.
+Reading a revision starts at the nearest snapshot at or before it and
+applies the deltas after it, fewer than REVISION_SNAPSHOT_INTERVAL.
+
+A delta is a JSON list of operations building the new body: [start, end]
+copies that slice of the previous body, a string is inserted as is. It is
+computed from the common prefix and suffix of the two bodies, and the
+changed region between them is diffed token by token when it is large, so
+both the delta and the work to find it follow the size of the edit.
+"""
+
+import re
+import difflib
+from itertools import accumulate
+from documents_config import *
+from file_operations import FileLock, JsonCache
+from instrumentation import timed_phase
+from blob_store import put_body, get_body
+
+# Token boundaries used to diff a changed region: after a tag or whitespace
+TOKEN_PATTERN = re.compile(r'(?<=[>\s])')
+
+# Bodies compared a block at a time before narrowing down to the character
+PREFIX_BLOCK_CHARS = 4096
+
+# Latest reconstructed body per revision log, keyed by revision number
+content_cache = JsonCache(max_entries=REVISION_CACHE_ENTRIES)
+
+def revisions_directory(app):
+    """
+    Get the revision log directory of an application, next to docs.json
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        str: Directory path with trailing slash
+    """
+    return f"{WEB_ROOT}/{app}/portal/data/{app}/docs/{REVISIONS_DIRECTORY_NAME}/"
+
+def revision_file(app, doc_id):
+    """
+    Get the path of the revision log of a document
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+
+    Returns:
+        str: Revision log path
+    """
+    return f"{revisions_directory(app)}{doc_id}.json"
+
+def common_prefix_length(a, b):
+    """
+    Length of the common prefix of two strings
+
+    Compares slices, halving the slice length on a mismatch, so long equal
+    runs are compared by the interpreter's string comparison rather than
+    character by character.
+
+    Args:
+        a (str): First string
+        b (str): Second string
+
+    Returns:
+        int: Number of equal leading characters
+    """
+    limit = min(len(a), len(b))
+    length = 0
+    step = PREFIX_BLOCK_CHARS
+    while step:
+        while length + step <= limit and a[length:length + step] == b[length:length + step]:
+            length += step
+        step //= 2
+    return length
+
+def common_suffix_length(a, b, limit):
+    """
+    Length of the common suffix of two strings
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        limit (int): Maximum length, so the suffix does not overlap a known prefix
+
+    Returns:
+        int: Number of equal trailing characters
+    """
+    end_a = len(a)
+    end_b = len(b)
+    length = 0
+    step = PREFIX_BLOCK_CHARS
+    while step:
+        while (length + step <= limit
+               and a[end_a - length - step:end_a - length] == b[end_b - length - step:end_b - length]):
+            length += step
+        step //= 2
+    return length
+
+def append_insert(ops, text):
+    if not text:
+        return
+    if ops and isinstance(ops[-1], str):
+        ops[-1] += text
+    else:
+        ops.append(text)
+
+def append_copy(ops, base, start, end):
+    # Short copies cost more to describe than to repeat
+    if end - start < REVISION_MIN_COPY:
+        append_insert(ops, base[start:end])
+    elif ops and isinstance(ops[-1], list) and ops[-1][1] == start:
+        ops[-1][1] = end
+    else:
+        ops.append([start, end])
+
+def diff_region(ops, base, base_start, old, new):
+    """
+    Diff a changed region token by token
+
+    Args:
+        ops (list): Delta operations, extended in place
+        base (str): Previous body
+        base_start (int): Offset of the old region in the previous body
+        old (str): Changed region of the previous body
+        new (str): Changed region of the new body
+    """
+    old_tokens = TOKEN_PATTERN.split(old)
+    new_tokens = TOKEN_PATTERN.split(new)
+    if len(old_tokens) + len(new_tokens) > REVISION_REFINE_MAX_TOKENS:
+        append_insert(ops, new)
+        return
+
+    old_offsets = list(accumulate(map(len, old_tokens), initial=0))
+    new_offsets = list(accumulate(map(len, new_tokens), initial=0))
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens)
+    position = 0
+    for old_index, new_index, size in matcher.get_matching_blocks():
+        append_insert(ops, new[new_offsets[position]:new_offsets[new_index]])
+        append_copy(ops, base, base_start + old_offsets[old_index], base_start + old_offsets[old_index + size])
+        position = new_index + size
+
+def make_delta(base, target):
+    """
+    Compute the delta turning one body into another
+
+    Args:
+        base (str): Previous body
+        target (str): New body
+
+    Returns:
+        list: Delta operations for apply_delta
+    """
+    prefix = common_prefix_length(base, target)
+    suffix = common_suffix_length(base, target, min(len(base), len(target)) - prefix)
+    old = base[prefix:len(base) - suffix]
+    new = target[prefix:len(target) - suffix]
+
+    ops = []
+    append_copy(ops, base, 0, prefix)
+    if len(old) > REVISION_REFINE_CHARS and len(new) > REVISION_REFINE_CHARS:
+        diff_region(ops, base, prefix, old, new)
+    else:
+        append_insert(ops, new)
+    append_copy(ops, base, len(base) - suffix, len(base))
+    return ops
+
+def apply_delta(base, ops):
+    """
+    Build a body from the previous body and a delta
+
+    Args:
+        base (str): Previous body
+        ops (list): Delta operations from make_delta
+
+    Returns:
+        str: New body
+    """
+    return "".join(base[op[0]:op[1]] if isinstance(op, list) else op for op in ops)
+
+def revision_fields(record):
+    """
+    Get the fields of a revision stored in the log: the record without its body
+
+    Args:
+        record (dict): Full document record
+
+    Returns:
+        dict: Record without summernote_content
+    """
+    return {key: value for key, value in record.items() if key != 'summernote_content'}
+
+def serialize_body(record):
+    return json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+def start_log(metadata):
+    """
+    Create the revision log of a document saved before it had history
+
+    Its current body blob becomes the first revision, a snapshot.
+
+    Args:
+        metadata (dict): Document metadata from the index, with a "body" blob
+
+    Returns:
+        dict: Revision log
+    """
+    fields = {key: value for key, value in metadata.items() if key not in ('body', 'images', 'revision')}
+    return {
+        "format": REVISION_LOG_FORMAT,
+        "revisions": [{
+            "revision": 1,
+            "saved": metadata.get('created_date'),
+            "user": None,
+            "fields": fields,
+            "snapshot": metadata['body'],
+            "images": list(metadata.get('images', []))
+        }]
+    }
+
+def find_revision(log, number=None):
+    """
+    Find the position of a revision in a log
+
+    Args:
+        log (dict): Revision log
+        number (int): Revision number, None for the latest
+
+    Returns:
+        int: Index into log["revisions"], or None if the revision is not kept
+    """
+    entries = log.get('revisions') or []
+    if not entries:
+        return None
+    if number is None:
+        return len(entries) - 1
+    # Revisions are numbered consecutively; compaction only drops the oldest
+    position = int(number) - entries[0]['revision']
+    if 0 <= position < len(entries):
+        return position
+    return None
+
+def revision_content(app, doc_id, log, position):
+    """
+    Reconstruct the body of a revision from its snapshot and deltas
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        log (dict): Revision log
+        position (int): Index into log["revisions"]
+
+    Returns:
+        str: Summernote HTML of the revision
+    """
+    entries = log['revisions']
+    cache_key = revision_file(app, doc_id)
+    signature = revision_signature(entries[position])
+    content = content_cache.get(cache_key, signature)
+    if content is not JsonCache.MISSING:
+        return content
+
+    start = position
+    while 'snapshot' not in entries[start]:
+        start -= 1
+    content = json.loads(get_body(app, entries[start]['snapshot'])).get('summernote_content') or ''
+    for entry in entries[start + 1:position + 1]:
+        content = apply_delta(content, json.loads(get_body(app, entry['delta'])))
+
+    content_cache.put(cache_key, signature, content)
+    return content
+
+def revision_signature(entry):
+    """
+    Build the content cache signature of a revision log entry
+
+    Includes the entry's content-addressed blob, so a revision with the
+    same number written by another process never matches.
+
+    Args:
+        entry (dict): Revision log entry
+
+    Returns:
+        tuple: Revision number and blob name
+    """
+    return (entry['revision'], entry.get('snapshot') or entry.get('delta'))
+
+def cache_revision_content(app, doc_id, entry, content):
+    """
+    Remember the content of a revision once its log has been written,
+    so the next delta does not rebuild it
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        entry (dict): Revision log entry, as returned by add_revision
+        content (str): Summernote HTML of the revision
+    """
+    content_cache.put(revision_file(app, doc_id), revision_signature(entry), content)
+
+def add_revision(app, doc_id, log, record, images, user=None):
+    """
+    Append a new version of a document to its revision log
+
+    The body is stored as a delta against the previous revision, or as a
+    full snapshot every REVISION_SNAPSHOT_INTERVAL revisions and whenever
+    the delta is not much smaller than the body. The caller writes the log
+    and then calls cache_revision_content.
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        log (dict): Revision log, updated in place
+        record (dict): Full record of the new version, images already extracted
+        images (list): Image blob names the new body references
+        user (str): Email of the editing user
+
+    Returns:
+        dict: The new revision log entry
+    """
+    entries = log['revisions']
+    content = str(record.get('summernote_content') or '')
+    entry = {
+        "revision": entries[-1]['revision'] + 1,
+        "saved": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "user": user,
+        "fields": revision_fields(record)
+    }
+
+    # Deltas since the last snapshot, which reading this revision would apply
+    chain = 0
+    while chain < len(entries) and 'delta' in entries[len(entries) - 1 - chain]:
+        chain += 1
+
+    payload = None
+    if chain + 1 < REVISION_SNAPSHOT_INTERVAL:
+        base = revision_content(app, doc_id, log, len(entries) - 1)
+        with timed_phase("serialize"):
+            payload = serialize_body(make_delta(base, content))
+        if len(payload) > REVISION_DELTA_MAX_RATIO * len(content):
+            payload = None
+
+    if payload is None:
+        with timed_phase("serialize"):
+            payload = serialize_body(record)
+        entry["snapshot"] = put_body(app, payload)
+    else:
+        entry["delta"] = put_body(app, payload, kind='delta')
+    entry["images"] = list(images)
+
+    entries.append(entry)
+    return entry
+
+def read_revision(app, doc_id, number=None):
+    """
+    Read a revision of a document
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        number (int): Revision number, None for the latest
+
+    Returns:
+        dict: Success status, the full record and the revision number, or an
+              error message
+    """
+    path = revision_file(app, doc_id)
+    if not os.path.exists(path):
+        return {"success": False, "error": f"Document {doc_id} has no revision history"}
+
+    with FileLock(path, mode=FileLock.READ) as file_lock:
+        result = file_lock.read()
+    if not result['success']:
+        return result
+
+    log = result['data']
+    position = find_revision(log, number)
+    if position is None:
+        return {"success": False, "error": f"Revision {number} of document {doc_id} is not kept"}
+
+    entry = log['revisions'][position]
+    record = dict(entry['fields'])
+    record['summernote_content'] = revision_content(app, doc_id, log, position)
+    return {"success": True, "revision": entry['revision'], "record": record}
+
+def list_revisions(app, doc_id):
+    """
+    List the kept revisions of a document
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+
+    Returns:
+        dict: Success status and revisions, newest first, with their number,
+              save time, user, title and storage kind
+    """
+    path = revision_file(app, doc_id)
+    if not os.path.exists(path):
+        return {"success": True, "revisions": []}
+
+    with FileLock(path, mode=FileLock.READ) as file_lock:
+        result = file_lock.read()
+    if not result['success']:
+        return result
+
+    revisions = [
+        {
+            "revision": entry['revision'],
+            "saved": entry.get('saved'),
+            "user": entry.get('user'),
+            "title": entry['fields'].get('title'),
+            "kind": "snapshot" if 'snapshot' in entry else "delta"
+        }
+        for entry in reversed(result['data'].get('revisions', []))
+    ]
+    return {"success": True, "revisions": revisions}
+
+def revision_blobs(log):
+    """
+    List the blobs a revision log references
+
+    Args:
+        log (dict): Revision log
+
+    Returns:
+        set: Snapshot, delta and image blob names
+    """
+    names = set()
+    for entry in log.get('revisions', []):
+        names.add(entry.get('snapshot') or entry.get('delta'))
+        names.update(entry.get('images', []))
+    return names
+
+def compact_revisions(app, doc_id, keep=REVISION_KEEP):
+    """
+    Drop the oldest revisions of a document, keeping the latest ones
+
+    The oldest kept revision becomes a snapshot if it was a delta. Blobs of
+    dropped revisions are left to blob garbage collection.
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        keep (int): Revisions to keep, at least one
+
+    Returns:
+        dict: Success status and number of dropped revisions, or an error message
+    """
+    keep = max(int(keep), 1)
+    path = revision_file(app, doc_id)
+    if not os.path.exists(path):
+        return {"success": True, "dropped": 0}
+
+    try:
+        with FileLock(path, compact=True, backup_generations=0) as file_lock:
+            result = file_lock.read(use_cache=False)
+            if not result['success']:
+                return result
+            log = result['data']
+            entries = log.get('revisions', [])
+            if len(entries) <= keep:
+                return {"success": True, "dropped": 0}
+
+            position = len(entries) - keep
+            first = entries[position]
+            if 'delta' in first:
+                record = dict(first['fields'])
+                record['summernote_content'] = revision_content(app, doc_id, log, position)
+                first = {key: value for key, value in first.items() if key != 'delta'}
+                first['snapshot'] = put_body(app, serialize_body(record))
+
+            log['revisions'] = [first] + entries[position + 1:]
+            write_result = file_lock.write(log)
+            if not write_result['success']:
+                return write_result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to compact revisions of {doc_id}: {str(e)}"
+        }
+
+    return {"success": True, "dropped": position}
+
+def delete_revisions(app, doc_id):
+    """
+    Remove the revision log of a deleted document
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+    """
+    path = revision_file(app, doc_id)
+    for name in (path, f"{path}.lock"):
+        try:
+            os.unlink(name)
+        except FileNotFoundError:
+            pass
+    content_cache.invalidate(path)
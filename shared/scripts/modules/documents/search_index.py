@@ -0,0 +1,855 @@
+"""
+Document Search Index
+Full-text search over document titles, tags, categories and bodies
+
+The index is a list of immutable segments named by a manifest. A segment
+is a JSON file holding its documents (uuid, length and the fields shown in
+results), the term dictionary and the tag and category facets, plus a
+binary postings file of (ordinal, term frequency) uint32 pairs that is
+memory mapped, so a query only touches the postings of its own terms.
+
+Saving a document writes a one-document segment and merges the newest
+segments while they are of similar size, which keeps the segment count
+logarithmic. A document indexed again shadows its older copies; deletes
+are tombstones until the segments holding the document are merged.
+Queries are ranked with BM25 and filtered by the caller's ADOM roles.
+"""
+
+import re
+import math
+import mmap
+import heapq
+from array import array
+from html import unescape
+from itertools import chain
+from collections import Counter
+from documents_config import *
+from file_operations import FileLock, JsonCache, atomic_write
+from instrumentation import timed_phase
+from document_store import docs_directory, index_file, read_body, legacy_document_ids
+
+# Bytes per posting: ordinal and term frequency as native uint32
+POSTING_BYTES = 8
+
+SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Words too common to be worth indexing
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have he her his if in into is it
+    its of on or our she so than that the their them then there these they this
+    to was we were what when where which who will with you your
+""".split())
+
+# Loaded segments by file path, and query snapshots by manifest signature
+segment_cache = JsonCache(max_entries=64)
+snapshot_cache = JsonCache(max_entries=8)
+
+def search_directory(app):
+    """
+    Get the search index directory of an application
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        str: Directory path with trailing slash
+    """
+    return f"{docs_directory(app)}{SEARCH_DIRECTORY_NAME}/"
+
+def manifest_file(app):
+    return f"{search_directory(app)}{SEARCH_MANIFEST_NAME}"
+
+def segment_files(app, name):
+    """
+    Get the paths of a segment's files
+
+    Args:
+        app (str): Application identifier
+        name (str): Segment name
+
+    Returns:
+        tuple: (JSON file path, postings file path)
+    """
+    directory = search_directory(app)
+    return f"{directory}{name}.json", f"{directory}{name}.post"
+
+def html_text(html):
+    """
+    Extract the visible text of summernote HTML
+
+    Tags are dropped with their attributes, so base64 image data in src
+    attributes never reaches the index.
+
+    Args:
+        html (str): HTML content
+
+    Returns:
+        str: Plain text
+    """
+    if '<' in html:
+        html = TAG_PATTERN.sub(' ', SCRIPT_STYLE_PATTERN.sub(' ', html))
+    if '&' in html:
+        html = unescape(html)
+    return html
+
+def tokenize(text):
+    """
+    Split text into lowercased index terms
+
+    Args:
+        text (str): Plain text
+
+    Returns:
+        list: Terms in text order, stopwords and out of range lengths dropped
+    """
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if SEARCH_MIN_TOKEN_LENGTH <= len(token) <= SEARCH_MAX_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+def adom_values(adom):
+    """
+    Normalize a document's ADOM field to a list of role names
+
+    Args:
+        adom: ADOM as stored: a role, comma separated roles or a list
+
+    Returns:
+        list: Role names, empty if the document is not restricted
+    """
+    if not adom:
+        return []
+    if isinstance(adom, str):
+        adom = adom.split(',')
+    return [value for value in (str(item).strip(" '\"[]") for item in adom) if value]
+
+def role_set(roles):
+    """
+    Normalize the caller's roles the way the portal session stores them
+
+    Args:
+        roles (list): Role names, possibly quoted
+
+    Returns:
+        set: Role names
+    """
+    return {str(role).replace("'", "").strip() for role in roles or []}
+
+def document_terms(record):
+    """
+    Count the weighted term frequencies of a document
+
+    Args:
+        record (dict): Full document record
+
+    Returns:
+        dict: Term to weighted frequency
+    """
+    tags = record.get('tags') or []
+    fields = (
+        ('title', str(record.get('title') or '')),
+        ('tags', " ".join(str(tag) for tag in (tags if isinstance(tags, list) else [tags]))),
+        ('category', str(record.get('category') or '')),
+        ('summernote_content', html_text(str(record.get('summernote_content') or '')))
+    )
+    counts = {}
+    for field, text in fields:
+        weight = SEARCH_FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + weight
+    return counts
+
+class SearchSegment:
+    """
+    A loaded, read-only segment: documents, term dictionary and facets
+    parsed from JSON, postings memory mapped.
+    """
+
+    def __init__(self, json_path, postings_path):
+        """
+        Load a segment
+
+        Args:
+            json_path (str): Segment JSON file
+            postings_path (str): Segment postings file
+        """
+        with open(json_path, 'rb') as segment_file, timed_phase("parse"):
+            data = json.load(segment_file)
+        self.generation = data['generation']
+        self.docs = data['docs']
+        self.terms = data['terms']
+        self.facets = data['facets']
+        self.total_length = sum(doc[1] for doc in self.docs)
+
+        with open(postings_path, 'rb') as postings_file:
+            if os.fstat(postings_file.fileno()).st_size:
+                self.postings = mmap.mmap(postings_file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.postings = b''
+
+    def document_frequency(self, term):
+        entry = self.terms.get(term)
+        return entry[1] if entry else 0
+
+    def term_postings(self, term):
+        """
+        Decode the postings of a term
+
+        Args:
+            term (str): Index term
+
+        Returns:
+            array: Interleaved ordinals and term frequencies, or None
+        """
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        offset, count = entry
+        postings = array('I')
+        postings.frombytes(self.postings[offset * POSTING_BYTES:(offset + count) * POSTING_BYTES])
+        return postings
+
+    def dead_ordinals(self, deleted, seen):
+        """
+        Find documents that are deleted or shadowed by a newer segment
+
+        Segments must be visited from newest to oldest with the same seen set.
+
+        Args:
+            deleted (dict): Tombstones: document uuid to the generation
+                from which the document is visible again
+            seen (set): Uuids found in newer segments, updated in place
+
+        Returns:
+            set: Ordinals of documents that must not be returned
+        """
+        dead = set()
+        for ordinal, doc in enumerate(self.docs):
+            doc_id = doc[0]
+            if doc_id in seen or deleted.get(doc_id, 0) > self.generation:
+                dead.add(ordinal)
+            seen.add(doc_id)
+        return dead
+
+def load_segment(app, name):
+    """
+    Load a segment through the process-wide segment cache
+
+    Args:
+        app (str): Application identifier
+        name (str): Segment name
+
+    Returns:
+        SearchSegment: Loaded segment
+    """
+    json_path, postings_path = segment_files(app, name)
+    signature = JsonCache.signature(os.stat(json_path))
+    segment = segment_cache.get(json_path, signature)
+    if segment is JsonCache.MISSING:
+        segment = SearchSegment(json_path, postings_path)
+        segment_cache.put(json_path, signature, segment)
+    return segment
+
+class SegmentBuilder:
+    """
+    Accumulate documents, or the live documents of existing segments, and
+    write them out as a new segment
+    """
+
+    def __init__(self, generation):
+        """
+        Start an empty segment
+
+        Args:
+            generation (int): Generation of the new segment
+        """
+        self.generation = generation
+        self.docs = []
+        self.postings = {}
+        self.facets = {"tags": {}, "category": {}}
+
+    def _add_row(self, row):
+        ordinal = len(self.docs)
+        self.docs.append(row)
+        for tag in row[4]:
+            self.facets["tags"].setdefault(tag, []).append(ordinal)
+        if row[3]:
+            self.facets["category"].setdefault(row[3], []).append(ordinal)
+        return ordinal
+
+    def add_document(self, doc_id, record):
+        """
+        Index a document
+
+        Args:
+            doc_id (str): Document uuid
+            record (dict): Full document record
+        """
+        terms = document_terms(record)
+        tags = record.get('tags') or []
+        row = [
+            doc_id,
+            sum(terms.values()),
+            str(record.get('title') or ''),
+            str(record.get('category') or ''),
+            [str(tag) for tag in (tags if isinstance(tags, list) else [tags])],
+            adom_values(record.get('adom'))
+        ]
+        ordinal = self._add_row(row)
+        for term, count in terms.items():
+            self.postings.setdefault(term, []).extend((ordinal, count))
+
+    def add_segment(self, segment, dead):
+        """
+        Copy the live documents of a segment, renumbering their postings
+
+        Args:
+            segment (SearchSegment): Source segment
+            dead (set): Ordinals to leave out
+        """
+        remap = [None] * len(segment.docs)
+        for ordinal, row in enumerate(segment.docs):
+            if ordinal not in dead:
+                remap[ordinal] = self._add_row(row)
+
+        for term in segment.terms:
+            postings = segment.term_postings(term)
+            renumbered = []
+            for ordinal, frequency in zip(postings[0::2], postings[1::2]):
+                new_ordinal = remap[ordinal]
+                if new_ordinal is not None:
+                    renumbered.append(new_ordinal)
+                    renumbered.append(frequency)
+            if renumbered:
+                self.postings.setdefault(term, []).extend(renumbered)
+
+    def write(self, app):
+        """
+        Write the segment files
+
+        Args:
+            app (str): Application identifier
+
+        Returns:
+            dict: Manifest entry of the segment, or None if it is empty
+        """
+        if not self.docs:
+            return None
+
+        postings = array('I')
+        terms = {}
+        for term, entries in self.postings.items():
+            terms[term] = [len(postings) // 2, len(entries) // 2]
+            postings.extend(entries)
+
+        name = f"seg-{self.generation:08d}"
+        json_path, postings_path = segment_files(app, name)
+        with timed_phase("serialize"):
+            payload = json.dumps({
+                "format": SEARCH_INDEX_FORMAT,
+                "generation": self.generation,
+                "docs": self.docs,
+                "terms": terms,
+                "facets": self.facets
+            }, separators=(',', ':')).encode('utf-8')
+
+        # Postings first: a segment is only referenced once both files exist
+        atomic_write(postings_path, postings.tobytes())
+        atomic_write(json_path, payload)
+        return {"name": name, "generation": self.generation, "docs": len(self.docs)}
+
+def empty_manifest():
+    return {"format": SEARCH_INDEX_FORMAT, "next_generation": 1, "segments": [], "deleted": {}}
+
+def read_manifest(file_lock):
+    """
+    Read the manifest under a held lock
+
+    A missing or outdated manifest reads as an empty index.
+
+    Args:
+        file_lock (FileLock): Lock on the manifest file
+
+    Returns:
+        dict: Success status and the manifest, or an error message
+    """
+    result = file_lock.read()
+    if not result['success']:
+        return {
+            "success": False,
+            "error": f"Search index manifest unreadable, rebuild the index: {result['error']}"
+        }
+    manifest = result['data']
+    if manifest.get('format') != SEARCH_INDEX_FORMAT:
+        manifest = empty_manifest()
+    return {"success": True, "manifest": manifest}
+
+def allocate_generation(manifest):
+    generation = manifest['next_generation']
+    manifest['next_generation'] = generation + 1
+    return generation
+
+def write_manifest(file_lock, manifest):
+    """
+    Write the manifest, dropping tombstones no segment needs any more
+
+    Args:
+        file_lock (FileLock): Exclusive lock on the manifest file
+        manifest (dict): Manifest to write
+
+    Returns:
+        dict: Success status or error message
+    """
+    oldest = min((entry['generation'] for entry in manifest['segments']), default=None)
+    manifest['deleted'] = {
+        doc_id: generation for doc_id, generation in manifest['deleted'].items()
+        if oldest is not None and generation > oldest
+    }
+    return file_lock.write(manifest)
+
+def merge_segments(app, manifest, entries):
+    """
+    Merge consecutive segments into a new one without their dead documents
+
+    Args:
+        app (str): Application identifier
+        manifest (dict): Manifest, whose generation counter is advanced
+        entries (list): Manifest entries of the segments, oldest first,
+            with no newer segment after them holding their documents
+
+    Returns:
+        dict: Manifest entry of the merged segment, or None if it is empty
+    """
+    segments = [load_segment(app, entry['name']) for entry in entries]
+    seen = set()
+    dead = [segment.dead_ordinals(manifest['deleted'], seen) for segment in reversed(segments)][::-1]
+
+    builder = SegmentBuilder(allocate_generation(manifest))
+    for segment, segment_dead in zip(segments, dead):
+        builder.add_segment(segment, segment_dead)
+    return builder.write(app)
+
+def merge_tail(app, manifest):
+    """
+    Merge the newest segments while they are of similar size
+
+    Args:
+        app (str): Application identifier
+        manifest (dict): Manifest, updated in place
+
+    Returns:
+        list: Manifest entries of the segments that were replaced
+    """
+    segments = manifest['segments']
+    retired = []
+    while len(segments) >= 2:
+        older, newer = segments[-2], segments[-1]
+        if newer['docs'] * 2 < older['docs'] or older['docs'] + newer['docs'] > SEARCH_MERGE_MAX_DOCS:
+            break
+        merged = merge_segments(app, manifest, [older, newer])
+        segments[-2:] = [merged] if merged else []
+        retired.extend((older, newer))
+    return retired
+
+def remove_segment_files(app, keep):
+    """
+    Delete segment files not referenced by the manifest
+
+    Called under the exclusive manifest lock, so no reader is loading them;
+    readers that already mapped a file keep their mapping.
+
+    Args:
+        app (str): Application identifier
+        keep (list): Manifest entries of the live segments
+    """
+    live = {entry['name'] for entry in keep}
+    directory = search_directory(app)
+    for file_name in os.listdir(directory):
+        name, extension = os.path.splitext(file_name)
+        if name.startswith('seg-') and extension in ('.json', '.post') and name not in live:
+            try:
+                os.unlink(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                pass
+
+def index_document(app, doc_id, record):
+    """
+    Add a document to the search index, replacing any indexed version
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+        record (dict): Full document record
+
+    Returns:
+        dict: Success status or error message
+    """
+    try:
+        with FileLock(manifest_file(app), compact=True, backup_generations=0) as file_lock:
+            result = read_manifest(file_lock)
+            if not result['success']:
+                return result
+            manifest = result['manifest']
+
+            builder = SegmentBuilder(allocate_generation(manifest))
+            builder.add_document(doc_id, record)
+            manifest['segments'].append(builder.write(app))
+            retired = merge_tail(app, manifest)
+
+            write_result = write_manifest(file_lock, manifest)
+            if not write_result['success']:
+                return write_result
+            if retired:
+                remove_segment_files(app, manifest['segments'])
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to index document: {str(e)}"
+        }
+    return {"success": True}
+
+def remove_document(app, doc_id):
+    """
+    Remove a document from search results
+
+    Args:
+        app (str): Application identifier
+        doc_id (str): Document uuid
+
+    Returns:
+        dict: Success status or error message
+    """
+    try:
+        with FileLock(manifest_file(app), compact=True, backup_generations=0) as file_lock:
+            result = read_manifest(file_lock)
+            if not result['success']:
+                return result
+            manifest = result['manifest']
+
+            # Hides every copy in existing segments; a later re-index is visible
+            manifest['deleted'][doc_id] = manifest['next_generation']
+            write_result = write_manifest(file_lock, manifest)
+            if not write_result['success']:
+                return write_result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to remove document from search index: {str(e)}"
+        }
+    return {"success": True}
+
+def rebuild_index(app):
+    """
+    Rebuild the search index of an application from docs.json and the
+    document bodies
+
+    Saves wait for the rebuild and are indexed after it.
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        dict: Success status, indexed and missing document counts
+    """
+    with FileLock(manifest_file(app), compact=True, backup_generations=0) as file_lock:
+        result = read_manifest(file_lock)
+        manifest = result['manifest'] if result['success'] else empty_manifest()
+
+        with FileLock(index_file(app), mode=FileLock.READ) as index_lock:
+            index_result = index_lock.read()
+        if not index_result['success']:
+            return index_result
+        index_data = index_result['data']
+
+        builder = SegmentBuilder(allocate_generation(manifest))
+        missing = 0
+        documents = index_data.get('documents', {})
+        legacy_ids = legacy_document_ids(index_data)
+        for doc_id in list(documents) + legacy_ids:
+            # Documents embedded by the legacy layout are indexed from docs.json
+            record = index_data[doc_id] if doc_id in legacy_ids else read_body(app, doc_id, documents[doc_id])
+            if record is None:
+                missing += 1
+                continue
+            builder.add_document(doc_id, record)
+
+        entry = builder.write(app)
+        manifest['segments'] = [entry] if entry else []
+        manifest['deleted'] = {}
+        write_result = write_manifest(file_lock, manifest)
+        if not write_result['success']:
+            return write_result
+        remove_segment_files(app, manifest['segments'])
+
+    return {"success": True, "indexed": len(builder.docs), "missing": missing}
+
+def optimize_index(app):
+    """
+    Merge every segment into one, dropping deleted and shadowed documents
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        dict: Success status and the number of merged segments
+    """
+    with FileLock(manifest_file(app), compact=True, backup_generations=0) as file_lock:
+        result = read_manifest(file_lock)
+        if not result['success']:
+            return result
+        manifest = result['manifest']
+
+        entries = manifest['segments']
+        if len(entries) <= 1 and not manifest['deleted']:
+            return {"success": True, "merged": 0}
+
+        merged = merge_segments(app, manifest, entries)
+        manifest['segments'] = [merged] if merged else []
+        write_result = write_manifest(file_lock, manifest)
+        if not write_result['success']:
+            return write_result
+        remove_segment_files(app, manifest['segments'])
+
+    return {"success": True, "merged": len(entries)}
+
+class SearchSnapshot:
+    """
+    The segments of one manifest version with the collection statistics
+    and per-segment dead documents queries need
+    """
+
+    def __init__(self, manifest, segments):
+        """
+        Prepare a snapshot
+
+        Args:
+            manifest (dict): Manifest the segments were loaded from
+            segments (list): SearchSegment objects, oldest first
+        """
+        self.segments = segments
+        seen = set()
+        self.dead = [segment.dead_ordinals(manifest['deleted'], seen) for segment in reversed(segments)][::-1]
+
+        self.doc_count = 0
+        total_length = 0
+        for segment, dead in zip(segments, self.dead):
+            self.doc_count += len(segment.docs) - len(dead)
+            total_length += segment.total_length - sum(segment.docs[ordinal][1] for ordinal in dead)
+        average_length = total_length / self.doc_count if self.doc_count else 1.0
+
+        # Length normalization part of the BM25 denominator, per document
+        self.norms = [
+            [BM25_K1 * (1 - BM25_B + BM25_B * doc[1] / average_length) for doc in segment.docs]
+            for segment in segments
+        ]
+        self.hidden_by_roles = {}
+
+    def hidden_ordinals(self, roles):
+        """
+        Get the documents each segment hides from a set of roles
+
+        Callers usually share a few role sets, so the result is kept for
+        the lifetime of the snapshot.
+
+        Args:
+            roles (set): Caller's roles
+
+        Returns:
+            list: Per segment, the set of ordinals restricted to other roles
+        """
+        key = frozenset(roles)
+        hidden = self.hidden_by_roles.get(key)
+        if hidden is None:
+            hidden = [
+                {ordinal for ordinal, doc in enumerate(segment.docs) if doc[5] and key.isdisjoint(doc[5])}
+                for segment in self.segments
+            ]
+            if len(self.hidden_by_roles) >= SEARCH_ROLE_SETS_CACHED:
+                self.hidden_by_roles.clear()
+            self.hidden_by_roles[key] = hidden
+        return hidden
+
+    def allowed_ordinals(self, position, tags, categories):
+        """
+        Get the documents of a segment matching the facet filters
+
+        Args:
+            position (int): Segment position
+            tags (list): Tags a document must all have
+            categories (list): Categories a document must have one of
+
+        Returns:
+            set: Matching ordinals, or None when there is no filter
+        """
+        facets = self.segments[position].facets
+        allowed = None
+        for tag in tags:
+            ordinals = facets['tags'].get(tag, ())
+            allowed = set(ordinals) if allowed is None else allowed.intersection(ordinals)
+        if categories:
+            selected = set()
+            for category in categories:
+                selected.update(facets['category'].get(category, ()))
+            allowed = selected if allowed is None else allowed & selected
+        return allowed
+
+    def score(self, terms, tags, categories):
+        """
+        Score the documents matching any query term with BM25
+
+        Document frequencies include dead documents until their segments
+        are merged, as with any segmented index.
+
+        Args:
+            terms (list): Distinct query terms
+            tags (list): Tag filter
+            categories (list): Category filter
+
+        Returns:
+            dict: Segment position to {ordinal: score}
+        """
+        allowed = [self.allowed_ordinals(position, tags, categories) for position in range(len(self.segments))]
+        scores = {}
+
+        if not terms:
+            # Filter-only query: every live document of the selected facets
+            if not tags and not categories:
+                return scores
+            for position, ordinals in enumerate(allowed):
+                live = ordinals - self.dead[position]
+                if live:
+                    scores[position] = dict.fromkeys(live, 0.0)
+            return scores
+
+        for term in terms:
+            frequency = sum(segment.document_frequency(term) for segment in self.segments)
+            if not frequency:
+                continue
+            idf = math.log(1 + (max(self.doc_count - frequency, 0) + 0.5) / (frequency + 0.5))
+            weight = idf * (BM25_K1 + 1)
+            for position, segment in enumerate(self.segments):
+                postings = segment.term_postings(term)
+                if postings is None:
+                    continue
+                dead = self.dead[position]
+                segment_allowed = allowed[position]
+                norms = self.norms[position]
+                pairs = zip(postings[0::2], postings[1::2])
+                if dead or segment_allowed is not None:
+                    pairs = [
+                        (ordinal, count) for ordinal, count in pairs
+                        if ordinal not in dead and (segment_allowed is None or ordinal in segment_allowed)
+                    ]
+
+                segment_scores = scores.get(position)
+                if segment_scores is None:
+                    scores[position] = {ordinal: weight * count / (count + norms[ordinal]) for ordinal, count in pairs}
+                else:
+                    current = segment_scores.get
+                    for ordinal, count in pairs:
+                        segment_scores[ordinal] = current(ordinal, 0.0) + weight * count / (count + norms[ordinal])
+        return scores
+
+def load_snapshot(app):
+    """
+    Get the query snapshot of the current index version
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        dict: Success status and the SearchSnapshot, or an error message
+    """
+    # Segments are loaded under the shared lock so a merge cannot delete them first
+    with FileLock(manifest_file(app), mode=FileLock.READ) as file_lock:
+        result = read_manifest(file_lock)
+        if not result['success']:
+            return result
+        signature = file_lock.read_signature
+        snapshot = snapshot_cache.get(file_lock.cache_key, signature)
+        if snapshot is JsonCache.MISSING:
+            manifest = result['manifest']
+            segments = [load_segment(app, entry['name']) for entry in manifest['segments']]
+            snapshot = SearchSnapshot(manifest, segments)
+            snapshot_cache.put(file_lock.cache_key, signature, snapshot)
+    return {"success": True, "snapshot": snapshot}
+
+def top_facets(counts):
+    return dict(counts.most_common(SEARCH_FACET_LIMIT))
+
+def search_documents(app, query, roles=None, filters=None, limit=SEARCH_RESULT_LIMIT, offset=0):
+    """
+    Search the documents of an application
+
+    Documents whose ADOM field names roles are only returned to callers
+    holding one of them; documents without an ADOM are visible to all.
+
+    Args:
+        app (str): Application identifier
+        query (str): Free text query, terms are OR-ed and ranked with BM25
+        roles (list): Caller's ADOM roles
+        filters (dict): Facet filters: "tags" (all required) and
+            "category" (any of)
+        limit (int): Results to return, at most SEARCH_MAX_RESULTS
+        offset (int): Results to skip
+
+    Returns:
+        dict: Success status, total matches, ranked results and tag and
+              category facet counts over the matches, or an error message
+    """
+    try:
+        result = load_snapshot(app)
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Failed to load search index: {str(e)}"
+        }
+    if not result['success']:
+        return result
+    snapshot = result['snapshot']
+
+    filters = filters or {}
+    tags = [str(tag) for tag in filters.get('tags') or []]
+    categories = [str(category) for category in filters.get('category') or []]
+    terms = list(dict.fromkeys(tokenize(str(query or ''))))
+    try:
+        limit = min(max(int(limit), 0), SEARCH_MAX_RESULTS)
+        offset = max(int(offset), 0)
+    except (TypeError, ValueError):
+        return {"success": False, "error": "Invalid limit or offset"}
+
+    hidden = snapshot.hidden_ordinals(role_set(roles))
+    matches = []
+    tag_counts = Counter()
+    category_counts = Counter()
+    for position, segment_scores in snapshot.score(terms, tags, categories).items():
+        docs = snapshot.segments[position].docs
+        visible = segment_scores.keys() - hidden[position]
+        matches.extend((segment_scores[ordinal], position, ordinal) for ordinal in visible)
+        tag_counts.update(chain.from_iterable(docs[ordinal][4] for ordinal in visible))
+        category_counts.update(docs[ordinal][3] for ordinal in visible)
+    category_counts.pop('', None)
+
+    # Ties favour newer documents: later segments and ordinals
+    ranked = heapq.nlargest(offset + limit, matches)[offset:]
+    results = []
+    for score, position, ordinal in ranked:
+        doc = snapshot.segments[position].docs[ordinal]
+        results.append({
+            "id": doc[0],
+            "title": doc[2],
+            "category": doc[3],
+            "tags": doc[4],
+            "adom": doc[5],
+            "score": round(score, 4)
+        })
+
+    return {
+        "success": True,
+        "query": query,
+        "total": len(matches),
+        "results": results,
+        "facets": {"tags": top_facets(tag_counts), "category": top_facets(category_counts)}
+    }
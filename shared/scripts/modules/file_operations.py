@@ -9,146 +9,708 @@ import sys
 import portalocker
 import logging
 import json
+import shutil
+import tempfile
+from collections import OrderedDict
 from modules_config import *
+from instrumentation import add_phase, timed_phase
+
+# Number of rotating .bck generations kept per file
+BACKUP_GENERATIONS = 3
+
+# Stores at least this large are written with compact separators
+COMPACT_THRESHOLD_BYTES = 1024 * 1024
+
+# Permissions for newly created data files (readable by PHP)
+DEFAULT_FILE_MODE = 0o644
+
+class JsonCache:
+    """
+    Bounded LRU cache of parsed JSON documents keyed by path and validated
+    against (st_mtime_ns, st_size, st_ino) of the file on disk.
+
+    Cached snapshots are shared between readers and must be treated as read-only.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_entries=32):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries (int): Maximum number of documents kept in memory
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def signature(stat_result):
+        """
+        Build the validation key for a file
+
+        Args:
+            stat_result (os.stat_result): Result of os.stat/os.fstat
+
+        Returns:
+            tuple: (st_mtime_ns, st_size, st_ino)
+        """
+        return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+    def get(self, path, signature):
+        """
+        Return the cached snapshot if the file has not changed
+
+        Args:
+            path (str): Absolute file path
+            signature (tuple): Current file signature
+
+        Returns:
+            Parsed JSON data, or JsonCache.MISSING on a miss
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != signature:
+            self.misses += 1
+            return self.MISSING
+        self.entries.move_to_end(path)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, path, signature, data):
+        """
+        Store a parsed snapshot, evicting the least recently used entries
+
+        Args:
+            path (str): Absolute file path
+            signature (tuple): File signature the snapshot corresponds to
+            data: Parsed JSON data
+        """
+        self.entries[path] = (signature, data)
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, path):
+        """
+        Drop the snapshot for a path
+
+        Args:
+            path (str): Absolute file path
+        """
+        self.entries.pop(path, None)
+
+    def stats(self):
+        """
+        Get cache counters
+
+        Returns:
+            dict: Hits, misses, evictions and current size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries)
+        }
+
+# Process-wide cache, most useful inside the long-lived worker
+json_cache = JsonCache()
+
+# Process-wide lock contention counters
+lock_stats = {
+    "acquired": 0,
+    "contended": 0,
+    "timeouts": 0,
+    "wait_seconds": 0.0
+}
+
+class LockTimeout(Exception):
+    """
+    Raised when a file lock cannot be acquired in time
+    """
+
+def fsync_directory(directory):
+    """
+    Flush a directory entry so a rename inside it survives a crash
+
+    Args:
+        directory (str): Directory path
+    """
+    with timed_phase("fsync"):
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def prepare_atomic_write(file_name_and_path, payload, file_mode=None):
+    """
+    Write and fsync a temp file next to the target, ready to be renamed over it
+
+    Args:
+        file_name_and_path (str): Target file path
+        payload (bytes): Complete new file contents
+        file_mode (int): Permissions for the new file, defaults to the
+            existing file's permissions or DEFAULT_FILE_MODE
+
+    Returns:
+        str: Path of the temp file
+    """
+    directory = os.path.dirname(os.path.abspath(file_name_and_path))
+    if file_mode is None:
+        try:
+            file_mode = os.stat(file_name_and_path).st_mode & 0o777
+        except FileNotFoundError:
+            file_mode = DEFAULT_FILE_MODE
+
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(file_name_and_path)}.",
+        suffix='.tmp',
+        dir=directory
+    )
+    try:
+        with os.fdopen(fd, 'wb') as temp_file, timed_phase("fsync"):
+            temp_file.write(payload)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.chmod(temp_path, file_mode)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+    return temp_path
+
+def discard_temp(temp_path):
+    """
+    Remove a temp file left by prepare_atomic_write
+
+    Args:
+        temp_path (str): Temp file path
+    """
+    try:
+        os.unlink(temp_path)
+    except FileNotFoundError:
+        pass
+
+def atomic_write(file_name_and_path, payload, file_mode=None):
+    """
+    Replace a file atomically: write a temp file in the same directory,
+    fsync it and rename it over the target
+
+    Args:
+        file_name_and_path (str): Target file path
+        payload (bytes): Complete new file contents
+        file_mode (int): Permissions for the new file, defaults to the
+            existing file's permissions or DEFAULT_FILE_MODE
+    """
+    temp_path = prepare_atomic_write(file_name_and_path, payload, file_mode)
+    try:
+        os.replace(temp_path, file_name_and_path)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+
+    fsync_directory(os.path.dirname(os.path.abspath(file_name_and_path)))
+
+def list_backups(file_name_and_path):
+    """
+    List backup snapshots of a file, newest first
+
+    Args:
+        file_name_and_path (str): Path of the managed file
+
+    Returns:
+        list: Absolute paths of .bck files
+    """
+    directory = os.path.dirname(os.path.abspath(file_name_and_path))
+    base_name = os.path.basename(file_name_and_path)
+    backups = [
+        os.path.join(directory, fname)
+        for fname in os.listdir(directory)
+        if fname.startswith(base_name) and fname.endswith('.bck')
+    ]
+    return sorted(backups, key=os.path.getmtime, reverse=True)
+
+def has_backup(file_name_and_path):
+    """
+    Cheaply check for the newest rotating backup generation
+
+    Args:
+        file_name_and_path (str): Path of the managed file
+
+    Returns:
+        bool: True if {file}.1.bck exists
+    """
+    return os.path.exists(f"{file_name_and_path}.1.bck")
+
+def rotate_backups(file_name_and_path, generations=BACKUP_GENERATIONS):
+    """
+    Snapshot the current file as generation 1 and shift older generations,
+    dropping any beyond the retention count
+
+    Generation files are named {file}.{n}.bck with 1 being the newest. The
+    snapshot is a hard link to the current inode, so it costs no copy; the
+    subsequent rename gives the live file a new inode.
+
+    Args:
+        file_name_and_path (str): Path of the managed file
+        generations (int): Number of generations to keep, 0 disables backups
+    """
+    if generations <= 0 or not os.path.exists(file_name_and_path):
+        return
+
+    def generation_path(n):
+        return f"{file_name_and_path}.{n}.bck"
+
+    # Drop generations beyond the retention policy
+    n = generations
+    while os.path.exists(generation_path(n)):
+        os.unlink(generation_path(n))
+        n += 1
+
+    # Shift the remaining generations up by one
+    for n in range(generations - 1, 0, -1):
+        if os.path.exists(generation_path(n)):
+            os.replace(generation_path(n), generation_path(n + 1))
+
+    try:
+        os.link(file_name_and_path, generation_path(1))
+    except OSError:
+        shutil.copy2(file_name_and_path, generation_path(1))
 
 class FileLock:
-    def __init__(self, file_name_and_path):
+    READ = 'read'
+    WRITE = 'write'
+
+    def __init__(self, file_name_and_path, mode=WRITE, blocking=True, timeout=None,
+                 compact=None, backup_generations=BACKUP_GENERATIONS):
         """
         Initialize FileLock with a file path
         
+        The lock is held on a {file}.lock sidecar rather than on the data file,
+        because commits replace the data file with a new inode.
+
         Args:
             file_name_and_path (str): Path to the file to be managed
+            mode (str): FileLock.READ for a shared lock, FileLock.WRITE for an exclusive lock
+            blocking (bool): Wait for the lock instead of failing immediately
+            timeout (float): Maximum seconds to wait for the lock, None waits forever
+            compact (bool): Serialize without indentation, None decides by
+                COMPACT_THRESHOLD_BYTES
+            backup_generations (int): Number of .bck snapshots kept on write
         """
+        if mode not in (self.READ, self.WRITE):
+            raise ValueError(f"Invalid lock mode: {mode}")
+
         self.file_name_and_path = file_name_and_path
+        self.lock_file_path = f"{file_name_and_path}.lock"
+        self.cache_key = os.path.abspath(file_name_and_path)
+        self.mode = mode
+        self.blocking = blocking
+        self.timeout = timeout
+        self.compact = compact
+        self.backup_generations = backup_generations
         self.file = None
         self.file_created = False
+        self.read_signature = None
 
         # Create directory structure if needed
         os.makedirs(os.path.dirname(self.file_name_and_path), exist_ok=True)
 
-        # Initialize file if it doesn't exist
-        if not os.path.exists(self.file_name_and_path):
-            # Check for backup files
-            backup_exists = any(
-                fname.startswith(self.file_name_and_path) and 
-                fname.endswith('.bck') 
-                for fname in os.listdir(os.path.dirname(self.file_name_and_path))
-            )
-            
-            if not backup_exists:
-                # Create new file with empty dictionary
-                with open(self.file_name_and_path, 'w') as file:
-                    json.dump({}, file)
-                self.file_created = True
+        # Initialize file if it doesn't exist and there is nothing to restore
+        if not os.path.exists(self.file_name_and_path) and not has_backup(self.file_name_and_path):
+            atomic_write(self.file_name_and_path, b'{}')
+            self.file_created = True
 
     def __enter__(self):
         """
         Context manager entry point - acquire file lock
         """
-        self.file = open(self.file_name_and_path, 'r+')
-        portalocker.lock(self.file, portalocker.LOCK_EX)
+        self.file = open(self.lock_file_path, 'a')
+        flags = portalocker.LOCK_SH if self.mode == self.READ else portalocker.LOCK_EX
+        try:
+            self._acquire(flags)
+        except Exception:
+            self.file.close()
+            self.file = None
+            raise
         return self
 
-    def read(self, attempts=3, delay=1):
+    def _acquire(self, flags):
         """
-        Read JSON data from file with retry mechanism
+        Acquire the lock with the configured blocking and timeout behaviour
+
+        Args:
+            flags (int): portalocker.LOCK_SH or portalocker.LOCK_EX
+
+        Raises:
+            LockTimeout: If the lock is not available in time
+        """
+        # Uncontended fast path
+        try:
+            portalocker.lock(self.file, flags | portalocker.LOCK_NB)
+            lock_stats["acquired"] += 1
+            return
+        except portalocker.LockException:
+            lock_stats["contended"] += 1
+
+        if not self.blocking:
+            lock_stats["timeouts"] += 1
+            raise LockTimeout(f"Lock busy: {self.file_name_and_path}")
+
+        start = time.monotonic()
+        try:
+            if self.timeout is None:
+                portalocker.lock(self.file, flags)
+            else:
+                # Poll with backoff until the deadline
+                deadline = start + self.timeout
+                delay = 0.005
+                while True:
+                    try:
+                        portalocker.lock(self.file, flags | portalocker.LOCK_NB)
+                        break
+                    except portalocker.LockException:
+                        if time.monotonic() >= deadline:
+                            lock_stats["timeouts"] += 1
+                            raise LockTimeout(
+                                f"Timed out after {self.timeout}s waiting for {self.file_name_and_path}"
+                            )
+                        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                        delay = min(delay * 2, 0.1)
+        finally:
+            waited = time.monotonic() - start
+            lock_stats["wait_seconds"] += waited
+            add_phase("lock_wait", waited)
+
+        lock_stats["acquired"] += 1
+
+    def upgrade(self):
+        """
+        Upgrade a shared lock to an exclusive lock for read-modify-write.
+
+        The conversion is not atomic, so another writer may commit in between.
+
+        Returns:
+            bool: True if the file is unchanged since the last read(), False if
+                the caller must read again before writing
+        """
+        if self.mode == self.WRITE:
+            return True
+
+        self._acquire(portalocker.LOCK_EX)
+        self.mode = self.WRITE
+        return self._signature() == self.read_signature
+
+    def _signature(self):
+        """
+        Get the cache signature of the data file
+
+        Returns:
+            tuple: File signature, or None if the file is missing
+        """
+        try:
+            return json_cache.signature(os.stat(self.file_name_and_path))
+        except FileNotFoundError:
+            return None
+
+    def read(self, use_cache=None):
+        """
+        Read JSON data from file
         
+        Commits are atomic renames, so a decode error means the file was
+        damaged outside FileLock and the newest valid backup is restored.
+
         Args:
-            attempts (int): Number of read attempts
-            delay (float): Delay between attempts in seconds
+            use_cache (bool): Serve an unchanged file from the shared snapshot
+                cache; the returned data must then not be mutated. Defaults to
+                True under a shared (read) lock.
             
         Returns:
             dict: Success status and data or error message
         """
-        for _ in range(attempts):
-            try:
-                data = json.load(self.file)
+        if use_cache is None:
+            use_cache = self.mode == self.READ
+
+        if use_cache:
+            signature = self._signature()
+            data = json_cache.get(self.cache_key, signature)
+            if data is not JsonCache.MISSING:
+                self.read_signature = signature
                 return {
                     "success": True,
                     "data": data,
                     "file_created": self.file_created
                 }
-            except json.JSONDecodeError:
-                time.sleep(delay)  # Wait before retrying
-        
-        # If reading fails after all attempts, try to restore from backup
+
         try:
-            self.restore_from_backup()
-            return {
-                "success": True,
-                "data": json.load(self.file),
-                "file_created": self.file_created
-            }
-        except:
-            return {
-                "success": False,
-                "error": "JSONDecodeError"
-            }
+            with open(self.file_name_and_path, 'rb') as data_file:
+                signature = json_cache.signature(os.fstat(data_file.fileno()))
+                with timed_phase("parse"):
+                    data = json.load(data_file)
+        except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            logging.error(f"Failed to read {self.file_name_and_path}: {str(e)}")
+            try:
+                data = self.restore_from_backup()
+            except Exception as restore_error:
+                logging.error(f"Failed to restore {self.file_name_and_path}: {str(restore_error)}")
+                return {
+                    "success": False,
+                    "error": "JSONDecodeError"
+                }
+            signature = self._signature()
+
+        self.read_signature = signature
+        if use_cache:
+            json_cache.put(self.cache_key, signature, data)
+        return {
+            "success": True,
+            "data": data,
+            "file_created": self.file_created
+        }
 
-    def write(self, data, attempts=3, delay=1):
+    def serialize(self, data):
         """
-        Write JSON data to file with retry mechanism
+        Serialize data for writing
+
+        Args:
+            data: JSON serializable data
+
+        Returns:
+            bytes: Encoded JSON document
+        """
+        compact = self.compact
+        if compact is None:
+            try:
+                compact = os.path.getsize(self.file_name_and_path) >= COMPACT_THRESHOLD_BYTES
+            except OSError:
+                compact = False
+
+        with timed_phase("serialize"):
+            if compact:
+                return json.dumps(data, separators=(',', ':')).encode('utf-8')
+            return json.dumps(data, indent=4).encode('utf-8')
+
+    def write(self, data):
+        """
+        Atomically commit JSON data to file, rotating .bck snapshots
         
+        The written data becomes the cached snapshot for this file and must
+        not be mutated afterwards.
+
         Args:
             data: Data to write to file
-            attempts (int): Number of write attempts
-            delay (float): Delay between attempts in seconds
             
         Returns:
             dict: Success status and file creation info
         """
-        for _ in range(attempts):
-            try:
-                self.file.seek(0)
-                json.dump(data, self.file, indent=4)
-                self.file.truncate()
-                return {
-                    "success": True,
-                    "file_created": self.file_created
-                }
-            except Exception as e:
-                logging.error(f"Error writing to file: {str(e)}")
-                time.sleep(delay)
-        
+        if self.mode == self.READ:
+            return {
+                "success": False,
+                "error": "File is locked for reading, call upgrade() before writing"
+            }
+
+        try:
+            payload = self.serialize(data)
+            rotate_backups(self.file_name_and_path, self.backup_generations)
+            atomic_write(self.file_name_and_path, payload)
+        except Exception as e:
+            logging.error(f"Error writing to file: {str(e)}")
+            json_cache.invalidate(self.cache_key)
+            return {
+                "success": False,
+                "error": f"Failed to write: {str(e)}"
+            }
+
+        # The written data becomes the cached snapshot for this file
+        self.read_signature = self._signature()
+        json_cache.put(self.cache_key, self.read_signature, data)
         return {
-            "success": False,
-            "error": f"Failed to write after {attempts} attempts"
+            "success": True,
+            "file_created": self.file_created
         }
 
     def restore_from_backup(self):
         """
-        Restore file from most recent backup if available
+        Restore file from the most recent valid backup if available
+
+        Returns:
+            Parsed data of the restored backup
+
+        Raises:
+            FileNotFoundError: If no readable backup exists
         """
-        backup_dir = os.path.dirname(self.file_name_and_path)
-        backup_files = [
-            f for f in os.listdir(backup_dir) 
-            if f.startswith(os.path.basename(self.file_name_and_path)) and 
-            f.endswith('.bck')
-        ]
-        
-        if backup_files:
-            # Sort backup files by modification time (newest first)
-            newest_backup = max(
-                backup_files,
-                key=lambda f: os.path.getmtime(os.path.join(backup_dir, f))
-            )
-            backup_path = os.path.join(backup_dir, newest_backup)
-            
-            with open(backup_path, 'r') as backup_file:
-                backup_data = json.load(backup_file)
-            
+        for backup_path in list_backups(self.file_name_and_path):
+            try:
+                with open(backup_path, 'rb') as backup_file:
+                    payload = backup_file.read()
+                backup_data = json.loads(payload)
+            except (OSError, ValueError) as e:
+                logging.error(f"Skipping unreadable backup {backup_path}: {str(e)}")
+                continue
+
             # Write backup data to main file
-            self.file.seek(0)
-            json.dump(backup_data, self.file, indent=4)
-            self.file.truncate()
-        else:
-            raise FileNotFoundError("No backup files found")
+            atomic_write(self.file_name_and_path, payload)
+            json_cache.invalidate(self.cache_key)
+            logging.warning(f"Restored {self.file_name_and_path} from {backup_path}")
+            return backup_data
+
+        raise FileNotFoundError("No backup files found")
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
         Context manager exit point - release file lock
         """
+        self.read_signature = None
         if self.file:
             portalocker.unlock(self.file)
             self.file.close()
-        return None
\ No newline at end of file
+        return None
+
+class FileTransaction:
+    """
+    Read-modify-write across several JSON files under one set of locks.
+
+    Exclusive locks are taken in sorted path order so concurrent transactions
+    over overlapping files cannot deadlock. Each file is parsed at most once
+    and staged changes are only written by commit(): every new version is
+    written and fsynced to a temp file first, then all are renamed into place.
+    A failure before the renames leaves every file untouched, and readers
+    using FileLock never see a partial commit because they wait on the locks.
+    """
+
+    def __init__(self, paths, timeout=None, compact=None, backup_generations=BACKUP_GENERATIONS):
+        """
+        Initialize a transaction over a set of files
+
+        Args:
+            paths (iterable): Paths of the files taking part
+            timeout (float): Maximum seconds to wait for each lock, None waits forever
+            compact (bool): Serialization mode passed to each FileLock
+            backup_generations (int): Number of .bck snapshots kept on commit
+        """
+        self.paths = sorted(set(paths), key=os.path.abspath)
+        self.timeout = timeout
+        self.compact = compact
+        self.backup_generations = backup_generations
+        self.locks = OrderedDict()
+        self.loaded = {}
+        self.staged = OrderedDict()
+
+    def __enter__(self):
+        """
+        Context manager entry point - acquire every lock in path order
+        """
+        try:
+            for path in self.paths:
+                file_lock = FileLock(path, timeout=self.timeout, compact=self.compact,
+                                     backup_generations=self.backup_generations)
+                file_lock.__enter__()
+                self.locks[path] = file_lock
+        except Exception:
+            self.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def read(self, path):
+        """
+        Read a file taking part in the transaction
+
+        The returned data is private to the caller and may be mutated and staged.
+
+        Args:
+            path (str): File path passed to the constructor
+
+        Returns:
+            dict: Success status and data or error message
+        """
+        if path not in self.locks:
+            return {
+                "success": False,
+                "error": f"{path} is not part of the transaction"
+            }
+        if path not in self.loaded:
+            result = self.locks[path].read(use_cache=False)
+            if not result['success']:
+                return result
+            self.loaded[path] = result
+        return self.loaded[path]
+
+    def stage(self, path, data):
+        """
+        Queue new content for a file, written on commit()
+
+        Args:
+            path (str): File path passed to the constructor
+            data: JSON serializable data
+        """
+        if path not in self.locks:
+            raise KeyError(f"{path} is not part of the transaction")
+        self.staged[path] = data
+
+    def commit(self):
+        """
+        Write every staged file
+
+        Returns:
+            dict: Success status and list of written paths, or error message
+        """
+        prepared = []
+        try:
+            for path, data in self.staged.items():
+                payload = self.locks[path].serialize(data)
+                prepared.append((path, prepare_atomic_write(path, payload)))
+        except Exception as e:
+            for _, temp_path in prepared:
+                discard_temp(temp_path)
+            logging.error(f"Error preparing transaction: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Failed to write: {str(e)}"
+            }
+
+        directories = set()
+        for path, temp_path in prepared:
+            try:
+                rotate_backups(path, self.backup_generations)
+                os.replace(temp_path, path)
+            except Exception as e:
+                # Earlier renames cannot be undone; report what was written
+                for _, pending in prepared:
+                    discard_temp(pending)
+                for path_written in self.staged:
+                    json_cache.invalidate(os.path.abspath(path_written))
+                logging.error(f"Error committing {path}: {str(e)}")
+                return {
+                    "success": False,
+                    "error": f"Failed to write {path}: {str(e)}"
+                }
+            directories.add(os.path.dirname(os.path.abspath(path)))
+
+        for directory in directories:
+            fsync_directory(directory)
+
+        for path, data in self.staged.items():
+            file_lock = self.locks[path]
+            file_lock.read_signature = file_lock._signature()
+            json_cache.put(file_lock.cache_key, file_lock.read_signature, data)
+
+        written = list(self.staged)
+        self.staged.clear()
+        return {
+            "success": True,
+            "written": written
+        }
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Context manager exit point - drop uncommitted changes and release locks
+        """
+        self.staged.clear()
+        for file_lock in reversed(list(self.locks.values())):
+            file_lock.__exit__(exc_type, exc_val, exc_tb)
+        self.locks.clear()
+        return None
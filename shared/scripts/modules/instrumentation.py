@@ -0,0 +1,156 @@
+"""
+Instrumentation
+Per-phase request timings and opt-in profiling of slow requests
+
+File operations add the time they spend in each phase (lock wait, JSON
+parse, serialize, fsync) to the current request; RequestTrace wraps one
+action, derives the mutate phase from what is left and emits a single
+structured record through log_with_context.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from modules_config import *
+from logging_config import log_with_context, LOG_DIR
+
+# Profile slow requests with cProfile and tracemalloc: PORTAL_PROFILE=1
+PROFILE_ENABLED = os.getenv('PORTAL_PROFILE', '') not in ('', '0')
+
+# Requests at least this slow are profiled and logged at warning level
+SLOW_REQUEST_MS = float(os.getenv('PORTAL_SLOW_REQUEST_MS', '500'))
+
+# Where slow request profiles are dumped
+PROFILE_DIR = os.getenv('PORTAL_PROFILE_DIR', os.path.join(LOG_DIR, 'profiles'))
+
+# Allocation sites listed in a tracemalloc report
+TRACEMALLOC_TOP = 25
+
+# Phases reported for every request, in record order
+PHASES = ["import", "lock_wait", "parse", "mutate", "serialize", "fsync"]
+
+# Seconds spent in each measured phase by the current request
+phase_seconds = {}
+
+def add_phase(phase, seconds):
+    """
+    Add time spent in a phase to the current request
+
+    Args:
+        phase (str): Phase name from PHASES
+        seconds (float): Elapsed time
+    """
+    phase_seconds[phase] = phase_seconds.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed_phase(phase):
+    """
+    Time a block as part of a phase of the current request
+
+    Args:
+        phase (str): Phase name from PHASES
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(phase, time.perf_counter() - start)
+
+class RequestTrace:
+    """
+    Time one action and log its phase breakdown.
+
+    Time not spent in a measured phase is reported as "mutate": the
+    action's own work on the parsed data. With PROFILE_ENABLED the action
+    runs under cProfile and tracemalloc, and requests slower than
+    SLOW_REQUEST_MS leave a .prof and an allocation report in PROFILE_DIR.
+    """
+
+    def __init__(self, action, logger, import_started=None):
+        """
+        Prepare a trace
+
+        Args:
+            action (str): Action label in "request_type.action_type" form
+            logger (logging.Logger): Logger receiving the timing record
+            import_started (float): perf_counter() value at the start of the
+                import chain, to report the import phase of a CLI request
+        """
+        self.action = action
+        self.logger = logger
+        self.import_started = import_started
+        self.status = 0
+        self.elapsed_ms = 0.0
+        self.profiler = None
+        self.start = None
+
+    def __enter__(self):
+        phase_seconds.clear()
+        if PROFILE_ENABLED:
+            import cProfile
+            import tracemalloc
+            tracemalloc.start()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.elapsed_ms = elapsed * 1000
+
+        if exc_type is SystemExit:
+            # As the interpreter does: no code is success, a message is failure
+            if exc_val.code is None:
+                self.status = 0
+            else:
+                self.status = exc_val.code if isinstance(exc_val.code, int) else 1
+        elif exc_type is not None:
+            self.status = 1
+
+        timings = {phase: phase_seconds.get(phase, 0.0) for phase in PHASES}
+        timings["mutate"] = max(elapsed - sum(timings.values()), 0.0)
+        if self.import_started is not None:
+            timings["import"] = self.start - self.import_started
+
+        context = {f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in timings.items()}
+        slow = self.elapsed_ms >= SLOW_REQUEST_MS
+        if self.profiler is not None:
+            if slow:
+                context["profile"] = self.dump_profile()
+            self.stop_tracemalloc()
+
+        log_with_context(self.logger, 'warning' if slow else 'info', "Request timings",
+                         action=self.action, status=self.status, pid=os.getpid(),
+                         total_ms=round(self.elapsed_ms, 3), **context)
+        return False
+
+    def dump_profile(self):
+        """
+        Write the cProfile stats and top allocation sites of this request
+
+        Returns:
+            str: Path of the .prof file, or an error description
+        """
+        import tracemalloc
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(PROFILE_DIR, f"{stamp}_{self.action}_{os.getpid()}")
+        try:
+            os.makedirs(PROFILE_DIR, mode=0o755, exist_ok=True)
+            self.profiler.dump_stats(f"{base}.prof")
+
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with open(f"{base}.mem.txt", 'w') as report:
+                report.write(f"current_bytes={current} peak_bytes={peak}\n")
+                for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                    report.write(f"{stat}\n")
+        except OSError as e:
+            return f"failed: {e}"
+        return f"{base}.prof"
+
+    def stop_tracemalloc(self):
+        import tracemalloc
+        tracemalloc.stop()
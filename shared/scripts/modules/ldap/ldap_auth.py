@@ -0,0 +1,671 @@
+"""
+LDAP Authentication Service
+Verifies portal logins against Active Directory over pooled connections:
+service-account connections run the directory searches, and user passwords
+are checked by binding on a separate pool of already open connections
+"""
+
+import sys
+import time
+import threading
+from collections import deque, OrderedDict
+from ldap_config import *
+from file_operations import FileLock
+
+class LdapConnectionPool:
+    """
+    Pool of open LDAP connections with failover between servers.
+
+    Connections are created on demand against the first server that is not
+    marked down, health-checked when they have been idle for a while, and
+    dropped when they fail at the server level. Pools belong to one process;
+    a pool used after fork() starts over instead of sharing sockets.
+    """
+
+    # Errors after which a connection (and its server) is considered dead
+    SERVER_ERRORS = ('SERVER_DOWN', 'TIMEOUT', 'CONNECT_ERROR', 'UNAVAILABLE')
+
+    def __init__(self, servers, bind_dn=None, bind_password=None, max_size=LDAP_POOL_SIZE):
+        """
+        Initialize the pool
+
+        Args:
+            servers (list): LDAP URIs in order of preference
+            bind_dn (str): Account bound on every new connection, None for none
+            bind_password (str): Password of bind_dn
+            max_size (int): Maximum number of idle connections kept
+        """
+        self.servers = [server for server in servers if server]
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.max_size = max_size
+        self.idle = deque()
+        self.down_until = {}
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "health_checks": 0,
+            "discarded": 0,
+            "failovers": 0
+        }
+
+    def is_server_error(self, error):
+        """
+        Check whether an LDAP error means the connection is unusable
+
+        Args:
+            error (Exception): Raised exception
+
+        Returns:
+            bool: True for connection level failures
+        """
+        return isinstance(error, tuple(getattr(ldap, name) for name in self.SERVER_ERRORS
+                                       if hasattr(ldap, name)))
+
+    def mark_down(self, server):
+        """
+        Skip a server for new connections until the retry interval has passed
+
+        Args:
+            server (str): LDAP URI
+        """
+        self.down_until[server] = time.monotonic() + LDAP_SERVER_RETRY_SECONDS
+
+    def candidate_servers(self):
+        """
+        Get the servers to try for a new connection
+
+        Returns:
+            list: Servers that are up, followed by those marked down
+        """
+        now = time.monotonic()
+        up = [server for server in self.servers if self.down_until.get(server, 0) <= now]
+        down = [server for server in self.servers if server not in up]
+        return up + down
+
+    def connect(self):
+        """
+        Open a connection to the first reachable server
+
+        Returns:
+            tuple: (connection, server)
+
+        Raises:
+            ldap.SERVER_DOWN: If no server can be reached
+        """
+        last_error = None
+        for attempt, server in enumerate(self.candidate_servers()):
+            try:
+                conn = ldap.initialize(server)
+                conn.set_option(ldap.OPT_REFERRALS, 0)
+                conn.set_option(ldap.OPT_NETWORK_TIMEOUT, LDAP_NETWORK_TIMEOUT)
+                conn.set_option(ldap.OPT_TIMEOUT, LDAP_OPERATION_TIMEOUT)
+                conn.timeout = LDAP_OPERATION_TIMEOUT
+                if self.bind_dn:
+                    conn.simple_bind_s(self.bind_dn, self.bind_password)
+            except ldap.LDAPError as e:
+                if not self.is_server_error(e):
+                    raise
+                self.mark_down(server)
+                last_error = e
+                continue
+
+            if attempt:
+                self.stats["failovers"] += 1
+            self.down_until.pop(server, None)
+            self.stats["created"] += 1
+            return conn, server
+
+        raise last_error or ldap.SERVER_DOWN({"desc": "No LDAP servers configured"})
+
+    def discard(self, conn):
+        """
+        Close a connection that is not returned to the pool
+
+        Args:
+            conn: LDAP connection
+        """
+        self.stats["discarded"] += 1
+        try:
+            conn.unbind_s()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Take an idle connection or open a new one
+
+        Returns:
+            tuple: (connection, server)
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                # Inherited through fork(): the sockets belong to the parent
+                self.idle.clear()
+                self.pid = os.getpid()
+
+            while self.idle:
+                conn, server, released = self.idle.pop()
+                idle_seconds = time.monotonic() - released
+                if idle_seconds > LDAP_MAX_IDLE_SECONDS:
+                    self.discard(conn)
+                    continue
+                if idle_seconds > LDAP_HEALTH_CHECK_INTERVAL:
+                    self.stats["health_checks"] += 1
+                    try:
+                        conn.whoami_s()
+                    except ldap.LDAPError:
+                        self.discard(conn)
+                        continue
+                self.stats["reused"] += 1
+                return conn, server
+
+        return self.connect()
+
+    def release(self, conn, server):
+        """
+        Return a healthy connection to the pool
+
+        Args:
+            conn: LDAP connection
+            server (str): Server the connection is open to
+        """
+        with self.lock:
+            if len(self.idle) < self.max_size and self.pid == os.getpid():
+                self.idle.append((conn, server, time.monotonic()))
+                return
+        self.discard(conn)
+
+    def run(self, operation):
+        """
+        Run an operation on a pooled connection, retrying on another
+        connection if the server fails
+
+        Args:
+            operation (callable): Called with the connection
+
+        Returns:
+            Result of the operation
+        """
+        attempts = len(self.servers) + 1
+        for attempt in range(attempts):
+            conn, server = self.acquire()
+            try:
+                result = operation(conn)
+            except ldap.LDAPError as e:
+                if self.is_server_error(e):
+                    self.discard(conn)
+                    self.mark_down(server)
+                    if attempt + 1 < attempts:
+                        continue
+                else:
+                    self.release(conn, server)
+                raise
+            self.release(conn, server)
+            return result
+
+    def close(self):
+        """
+        Close every idle connection
+        """
+        with self.lock:
+            while self.idle:
+                self.discard(self.idle.pop()[0])
+
+class UserCache:
+    """
+    TTL cache of directory entries keyed by lower-cased username.
+
+    Entries live in the memory of each process. Purges are recorded as
+    timestamps in a small JSON marker file that every process checks with a
+    single stat, so a purge reaches all worker children.
+    """
+
+    def __init__(self, ttl=LDAP_USER_CACHE_TTL, purge_file=LDAP_USER_CACHE_PURGE_FILE,
+                 max_entries=LDAP_USER_CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache
+
+        Args:
+            ttl (int): Seconds an entry stays valid, 0 disables the cache
+            purge_file (str): Path of the shared purge marker file
+            max_entries (int): Maximum number of cached users
+        """
+        self.ttl = ttl
+        self.purge_file = purge_file
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.marks = {}
+        self.marks_signature = None
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "purged": 0}
+
+    def purge_marks(self):
+        """
+        Get the purge timestamps, re-reading the marker file if it changed
+
+        Returns:
+            dict: {"all": timestamp, "users": {username: timestamp}}
+        """
+        try:
+            stat_result = os.stat(self.purge_file)
+        except OSError:
+            self.marks, self.marks_signature = {}, None
+            return self.marks
+
+        signature = (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+        if signature != self.marks_signature:
+            try:
+                with open(self.purge_file, 'rb') as purge_file:
+                    self.marks = json.load(purge_file)
+            except (OSError, ValueError):
+                self.marks = {}
+            self.marks_signature = signature
+        return self.marks
+
+    def get(self, username):
+        """
+        Get a cached entry
+
+        Args:
+            username (str): sAMAccountName
+
+        Returns:
+            dict: Entry attributes, or None on a miss
+        """
+        key = username.lower()
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        cached_at, attributes = entry
+        marks = self.purge_marks()
+        if time.time() - cached_at > self.ttl:
+            self.stats["expired"] += 1
+        elif cached_at <= max(marks.get("all", 0), marks.get("users", {}).get(key, 0)):
+            self.stats["purged"] += 1
+        else:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return attributes
+
+        del self.entries[key]
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, username, attributes):
+        """
+        Cache an entry
+
+        Args:
+            username (str): sAMAccountName
+            attributes (dict): Entry attributes
+        """
+        if self.ttl <= 0:
+            return
+        key = username.lower()
+        self.entries[key] = (time.time(), attributes)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def purge(self, usernames=None):
+        """
+        Invalidate cached entries in every process
+
+        Args:
+            usernames (list): Users to purge, None purges everyone
+
+        Returns:
+            dict: Success status or error message
+        """
+        now = time.time()
+        with FileLock(self.purge_file, backup_generations=0) as file_lock:
+            result = file_lock.read(use_cache=False)
+            marks = result['data'] if result['success'] else {}
+
+            # Marks older than the TTL can no longer match a live entry
+            users = {user: mark for user, mark in marks.get("users", {}).items() if now - mark <= self.ttl}
+            if usernames:
+                for username in usernames:
+                    users[username.lower()] = now
+                    self.entries.pop(username.lower(), None)
+            else:
+                marks["all"] = now
+                self.entries.clear()
+            marks["users"] = users
+            return file_lock.write(marks)
+
+class LdapAuthenticator:
+    """
+    Login checks for one LDAP profile, holding its connection pools
+    """
+
+    def __init__(self, settings, vzid_attribute):
+        """
+        Initialize the authenticator
+
+        Args:
+            settings (dict): LDAP settings from load_settings()
+            vzid_attribute (str): Directory attribute holding the VZID
+        """
+        self.settings = settings
+        self.vzid_attribute = vzid_attribute
+        servers = [settings['server'], settings['intl_server']]
+
+        # Searches run as the service account when one is configured,
+        # otherwise as the user on the connection that verified the password
+        service_dn = self.principal(settings['user']) if settings['user'] else None
+        self.search_pool = LdapConnectionPool(servers, service_dn, settings['password']) if service_dn else None
+        self.bind_pool = LdapConnectionPool(servers)
+        self.user_cache = UserCache()
+        self.attributes = LDAP_USER_ATTRIBUTES + [vzid_attribute]
+
+    def principal(self, username):
+        """
+        Build the bind name of an account
+
+        Args:
+            username (str): sAMAccountName, UPN or DN
+
+        Returns:
+            str: Name usable with simple_bind_s
+        """
+        if '@' in username or '=' in username:
+            return username
+        return f"{username}@{self.settings['user_fqdn']}"
+
+    def search_user(self, conn, username):
+        """
+        Look up a user entry by sAMAccountName, fetching only the attributes
+        the portal uses
+
+        Args:
+            conn: Bound LDAP connection
+            username (str): sAMAccountName
+
+        Returns:
+            dict: Entry attributes, or None if not found
+        """
+        import ldap.filter
+        results = conn.search_s(
+            self.settings['base_dn'],
+            ldap.SCOPE_SUBTREE,
+            f"(sAMAccountName={ldap.filter.escape_filter_chars(username)})",
+            self.attributes
+        )
+        # Skip search references, which carry no DN
+        entries = [attributes for dn, attributes in results if dn]
+        return entries[0] if entries else None
+
+    def lookup_user(self, username):
+        """
+        Get a user entry from the cache or through the service account
+
+        Args:
+            username (str): sAMAccountName
+
+        Returns:
+            dict: Entry attributes, or None if not found
+        """
+        attributes = self.user_cache.get(username)
+        if attributes is None and self.search_pool is not None:
+            attributes = self.search_pool.run(lambda conn: self.search_user(conn, username))
+            if attributes is not None:
+                self.user_cache.put(username, attributes)
+        return attributes
+
+    def authenticate(self, username, password, adom):
+        """
+        Verify a password and the user's membership in the application groups
+
+        Args:
+            username (str): sAMAccountName
+            password (str): User password
+            adom (list): Groups granting access to the application
+
+        Returns:
+            dict: Success status with user details, or error message and
+                whether the failure is fatal to the login script
+        """
+        # AD accepts an empty password as an anonymous bind
+        if not password:
+            return {"success": False, "error": "Invalid credentials", "fatal": True}
+
+        attributes = self.user_cache.get(username)
+
+        def bind_and_search(conn):
+            conn.simple_bind_s(self.principal(username), password)
+            if attributes is None and self.search_pool is None:
+                return self.search_user(conn, username)
+            return None
+
+        try:
+            found = self.bind_pool.run(bind_and_search)
+            if attributes is None:
+                if self.search_pool is not None:
+                    found = self.search_pool.run(lambda conn: self.search_user(conn, username))
+                if found is not None:
+                    self.user_cache.put(username, found)
+                attributes = found
+        except ldap.INVALID_CREDENTIALS:
+            return {"success": False, "error": "Invalid credentials", "fatal": True}
+        except ldap.LDAPError as e:
+            if self.bind_pool.is_server_error(e):
+                return {"success": False, "error": "LDAP issue", "fatal": True}
+            return {"success": False, "error": str(e), "fatal": False}
+
+        if attributes is None:
+            return {"success": False, "error": "User not found", "fatal": False}
+
+        try:
+            adom_groups = member_groups(attributes["memberOf"])
+            matches = set(adom).intersection(adom_groups)
+            if not matches:
+                return {"success": False, "error": "User not authorized", "fatal": False}
+
+            return {
+                "success": True,
+                "employee_num": attributes["employeeNumber"][0].decode("utf-8"),
+                "employee_name": attributes["displayName"][0].decode("utf-8"),
+                "employee_mail": attributes["mail"][0].decode("utf-8"),
+                "group": next(group for group in adom_groups if group in matches),
+                "vzid": attributes[self.vzid_attribute][0].decode("utf-8"),
+                "adom_groups": adom_groups
+            }
+        except KeyError as e:
+            return {"success": False, "error": f"Missing key in LDAP results: {e}", "fatal": False}
+        except IndexError as e:
+            return {"success": False, "error": f"Index error in LDAP results: {e}", "fatal": False}
+
+    def pool_stats(self):
+        """
+        Get pool counters
+
+        Returns:
+            dict: Counters of the bind and search pools
+        """
+        return {
+            "bind": self.bind_pool.stats,
+            "search": self.search_pool.stats if self.search_pool else None,
+            "user_cache": dict(self.user_cache.stats, entries=len(self.user_cache.entries))
+        }
+
+def member_groups(member_of):
+    """
+    Extract group CNs from memberOf values
+
+    Args:
+        member_of (list): Group DNs as bytes
+
+    Returns:
+        list: Unique group names in directory order
+    """
+    groups = dict.fromkeys(
+        dn.decode('utf-8').split('CN=', 1)[1].split(',', 1)[0] for dn in member_of
+    )
+    return list(groups)
+
+# Process-wide state, reused across requests inside the worker
+vault_utility = None
+authenticators = {}
+
+def get_vault_utility():
+    """
+    Get the shared VaultUtility instance
+
+    Returns:
+        VaultUtility: Vault client
+    """
+    global vault_utility
+    if vault_utility is None:
+        from vault.vault_utility import VaultUtility
+        vault_utility = VaultUtility()
+    return vault_utility
+
+def load_settings(vault_prefix):
+    """
+    Read the LDAP configuration from vault in one concurrent batch
+
+    Args:
+        vault_prefix (str): Vault path holding the LDAP keys
+
+    Returns:
+        dict: Service account, servers, base DN and user FQDN
+    """
+    vault = get_vault_utility()
+    keys = {
+        "user": "username",
+        "password": "password",
+        "server": "adom_server",
+        "intl_server": "international_server",
+        "base_dn": "base_dn",
+        "user_fqdn": "user_fqdn"
+    }
+    paths = {name: f"{vault_prefix}/{key}" for name, key in keys.items()}
+    values = vault.get_values_for_keys(list(paths.values()))['values']
+    return {name: values[path] for name, path in paths.items()}
+
+def get_authenticator(profile):
+    """
+    Get the authenticator of a profile, creating its pools on first use
+
+    Args:
+        profile (str): Key of LDAP_PROFILES
+
+    Returns:
+        LdapAuthenticator: Authenticator with its connection pools
+    """
+    if profile not in authenticators:
+        config = LDAP_PROFILES[profile]
+        authenticators[profile] = LdapAuthenticator(
+            load_settings(config['vault_prefix']),
+            config['vzid_attribute']
+        )
+    return authenticators[profile]
+
+def application_groups(application):
+    """
+    Get the groups granting access to an application
+
+    Args:
+        application (str): Application identifier
+
+    Returns:
+        list: Group names
+    """
+    adom_raw = get_vault_utility().get_value_for_key(f"wens/portal/{application}/config/access/adom")
+    return adom_raw.strip('[]"').replace('"', '').split(',')
+
+def format_result(result, profile):
+    """
+    Format an authentication result the way the profile's PHP caller parses it
+
+    Args:
+        result (dict): Result of LdapAuthenticator.authenticate
+        profile (str): Key of LDAP_PROFILES
+
+    Returns:
+        str: Output line
+    """
+    config = LDAP_PROFILES[profile]
+    if not result['success']:
+        return f"{config['error']}{result['error']}"
+    return config['separator'].join([
+        config['ok'], result['employee_num'], result['employee_name'], result['employee_mail'],
+        result['group'], result['vzid'], str(result['adom_groups'])
+    ])
+
+def handle_request(request_data):
+    """
+    Dispatch a decoded request payload to the matching LDAP action
+
+    Args:
+        request_data (dict): Request payload containing 'data' with an 'action_type'
+    """
+    data = request_data['data']
+    action_type = data.get('action_type')
+    profile = data.get('profile', 'ldapcheck')
+
+    if action_type == 'authenticate':
+        try:
+            authenticator = get_authenticator(profile)
+            result = authenticator.authenticate(data.get('username'), data.get('password'),
+                                                application_groups(data.get('app')))
+        except Exception as error:
+            result = {"success": False, "error": str(error), "fatal": False}
+        print(format_result(result, profile))
+        if result.get('fatal'):
+            sys.exit(1)
+    elif action_type == 'user_groups':
+        # Group lookup for RBAC checks, without a password
+        authenticator = get_authenticator(profile)
+        attributes = authenticator.lookup_user(data.get('username'))
+        if attributes is None:
+            print(f"{LDAP_PROFILES[profile]['error']}User not found")
+            sys.exit(1)
+        print(json.dumps(member_groups(attributes.get("memberOf", []))))
+    elif action_type == 'purge_cache':
+        result = UserCache().purge(data.get('usernames'))
+        for authenticator in authenticators.values():
+            authenticator.user_cache.entries.clear()
+        print("OK||LDAP user cache purged" if result['success'] else f"ERROR||{result['error']}")
+    elif action_type == 'pool_stats':
+        print(json.dumps({name: auth.pool_stats() for name, auth in authenticators.items()}))
+    else:
+        print(f"Unknown action type: {action_type}")
+        sys.exit(1)
+
+def run_cli(profile):
+    """
+    Entry point of the login scripts: username, password and application on
+    the command line, answered by the worker when it is running
+
+    Args:
+        profile (str): Key of LDAP_PROFILES
+    """
+    if len(sys.argv) != 4:
+        print(f"Usage: {sys.argv[0]} <username> <password> <app>")
+        sys.exit(1)
+
+    request_data = {
+        "request_type": "ldap",
+        "data": {
+            "action_type": "authenticate",
+            "profile": profile,
+            "username": sys.argv[1],
+            "password": sys.argv[2],
+            "app": sys.argv[3]
+        }
+    }
+
+    from worker.worker_client import request_worker
+    response = request_worker(request_data, timeout=LDAP_WORKER_TIMEOUT)
+    if response is not None:
+        print(response['output'])
+        sys.exit(response['status'])
+
+    # No worker running: authenticate in this process
+    handle_request(request_data)
@@ -0,0 +1,52 @@
+"""
+LDAP Module Configuration
+Sets up Python path and imports required modules for LDAP authentication
+"""
+
+import sys
+import os
+
+# Add parent directory to Python path for module imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import shared configurations
+from modules_config import *
+
+# Connection pool settings
+LDAP_POOL_SIZE = 4
+LDAP_NETWORK_TIMEOUT = 3
+LDAP_OPERATION_TIMEOUT = 5
+LDAP_HEALTH_CHECK_INTERVAL = 30
+LDAP_MAX_IDLE_SECONDS = 600
+LDAP_SERVER_RETRY_SECONDS = 60
+
+# Attributes requested for a user entry, plus the profile's vzid attribute
+LDAP_USER_ATTRIBUTES = ['memberOf', 'employeeNumber', 'displayName', 'mail']
+
+# Cache of user entries so repeat logins skip the directory search;
+# a TTL of 0 disables it
+LDAP_USER_CACHE_TTL = int(os.getenv('PORTAL_LDAP_CACHE_TTL', '300'))
+LDAP_USER_CACHE_MAX_ENTRIES = 10000
+LDAP_USER_CACHE_PURGE_FILE = os.getenv('PORTAL_LDAP_CACHE_PURGE_FILE', '/run/portal/ldap_cache_purge.json')
+
+# Seconds the CLI scripts wait for the worker to answer a login
+LDAP_WORKER_TIMEOUT = 30
+
+# Per-script settings: vault location of the LDAP config, the attribute
+# holding the VZID and the output format expected by the calling PHP
+LDAP_PROFILES = {
+    'ldapcheck': {
+        "vault_prefix": "wens/portal/framework/config/ldap",
+        "vzid_attribute": "extensionAttribute8",
+        "ok": "OK!",
+        "error": "ERROR! ",
+        "separator": "|"
+    },
+    'check_ldap': {
+        "vault_prefix": "config/ldap",
+        "vzid_attribute": "vzid",
+        "ok": "OK",
+        "error": "ERROR||",
+        "separator": "||"
+    }
+}
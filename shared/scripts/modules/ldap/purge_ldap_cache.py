@@ -0,0 +1,34 @@
+#!/opt/python-venv/bin/python3
+"""
+LDAP User Cache Purge
+Invalidates cached directory entries in every process, e.g. after a group
+membership change that must take effect before the cache TTL expires
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from ldap_config import *
+from ldap_auth import UserCache
+
+def main():
+    """
+    Main function to purge the LDAP user cache
+    """
+    parser = argparse.ArgumentParser(description="Purge cached LDAP user entries")
+    parser.add_argument('usernames', nargs='*', help="Users to purge, all users if none given")
+    args = parser.parse_args()
+
+    result = UserCache().purge(args.usernames or None)
+    if result['success']:
+        target = ", ".join(args.usernames) if args.usernames else "all users"
+        print(f"OK||Purged LDAP cache for {target}")
+        sys.exit(0)
+    print(f"ERROR||{result['error']}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+#!/opt/python-venv/bin/python3
+"""
+Log Maintenance
+Streams through the portal's day logs (access, client, python, errors) with
+bounded memory, writes per-day summaries to logs/summary/{date}.json,
+compresses finished days and enforces age and size retention. Also rotates
+the ever-growing run_python_script.php debug.log.
+
+Python scripts of every application log to the shared tree
+(logging_config.LOG_DIR), so its logs directory is maintained on every run
+along with the applications given.
+"""
+
+import re
+import sys
+import math
+import gzip
+import zlib
+import shutil
+import argparse
+from collections import Counter
+from modules_config import *
+from file_operations import atomic_write
+from logging_config import LOG_DIR
+
+# Day logs kept (compressed) for at most this many days
+LOG_RETENTION_DAYS = int(os.getenv('PORTAL_LOG_RETENTION_DAYS', '90'))
+
+# Oldest compressed days are removed once a log directory exceeds this size
+LOG_DIR_MAX_BYTES = int(os.getenv('PORTAL_LOG_DIR_MAX_BYTES', str(1024 * 1024 * 1024)))
+
+# debug.log is rotated and compressed once it grows past this size
+DEBUG_LOG_MAX_BYTES = int(os.getenv('PORTAL_DEBUG_LOG_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# logs directory of the shared tree, holding the Python logs of all applications
+SHARED_LOGS_DIR = os.path.dirname(LOG_DIR)
+
+# Files untouched for this long are considered finished by their writers
+QUIET_SECONDS = 600
+
+# Distinct keys tracked per counter before the rarest are dropped
+SUMMARY_MAX_KEYS = 10000
+
+# Entries kept in top-N summary lists
+SUMMARY_TOP = 20
+
+# Log directories under portal/logs
+LOG_KINDS = ('access', 'client', 'python', 'errors')
+
+# {YYYYmmdd}_{name}.log with optional .N rotation suffix and .gz
+DAY_LOG_PATTERN = re.compile(r'^(\d{8})_(.+?)\.log(\.\d+)?(\.gz)?$')
+
+class BoundedCounter(Counter):
+    """
+    Counter holding at most max_keys keys.
+
+    When full, the rarer half of the keys is dropped, so heavy hitters
+    survive while memory stays bounded on logs with many distinct values.
+    """
+
+    def __init__(self, max_keys=SUMMARY_MAX_KEYS):
+        super().__init__()
+        self.max_keys = max_keys
+        self.dropped = 0
+
+    def add(self, key, count=1):
+        self[key] += count
+        if len(self) > self.max_keys:
+            keep = dict(self.most_common(self.max_keys // 2))
+            self.dropped += len(self) - len(keep)
+            self.clear()
+            self.update(keep)
+
+def open_log(path):
+    """
+    Open a plain or gzip compressed log for line streaming
+
+    Args:
+        path (str): Log file path
+
+    Returns:
+        file: Text file object that replaces undecodable bytes
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+def summarize_access(paths):
+    """
+    Aggregate login attempts from access logs
+
+    Lines are TS||SUCCESS||user||group or TS||error||user, written with
+    '|' instead of '||' by the older verifyuser.php.
+
+    Args:
+        paths (list): Access log files of one day
+
+    Returns:
+        dict: Login counts per user and group, failures per user and reason
+    """
+    logins = BoundedCounter()
+    groups = BoundedCounter()
+    failures = BoundedCounter()
+    reasons = BoundedCounter()
+    success = failed = 0
+
+    for path in paths:
+        with open_log(path) as log_file:
+            for line in log_file:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                separator = '||' if '||' in line else '|'
+                parts = line.split(separator)
+                if len(parts) < 3:
+                    continue
+                if parts[1] == 'SUCCESS':
+                    success += 1
+                    logins.add(parts[2])
+                    if len(parts) > 3:
+                        groups.add(parts[3])
+                else:
+                    failed += 1
+                    failures.add(parts[-1])
+                    reasons.add(separator.join(parts[1:-1]).strip())
+
+    return {
+        "success": success,
+        "failed": failed,
+        "logins_per_user": dict(logins.most_common()),
+        "logins_per_group": dict(groups.most_common()),
+        "failures_per_user": dict(failures.most_common()),
+        "failure_reasons": reasons.most_common(SUMMARY_TOP)
+    }
+
+def summarize_client(paths):
+    """
+    Aggregate client-side errors logged by log_error.php, or PHP errors
+    logged by login.php in the same format
+
+    Lines are Y,m,d,H,i,s||TYPE||ip||user agent||message.
+
+    Args:
+        paths (list): Error log files of one day
+
+    Returns:
+        dict: Error counts per type and the most frequent messages
+    """
+    types = BoundedCounter()
+    messages = BoundedCounter()
+    total = 0
+
+    for path in paths:
+        with open_log(path) as log_file:
+            for line in log_file:
+                parts = line.rstrip('\n').split('||', 4)
+                if len(parts) < 5:
+                    continue
+                total += 1
+                types.add(parts[1])
+                messages.add(parts[4])
+
+    return {
+        "total": total,
+        "per_type": dict(types.most_common()),
+        "top_errors": messages.most_common(SUMMARY_TOP)
+    }
+
+def summarize_python(paths):
+    """
+    Aggregate Python script logs: JSON lines from logging_config, or the
+    older asctime||LEVEL||name||message lines
+
+    Args:
+        paths (list): Python log files of one day
+
+    Returns:
+        dict: Record counts per level and logger, request counts and
+              latency per action
+    """
+    levels = BoundedCounter()
+    loggers = BoundedCounter()
+    actions = {}
+
+    for path in paths:
+        with open_log(path) as log_file:
+            for line in log_file:
+                if line.startswith('{'):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if not isinstance(record, dict):
+                        continue
+                    level, name = str(record.get('level')), str(record.get('logger'))
+                    context = record.get('context')
+                    if not isinstance(context, dict):
+                        context = {}
+                else:
+                    parts = line.split('||', 3)
+                    if len(parts) < 4:
+                        continue
+                    level, name, context = parts[1], parts[2], {}
+
+                levels.add(level)
+                loggers.add(name)
+
+                if 'action' in context and 'total_ms' in context:
+                    # A record with an unusable timing is counted but not timed
+                    try:
+                        elapsed = float(context['total_ms'])
+                    except (TypeError, ValueError):
+                        continue
+                    if not math.isfinite(elapsed):
+                        continue
+                    action = str(context['action'])
+                    stats = actions.get(action)
+                    if stats is None:
+                        if len(actions) >= SUMMARY_MAX_KEYS:
+                            continue
+                        stats = actions[action] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+                    stats["count"] += 1
+                    stats["errors"] += 1 if context.get('status') else 0
+                    stats["total_ms"] += elapsed
+                    stats["max_ms"] = max(stats["max_ms"], elapsed)
+
+    for stats in actions.values():
+        stats["avg_ms"] = round(stats.pop("total_ms") / stats["count"], 3)
+
+    return {
+        "per_level": dict(levels.most_common()),
+        "per_logger": dict(loggers.most_common()),
+        "actions": actions
+    }
+
+SUMMARIZERS = {
+    'access': summarize_access,
+    'client': summarize_client,
+    'python': summarize_python,
+    'errors': summarize_client,
+}
+
+def day_logs(logs_dir):
+    """
+    Group the day logs of every kind by date
+
+    Args:
+        logs_dir (str): portal/logs directory
+
+    Returns:
+        dict: date -> kind -> list of file paths
+    """
+    days = {}
+    for kind in LOG_KINDS:
+        directory = os.path.join(logs_dir, kind)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            match = DAY_LOG_PATTERN.match(name)
+            if match:
+                days.setdefault(match.group(1), {}).setdefault(kind, []).append(os.path.join(directory, name))
+    return days
+
+def summary_file(logs_dir, day):
+    return os.path.join(logs_dir, 'summary', f"{day}.json")
+
+def write_summary(logs_dir, day, files):
+    """
+    Summarize one day across all log kinds
+
+    Args:
+        logs_dir (str): portal/logs directory
+        day (str): Date as YYYYmmdd
+        files (dict): kind -> list of file paths
+
+    Returns:
+        dict: The written summary
+    """
+    summary = {"date": day, "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    for kind in LOG_KINDS:
+        summary[kind] = SUMMARIZERS[kind](files.get(kind, []))
+
+    os.makedirs(os.path.join(logs_dir, 'summary'), exist_ok=True)
+    atomic_write(summary_file(logs_dir, day), json.dumps(summary, indent=4).encode('utf-8'))
+    return summary
+
+def compress_file(path):
+    """
+    Gzip a log file in a streaming fashion and remove the original
+
+    Args:
+        path (str): Plain log file path
+
+    Returns:
+        str: Path of the compressed file
+    """
+    target = f"{path}.gz"
+    temp_path = f"{target}.tmp"
+    with open(path, 'rb') as source, gzip.open(temp_path, 'wb') as compressed:
+        shutil.copyfileobj(source, compressed, 1024 * 1024)
+    shutil.copystat(path, temp_path)
+    os.replace(temp_path, target)
+    os.unlink(path)
+    return target
+
+def is_quiet(path, now):
+    return now - os.path.getmtime(path) >= QUIET_SECONDS
+
+def enforce_retention(logs_dir, retention_days, max_bytes, now):
+    """
+    Delete compressed day logs past retention, then the oldest ones until
+    each log directory fits in max_bytes
+
+    Args:
+        logs_dir (str): portal/logs directory
+        retention_days (int): Maximum age in days
+        max_bytes (int): Maximum size of each log directory
+
+    Returns:
+        int: Number of deleted files
+    """
+    cutoff = (datetime.fromtimestamp(now) - timedelta(days=retention_days)).strftime('%Y%m%d')
+    deleted = 0
+    for kind in LOG_KINDS + ('summary',):
+        directory = os.path.join(logs_dir, kind)
+        if not os.path.isdir(directory):
+            continue
+
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            day = name[:8]
+            if not day.isdigit() or not os.path.isfile(path):
+                continue
+            if day < cutoff:
+                os.unlink(path)
+                deleted += 1
+            else:
+                entries.append((day, path, os.path.getsize(path)))
+
+        # Only finished, compressed days are removed for size
+        total = sum(size for _, _, size in entries)
+        for day, path, size in sorted(entries):
+            if total <= max_bytes:
+                break
+            if path.endswith('.gz'):
+                os.unlink(path)
+                total -= size
+                deleted += 1
+    return deleted
+
+def rotate_debug_log(debug_log, max_bytes, now):
+    """
+    Rotate and compress debug.log once it is larger than max_bytes
+
+    The file is renamed first so run_python_script.php starts a new one on
+    its next append, then the renamed copy is compressed.
+
+    Args:
+        debug_log (str): Path of debug.log
+        max_bytes (int): Size threshold
+
+    Returns:
+        str: Path of the compressed rotation, or None if not rotated
+    """
+    try:
+        if os.path.getsize(debug_log) <= max_bytes:
+            return None
+    except FileNotFoundError:
+        return None
+
+    stamp = datetime.fromtimestamp(now).strftime('%Y%m%d%H%M%S')
+    rotated = f"{debug_log}.{stamp}"
+    os.rename(debug_log, rotated)
+    return compress_file(rotated)
+
+def maintain(logs_dir, retention_days=LOG_RETENTION_DAYS, max_bytes=LOG_DIR_MAX_BYTES,
+             debug_log=None, debug_max_bytes=DEBUG_LOG_MAX_BYTES, dry_run=False):
+    """
+    Summarize, compress and prune the logs of one portal
+
+    Today's summary is refreshed on every run. Earlier days are summarized
+    once their files are quiet, then compressed.
+
+    Args:
+        logs_dir (str): portal/logs directory
+        retention_days (int): Maximum age of day logs in days
+        max_bytes (int): Maximum size of each log directory
+        debug_log (str): Path of run_python_script.php debug.log, if any
+        debug_max_bytes (int): Rotation threshold for debug.log
+        dry_run (bool): Only report what would be done
+
+    Returns:
+        dict: Success status and counts of summarized, compressed and deleted files
+    """
+    now = time.time()
+    today = datetime.fromtimestamp(now).strftime('%Y%m%d')
+    summarized = []
+    failed = []
+    compressed = 0
+    deleted = 0
+    rotated = None
+
+    try:
+        # Prune first so expired days are not summarized again
+        if not dry_run:
+            deleted = enforce_retention(logs_dir, retention_days, max_bytes, now)
+        days = sorted(day_logs(logs_dir).items())
+    except OSError as e:
+        return {"success": False, "error": f"Log maintenance failed: {str(e)}"}
+
+    for day, files in days:
+        plain = [path for paths in files.values() for path in paths if not path.endswith('.gz')]
+        finished = day < today and all(is_quiet(path, now) for path in plain)
+
+        # Summaries of finished, compressed days are already final
+        if not plain and os.path.exists(summary_file(logs_dir, day)):
+            continue
+        if day < today and not finished:
+            continue
+
+        if dry_run:
+            summarized.append(day)
+            compressed += len(plain) if finished else 0
+            continue
+
+        # A damaged file skips its day without stopping the run
+        try:
+            write_summary(logs_dir, day, files)
+            summarized.append(day)
+            if finished:
+                for path in plain:
+                    compress_file(path)
+                    compressed += 1
+        except (OSError, EOFError, ValueError, zlib.error) as e:
+            failed.append(f"{day}: {str(e)}")
+
+    if debug_log and not dry_run:
+        try:
+            rotated = rotate_debug_log(debug_log, debug_max_bytes, now)
+        except OSError as e:
+            failed.append(f"debug.log: {str(e)}")
+
+    result = {
+        "success": not failed,
+        "summarized": summarized,
+        "compressed": compressed,
+        "deleted": deleted,
+        "debug_log_rotated": rotated,
+        "dry_run": dry_run
+    }
+    if failed:
+        result["error"] = f"Log maintenance failed for {'; '.join(failed)}"
+    return result
+
+def main():
+    """
+    Main function to run log maintenance
+    """
+    parser = argparse.ArgumentParser(description="Summarize, compress and prune portal logs")
+    parser.add_argument('apps', nargs='*', help="Applications whose portal/logs are maintained")
+    parser.add_argument('--logs-dir', action='append', default=[], help="Additional portal/logs directory")
+    parser.add_argument('--debug-log', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug.log'),
+                        help="run_python_script.php debug log to rotate")
+    parser.add_argument('--retention-days', type=int, default=LOG_RETENTION_DAYS, help="Maximum age of day logs")
+    parser.add_argument('--max-bytes', type=int, default=LOG_DIR_MAX_BYTES, help="Maximum size per log directory")
+    parser.add_argument('--debug-max-bytes', type=int, default=DEBUG_LOG_MAX_BYTES, help="debug.log rotation size")
+    parser.add_argument('--no-shared', action='store_true',
+                        help=f"Skip the shared Python logs in {SHARED_LOGS_DIR}")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be done")
+    args = parser.parse_args()
+
+    logs_dirs = [f"{WEB_ROOT}/{app}/portal/logs" for app in args.apps] + args.logs_dir
+    if not logs_dirs:
+        parser.error("Give at least one application or --logs-dir")
+    if not args.no_shared and SHARED_LOGS_DIR not in logs_dirs:
+        logs_dirs.append(SHARED_LOGS_DIR)
+
+    ok = True
+    for position, logs_dir in enumerate(logs_dirs):
+        # debug.log is shared, rotate it once
+        result = maintain(logs_dir, args.retention_days, args.max_bytes,
+                          args.debug_log if position == 0 else None, args.debug_max_bytes, args.dry_run)
+        if result['success']:
+            print(f"OK||{logs_dir}||summarized={len(result['summarized'])}||compressed={result['compressed']}"
+                  f"||deleted={result['deleted']}||debug_log_rotated={result['debug_log_rotated'] or '-'}")
+        else:
+            ok = False
+            print(f"ERROR||{logs_dir}||{result['error']}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,259 @@
 """
 Logging Configuration
 Provides consistent logging setup across Python scripts
+
+Loggers only enqueue records; a background writer thread per process drains
+the queue in batches and appends them as JSON lines to the day's log file
+with a single O_APPEND write per batch, so many processes can share a file
+and request latency does not include log I/O. Day files are rotated and
+compressed by log maintenance, not in-process.
 """
 
 import os
+import copy
+import json
+import queue
+import atexit
 import logging
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler
+
+# portal/logs/python under the shared tree
+LOG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'portal', 'logs', 'python'
+)
+
+# Records written per batch at most
+LOG_BATCH_RECORDS = 1024
+
+# Seconds the writer waits after a wakeup so a burst is written as one batch
+LOG_FLUSH_INTERVAL = 0.05
+
+# Permissions of newly created log files
+LOG_FILE_MODE = 0o644
+
+# Configured loggers by script name
+loggers = {}
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Format a record as one JSON object per line.
+
+    Context passed to log_with_context is kept as structured fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "message": record.getMessage()
+        }
+        context = getattr(record, 'context', None)
+        if context:
+            entry["context"] = context
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class BatchWriter:
+    """
+    Background writer draining queued records into per-script day files.
+
+    After a wakeup the writer lets LOG_FLUSH_INTERVAL pass, then takes every
+    queued record (up to LOG_BATCH_RECORDS) and appends each file's lines
+    with one write, instead of competing with the logging thread for the
+    GIL on every record. Files are opened with O_APPEND, which keeps
+    concurrent writers from overwriting each other, and reopened when the
+    date changes.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.formatter = JsonLinesFormatter()
+        self.files = {}
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+
+    def start(self):
+        """
+        Start the writer thread if it is not running
+        """
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='log-writer', daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        """
+        Write everything queued so far and stop the writer thread
+        """
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.stopping.set()
+            self.queue.put(None)
+            thread.join()
+            self.stopping.clear()
+
+    def after_fork(self):
+        """
+        Reset the writer in a forked child: the parent's thread does not
+        exist there, and its queued records belong to the parent.
+        """
+        running = self.thread is not None
+        self.queue = queue.SimpleQueue()
+        self.files = {}
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        if running:
+            self.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            if batch[0] is not None:
+                self.stopping.wait(LOG_FLUSH_INTERVAL)
+            while len(batch) < LOG_BATCH_RECORDS:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            self.write([record for record in batch if record is not None])
+            if stop:
+                self.close()
+                return
+
+    def write(self, records):
+        """
+        Append a batch of records, one write per destination file
+
+        Args:
+            records (list): Queued logging.LogRecord objects
+        """
+        lines = {}
+        for record in records:
+            try:
+                lines.setdefault(record.name, []).append(self.formatter.format(record))
+            except Exception:
+                logging.getLogger(record.name).handleError(record)
+
+        day = datetime.now().strftime('%Y%m%d')
+        for script_name, script_lines in lines.items():
+            try:
+                os.write(self.file_for(script_name, day), ('\n'.join(script_lines) + '\n').encode('utf-8'))
+            except OSError as e:
+                logging.error(f"Failed to write log for {script_name}: {str(e)}")
+
+    def file_for(self, script_name, day):
+        """
+        Get the append descriptor of a script's log file for a day
+
+        Args:
+            script_name (str): Logger name
+            day (str): Date as YYYYmmdd
+
+        Returns:
+            int: File descriptor opened with O_APPEND
+        """
+        current = self.files.get(script_name)
+        if current is not None and current[0] == day:
+            return current[1]
+        if current is not None:
+            os.close(current[1])
+
+        log_file = os.path.join(LOG_DIR, f"{day}_{script_name}.log")
+        fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, LOG_FILE_MODE)
+        self.files[script_name] = (day, fd)
+        return fd
+
+    def close(self):
+        for _, fd in self.files.values():
+            os.close(fd)
+        self.files = {}
+
+# Process-wide writer shared by every configured logger
+log_writer = BatchWriter()
+atexit.register(log_writer.stop)
+os.register_at_fork(after_in_child=log_writer.after_fork)
+
+# Renders tracebacks on the logging thread, while the frames still exist
+traceback_formatter = logging.Formatter()
+
+class WriterQueueHandler(QueueHandler):
+    """
+    QueueHandler that always targets the current process's writer queue
+    """
+
+    def __init__(self):
+        super().__init__(log_writer.queue)
+
+    def prepare(self, record):
+        # Merge the arguments into the message and render the traceback now,
+        # on a copy as QueueHandler.prepare does, so an argument changed after
+        # the call is logged as it was; the JSON line is still built on the
+        # writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        log_writer.queue.put_nowait(record)
 
 def setup_logger(script_name, log_level=logging.INFO):
     """
     Configure logging for Python scripts
-    
+
+    Safe to call repeatedly: a script name is configured once per process
+    and later calls return the same logger.
+
     Args:
         script_name (str): Name of the script (used for log file naming)
         log_level (int): Logging level (default: INFO)
-        
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    
+    if script_name in loggers:
+        return loggers[script_name]
+
     # Create logs directory if it doesn't exist
-    script_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    log_dir = os.path.join(script_dir, 'portal', 'logs', 'python')
-    
+    log_dir = LOG_DIR
+
     try:
         if not os.path.exists(log_dir):
-            os.makedirs(log_dir, mode=0o755)
-            # Log directory creation to system logger for debugging
-            logging.info(f"Created log directory: {log_dir}")
+            os.makedirs(log_dir, mode=0o755, exist_ok=True)
     except Exception as e:
         # If we can't create the directory, log to system logger
         logging.error(f"Failed to create log directory {log_dir}: {str(e)}")
         return None
 
-    # Set up log file path
-    log_file = os.path.join(log_dir, f"{datetime.now().strftime('%Y%m%d')}_{script_name}.log")
-    
     try:
         # Create logger
         logger = logging.getLogger(script_name)
         logger.setLevel(log_level)
-        
-        # Create handlers
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=10485760,  # 10MB
-            backupCount=5,
-            mode='a'
-        )
-        
-        # Create formatters and add it to handlers
-        log_format = '%(asctime)s||%(levelname)s||%(name)s||%(message)s'
-        file_formatter = logging.Formatter(log_format)
-        file_handler.setFormatter(file_formatter)
-        
-        # Add handlers to the logger
-        logger.addHandler(file_handler)
-        
+        logger.propagate = False
+
+        # Hand records to the background writer
+        logger.addHandler(WriterQueueHandler())
+        log_writer.start()
+
+        loggers[script_name] = logger
         return logger
-        
+
     except Exception as e:
         # Log to system logger if setup fails
         logging.error(f"Failed to setup logger for {script_name}: {str(e)}")
@@ -68,7 +262,9 @@ def setup_logger(script_name, log_level=logging.INFO):
 def log_with_context(logger, level, message, **context):
     """
     Log a message with additional context
-    
+
+    Context is kept as structured fields of the JSON line.
+
     Args:
         logger (logging.Logger): Logger instance
         level (str): Log level ('debug', 'info', 'warning', 'error', 'critical')
@@ -77,11 +273,7 @@ def log_with_context(logger, level, message, **context):
     """
     if not logger:
         return
-        
-    # Format context information
-    context_str = ' '.join(f"{k}={v}" for k, v in context.items())
-    full_message = f"{message} {context_str}".strip()
-    
+
     # Log at appropriate level
     log_func = getattr(logger, level.lower(), logger.info)
-    log_func(full_message)
+    log_func(message, extra={"context": context})
@@ -8,14 +8,17 @@ import sys
 import os
 import warnings
 
-# LDAP authentication
-import ldap
-
 # Add parent directory to Python path for module imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
 # Import all shared configurations
 from shared_scripts_config import *
 
+# LDAP authentication, loaded on first use
+ldap = lazy_import('ldap')
+
+# Root of the per-application portal trees
+WEB_ROOT = os.getenv('PORTAL_WEB_ROOT', '/var/www/html')
+
 # Suppress warnings if needed
 # warnings.filterwarnings('ignore')
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+RBAC Navigation Index
+Compiles menu-bar.json into menu-index.json: the visible menu tree of each
+role and the allowed roles of each page path. The portal includes read the
+index once per request and do keyed lookups instead of walking every
+category, url and role.
+"""
+
+import os
+from urllib.parse import urlsplit
+from rbac_config import *
+from file_operations import FileLock
+
+def nav_files(app):
+    """
+    Get the navigation file and its index file of an application
+
+    Args:
+        app (str): Application identifier
+
+    Returns:
+        tuple: (menu-bar.json path, menu-index.json path)
+    """
+    config_dir = f"{WEB_ROOT}/{app}/portal/config"
+    return f"{config_dir}/menu-bar.json", f"{config_dir}/{NAV_INDEX_NAME}"
+
+def source_signature(stat_result):
+    """
+    Build the menu-bar.json signature the PHP side compares before trusting the index
+
+    Uses what PHP can get from a single cached stat: fileinode, filemtime and filesize.
+
+    Args:
+        stat_result (os.stat_result): Result of os.stat on menu-bar.json
+
+    Returns:
+        list: [inode, mtime in whole seconds, size]
+    """
+    return [stat_result.st_ino, int(stat_result.st_mtime), stat_result.st_size]
+
+def compile_nav_index(nav_data, source=None):
+    """
+    Compile navigation data into the per-role menu and page access index
+
+    Menu entries keep the key order init.php used (ksort), and links keep
+    their menu-bar.json order. "positions" records that order so menus of
+    several roles can be merged without losing it.
+
+    Args:
+        nav_data (dict): Parsed menu-bar.json content
+        source (list): Signature of the compiled menu-bar.json
+
+    Returns:
+        dict: Index with "menus" (role -> key -> entry), "pages" (path -> roles)
+              and "positions" (key -> title -> position)
+    """
+    menus = {}
+    pages = {}
+    positions = {}
+
+    for key in sorted(nav_data):
+        entry = nav_data[key]
+        if not isinstance(entry, dict) or not isinstance(entry.get('urls'), dict):
+            continue
+
+        positions[key] = {}
+        for position, (title, info) in enumerate(entry['urls'].items()):
+            positions[key][title] = position
+            roles = info.get('roles', [])
+
+            path = urlsplit(info.get('url', '')).path
+            allowed = pages.setdefault(path, [])
+            allowed.extend(role for role in roles if role not in allowed)
+
+            for role in roles:
+                role_entry = menus.setdefault(role, {}).get(key)
+                if role_entry is None:
+                    role_entry = menus[role][key] = {
+                        "type": entry.get('type'),
+                        "img": entry.get('img', ''),
+                        "links": {}
+                    }
+                role_entry["links"][title] = info.get('url', '')
+
+    return {
+        "format": NAV_INDEX_FORMAT,
+        "source": source,
+        "menus": menus,
+        "pages": pages,
+        "positions": positions
+    }
+
+def update_nav_index(app, force=False):
+    """
+    Recompile menu-index.json if it does not match the current menu-bar.json
+
+    Args:
+        app (str): Application identifier
+        force (bool): Recompile even if the index looks current
+
+    Returns:
+        bool: True if the index is current
+    """
+    nav_file, index_file = nav_files(app)
+
+    # Hold the navigation lock so the signature matches the data compiled
+    with FileLock(nav_file, mode=FileLock.READ) as nav_lock:
+        result = nav_lock.read()
+        if not result['success']:
+            print(result['error'])
+            return False
+        source = source_signature(os.stat(nav_file))
+
+        with FileLock(index_file, compact=True, backup_generations=0) as index_lock:
+            if not force:
+                current = index_lock.read(use_cache=False)
+                if (current['success'] and current['data'].get('format') == NAV_INDEX_FORMAT
+                        and current['data'].get('source') == source):
+                    return True
+
+            write_result = index_lock.write(compile_nav_index(result['data'], source))
+            if write_result['success']:
+                print("Updated navigation index")
+                return True
+            else:
+                print("FAILED to update navigation index")
+                return False
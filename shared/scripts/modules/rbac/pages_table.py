@@ -0,0 +1,121 @@
+"""
+RBAC Pages Table
+Versioned cache of the rendered admin pages table. rbac.json keeps the
+structured page records; rbac_pages.json holds the DataTables rows rendered
+from them, re-rendering only pages whose revision changed.
+"""
+
+from html import escape
+from rbac_config import *
+
+def render_page_row(page, page_data):
+    """
+    Render the DataTables row of a page
+
+    Args:
+        page (str): Page filename
+        page_data (dict): Page entry from rbac.json
+
+    Returns:
+        list: Row cells matching PAGES_TABLE_HEADERS
+    """
+    page_name = page.rsplit('.php', 1)[0]
+    link_type = "Category" if "category" in page_data['link_type'] else "Single"
+    # Arguments are JS string literals first, then the attribute is HTML-escaped
+    onclick = f"manage_page({json.dumps(page_name)}, {json.dumps(page)}, \"edit\")"
+    action = (f"<button type='button' class='btn btn-primary btn-sm' onclick=\"{escape(onclick)}\">"
+              f"<i class='fas fa-edit'></i></button>")
+    return [
+        escape(page_data['link_name']),
+        escape(page),
+        link_type,
+        escape(", ".join(page_data['roles'])),
+        action
+    ]
+
+def init_pages_table(table_data):
+    """
+    Ensure a pages table has its headers, rows and row index
+
+    Args:
+        table_data (dict): Parsed rbac_pages.json content, updated in place
+
+    Returns:
+        dict: The same table
+    """
+    if "row_index" not in table_data or table_data.get("format") != PAGES_TABLE_FORMAT:
+        # Unversioned table written by hand, or rows rendered by an older release
+        table_data["pages_table_data"] = []
+        table_data["row_index"] = {}
+        table_data["version"] = None
+        table_data["format"] = PAGES_TABLE_FORMAT
+    table_data["headers"] = list(PAGES_TABLE_HEADERS)
+    table_data["pages_table_headers"] = list(PAGES_TABLE_HEADERS)
+    return table_data
+
+def touch_page(rbac_data, page, old_page_data=None):
+    """
+    Bump the revision of a changed page and the version of the page set
+
+    Args:
+        rbac_data (dict): Parsed rbac.json content, updated in place
+        page (str): Page filename
+        old_page_data (dict): Page entry before the change, if any
+    """
+    rbac_data['pages'][page]['revision'] = (old_page_data or {}).get('revision', 0) + 1
+    rbac_data['pages_version'] = rbac_data.get('pages_version', 0) + 1
+
+def refresh_pages_table(table_data, rbac_data, page=None):
+    """
+    Bring the rendered table in line with the page records
+
+    When the table is exactly one version behind and the changed page is
+    known, only that row is rendered. Otherwise every row is checked against
+    its page revision and stale rows are re-rendered.
+
+    Args:
+        table_data (dict): Parsed rbac_pages.json content, updated in place
+        rbac_data (dict): Parsed rbac.json content
+        page (str): Filename of the changed page, if known
+
+    Returns:
+        bool: True if table_data changed
+    """
+    init_pages_table(table_data)
+    rows = table_data["pages_table_data"]
+    row_index = table_data["row_index"]
+    version = rbac_data.get('pages_version', 0)
+
+    if table_data["version"] == version:
+        return False
+
+    if page is not None and table_data["version"] == version - 1:
+        pages = [page]
+    else:
+        pages = rbac_data['pages']
+
+        # Drop rows of pages that no longer exist
+        if any(name not in pages for name in row_index):
+            kept = [name for name in row_index if name in pages]
+            table_data["pages_table_data"] = rows = [rows[row_index[name][0]] for name in kept]
+            table_data["row_index"] = row_index = {
+                name: [position, row_index[name][1]] for position, name in enumerate(kept)
+            }
+
+    for name in pages:
+        page_data = rbac_data['pages'][name]
+        revision = page_data.get('revision', 0)
+        cached = row_index.get(name)
+        if cached is not None and cached[1] == revision:
+            continue
+
+        row = render_page_row(name, page_data)
+        if cached is None:
+            row_index[name] = [len(rows), revision]
+            rows.append(row)
+        else:
+            rows[cached[0]] = row
+            cached[1] = revision
+
+    table_data["version"] = version
+    return True
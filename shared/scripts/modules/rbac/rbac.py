@@ -10,7 +10,13 @@ import os
 import json
 from datetime import datetime
 from rbac_config import *
-from file_operations import FileLock
+from file_operations import FileLock, FileTransaction
+from data_index import append_unique
+from pages_table import refresh_pages_table, touch_page
+from nav_index import update_nav_index
+from logging_config import setup_logger
+from instrumentation import RequestTrace
+from table_query import query_table
 
 def compare_dicts(old_dict, new_dict):
     """
@@ -39,106 +45,196 @@ def compare_dicts(old_dict, new_dict):
             
     return diff
 
-def update_menu_nav_data(app):
+def nav_location(page_data):
+    """
+    Get where a page appears in the navigation menu
+
+    Args:
+        page_data (dict): Page entry from rbac.json
+
+    Returns:
+        tuple: (top level nav key, link name inside its urls)
+    """
+    link_name = page_data['link_name']
+    if "category" in page_data['link_type']:
+        return page_data['category'], link_name
+    return link_name, link_name
+
+def apply_page_to_nav(nav_data, page, page_data, categories):
+    """
+    Write the navigation entry of a single page
+
+    Args:
+        nav_data (dict): Parsed menu-bar.json content, updated in place
+        page (str): Page filename
+        page_data (dict): Page entry from rbac.json
+        categories (dict): Category definitions from rbac.json
+
+    Returns:
+        bool: True if nav_data changed
+    """
+    nav_key, link_name = nav_location(page_data)
+    roles = page_data['roles']
+    before = nav_data.get(nav_key)
+
+    # Handle category-based pages
+    if "category" in page_data['link_type']:
+        img = categories[nav_key]['icon']
+        entry = dict(before) if before else {"type": "category", "urls": {}}
+        entry["urls"] = dict(entry["urls"])
+        entry["urls"][link_name] = {
+            "url": page,
+            "roles": roles
+        }
+        entry["img"] = img
+
+    # Handle single pages
+    else:
+        entry = {
+            "type": "single",
+            "urls": {
+                link_name: {
+                    "url": page_data['url'],
+                    "roles": roles
+                }
+            },
+            "img": page_data.get('img', (before or {}).get('img'))
+        }
+
+    if entry == before:
+        return False
+    nav_data[nav_key] = entry
+    return True
+
+def remove_page_from_nav(nav_data, page_data):
+    """
+    Remove the navigation entry a page had before it was moved or renamed
+
+    Args:
+        nav_data (dict): Parsed menu-bar.json content, updated in place
+        page_data (dict): Previous page entry from rbac.json
+
+    Returns:
+        bool: True if nav_data changed
+    """
+    nav_key, link_name = nav_location(page_data)
+    if nav_key not in nav_data:
+        return False
+
+    if "category" in page_data['link_type']:
+        urls = nav_data[nav_key].get("urls", {})
+        if link_name not in urls:
+            return False
+        del urls[link_name]
+        if not urls:
+            del nav_data[nav_key]
+    elif nav_data[nav_key].get("type") == "single":
+        del nav_data[nav_key]
+    else:
+        return False
+    return True
+
+def apply_nav_changes(nav_data, rbac_data, page=None, old_page_data=None):
+    """
+    Bring navigation data in line with RBAC data
+
+    Without a page every page in rbac.json is applied (full rebuild). With a
+    page only its entry is applied, using old_page_data to drop the entry
+    it had before a rename or move.
+
+    Args:
+        nav_data (dict): Parsed menu-bar.json content, updated in place
+        rbac_data (dict): Parsed rbac.json content
+        page (str): Filename of the changed page, or None to rebuild
+        old_page_data (dict): Page entry before the change, if any
+
+    Returns:
+        bool: True if nav_data changed
+    """
+    changed = False
+    if page is None:
+        # Process each page in RBAC data
+        for page_name, page_data in rbac_data['pages'].items():
+            changed |= apply_page_to_nav(nav_data, page_name, page_data, rbac_data['categories'])
+    else:
+        page_data = rbac_data['pages'][page]
+        if old_page_data and nav_location(old_page_data) != nav_location(page_data):
+            changed |= remove_page_from_nav(nav_data, old_page_data)
+        changed |= apply_page_to_nav(nav_data, page, page_data, rbac_data['categories'])
+    return changed
+
+def update_menu_nav_data(app, page=None, old_page_data=None):
     """
     Update navigation menu data based on RBAC configuration
-    
+
     Args:
         app (str): Application identifier
+        page (str): Filename of the changed page, or None to rebuild
+        old_page_data (dict): Page entry before the change, if any
     """
-    nav_file = f"/var/www/html/{app}/portal/config/menu-bar.json"
-    rbac_file = f"/var/www/html/{app}/portal/config/rbac.json"
+    nav_file = f"{WEB_ROOT}/{app}/portal/config/menu-bar.json"
+    rbac_file = f"{WEB_ROOT}/{app}/portal/config/rbac.json"
 
-    # Read navigation data
-    with FileLock(nav_file) as file_lock:
+    # Read RBAC data under a shared lock
+    with FileLock(rbac_file, mode=FileLock.READ) as file_lock:
         result = file_lock.read()
         if result['success']:
-            nav_data = result['data']
+            rbac_data = result['data']
         else:
             print(result['error'])
             return False
 
-    # Read RBAC data
-    with FileLock(rbac_file) as file_lock:
-        result = file_lock.read()
+    with FileLock(nav_file) as file_lock:
+        # Read navigation data
+        result = file_lock.read(use_cache=False)
         if result['success']:
-            rbac_data = result['data']
+            nav_data = result['data']
         else:
             print(result['error'])
             return False
 
-    # Process each page in RBAC data
-    for page in rbac_data['pages']:
-        page_data = rbac_data['pages'][page]
-        link_name = page_data['link_name']
-        link_type = page_data['link_type']
-        category_found = False
-
-        # Handle category-based pages
-        if "category" in link_type:
-            category = page_data['category']
-            img = rbac_data['categories'][category]['icon']
-            category_found = True
+        if not apply_nav_changes(nav_data, rbac_data, page, old_page_data):
+            print("Navigation data unchanged")
         else:
-            img = page_data['img']
-        
-        url = page_data['url']
-        roles = page_data['roles']
-
-        # Update single pages
-        if not category_found:
-            single_page_updated = False
-            for nav_item in nav_data:
-                if nav_item == link_name:
-                    nav_data[link_name] = {
-                        "type": "single",
-                        "urls": {
-                            link_name: {
-                                "url": url,
-                                "roles": roles
-                            }
-                        },
-                        "img": img
-                    }
-                    single_page_updated = True
-
-            if not single_page_updated:
-                nav_data[link_name] = {
-                    "type": "single",
-                    "urls": {
-                        link_name: {
-                            "url": url,
-                            "roles": roles
-                        }
-                    },
-                    "img": img
-                }
+            # Save updated navigation data under the lock already held
+            write_result = file_lock.write(nav_data)
+            if write_result['success']:
+                print("Updated navigation data")
+            else:
+                print("FAILED to update navigation data")
+                return False
 
-        # Update category pages
-        else:
-            category_page_data = {
-                "url": page,
-                "roles": roles
-            }
-
-            if category not in nav_data:
-                nav_data[category] = {
-                    "type": "category",
-                    "urls": {},
-                    "img": img
-                }
+    # Recompile the per-role index from the committed menu
+    return update_nav_index(app)
 
-            nav_data[category]["urls"][link_name] = category_page_data
-            nav_data[category]["img"] = img
+def update_pages_table(app):
+    """
+    Re-render the admin pages table from rbac.json
 
-    # Save updated navigation data
-    with FileLock(nav_file) as locked_file:
-        write_result = locked_file.write(nav_data)
+    Args:
+        app (str): Application identifier
+    """
+    rbac_file = f"{WEB_ROOT}/{app}/portal/config/rbac.json"
+    pages_file = f"{WEB_ROOT}/{app}/portal/config/{PAGES_TABLE_NAME}"
+
+    # Read RBAC data under a shared lock
+    with FileLock(rbac_file, mode=FileLock.READ) as file_lock:
+        result = file_lock.read()
+        if result['success']:
+            rbac_data = result['data']
+        else:
+            print(result['error'])
+            return False
+
+    table_data = {}
+    refresh_pages_table(table_data, rbac_data)
+    with FileLock(pages_file) as file_lock:
+        write_result = file_lock.write(table_data)
         if write_result['success']:
-            print("Updated navigation data")
+            print("Updated pages table")
             return True
         else:
-            print("FAILED to update navigation data")
+            print("FAILED to update pages table")
             return False
 
 def save_page_rbac(data):
@@ -160,91 +256,130 @@ def save_page_rbac(data):
     app = data.get('app')
     image_icon = data.get('image')
 
-    rbac_file = f"/var/www/html/{app}/portal/config/rbac.json"
+    rbac_file = f"{WEB_ROOT}/{app}/portal/config/rbac.json"
+    nav_file = f"{WEB_ROOT}/{app}/portal/config/menu-bar.json"
+    pages_file = f"{WEB_ROOT}/{app}/portal/config/{PAGES_TABLE_NAME}"
 
-    # Read current RBAC data
-    with FileLock(rbac_file) as file_lock:
-        result = file_lock.read()
+    # Lock rbac.json and the files derived from it for the whole update
+    with FileTransaction([rbac_file, nav_file, pages_file]) as transaction:
+        result = transaction.read(rbac_file)
         if result['success']:
             rbac_data = result['data']
         else:
             print(result['error'])
             return False
 
-    # Prepare page data update
-    update_page_data = {
-        "link_name": link_name,
-        "link_type": link_type,
-        "url": filename,
-        "roles": new_adom_groups
-    }
-
-    # Handle category-specific data
-    if "category" in link_type:
-        category = data.get('category')
-        update_page_data['category'] = category
-
-        # Update category icon
-        if category in rbac_data['categories']:
-            if rbac_data['categories'][category]['icon'] != image_icon:
-                rbac_data['categories'][category]['icon'] = image_icon
+        # Prepare page data update
+        update_page_data = {
+            "link_name": link_name,
+            "link_type": link_type,
+            "url": filename,
+            "roles": new_adom_groups
+        }
+
+        # Handle category-specific data
+        if "category" in link_type:
+            category = data.get('category')
+            update_page_data['category'] = category
+
+            # Update category icon
+            if category in rbac_data['categories']:
+                if rbac_data['categories'][category]['icon'] != image_icon:
+                    rbac_data['categories'][category]['icon'] = image_icon
+            else:
+                rbac_data['categories'][category] = {
+                    "icon": image_icon,
+                    "urls": {},
+                    "name": category
+                }
+
+            if filename not in rbac_data['categories'][category]['urls']:
+                rbac_data['categories'][category]['urls'][filename] = {}
+
+        # Single pages carry their own menu icon
         else:
-            rbac_data['categories'][category] = {
-                "icon": image_icon,
-                "urls": {},
-                "name": category
-            }
-
-        if filename not in rbac_data['categories'][category]['urls']:
-            rbac_data['categories'][category]['urls'][filename] = {}
-
-    # Update page data
-    rbac_data['pages'][filename] = update_page_data
-
-    # Update group lists
-    for group in new_adom_groups:
-        if group not in rbac_data["adom_groups"]:
-            rbac_data["adom_groups"].append(group)
-            rbac_data["roles"].append(group)
-
-    # Build page row for display
-    page_link = (f"{link_name}<br>"
-                f'<button type="submit" name="btn_edit" id="btn_edit" '
-                f'class="btn btn-sm btn-success" '
-                f'onclick="manage_page(\'{link_name}\', \'{filename}\');">Edit</button>')
-    
-    role_badges = " ".join([f'<span class="badge badge-info">{role}</span>' 
-                           for role in new_adom_groups])
-    
-    page_row = [page_link, filename, role_badges]
-
-    # Update page table data
-    row_match = False
-    for row in rbac_data["pages_table_data"]:
-        page_name = row[0].split("<br>")[0]
-        if page_name == link_name and filename in row[0]:
-            rbac_data["pages_table_data"].remove(row)
-            rbac_data["pages_table_data"].append(page_row)
-            row_match = True
-
-    if not row_match:
-        rbac_data["pages_table_data"].append(page_row)
-
-    # Save updated RBAC data
-    with FileLock(rbac_file) as locked_file:
-        write_result = locked_file.write(rbac_data)
+            update_page_data['img'] = image_icon
+
+        # Update page data, keeping the previous entry for the menu delta
+        old_page_data = rbac_data['pages'].get(filename)
+        rbac_data['pages'][filename] = update_page_data
+        touch_page(rbac_data, filename, old_page_data)
+
+        # Update group lists
+        added_groups = append_unique(rbac_data["adom_groups"], new_adom_groups)
+        rbac_data["roles"].extend(added_groups)
+
+        # Rendered rows now live in the pages table cache
+        rbac_data.pop("pages_table_data", None)
+
+        transaction.stage(rbac_file, rbac_data)
+
+        # Apply the page delta to the navigation menu
+        result = transaction.read(nav_file)
+        if not result['success']:
+            print(result['error'])
+            return False
+        nav_data = result['data']
+        nav_changed = apply_nav_changes(nav_data, rbac_data, filename, old_page_data)
+        if nav_changed:
+            transaction.stage(nav_file, nav_data)
+
+        # Render the changed row of the admin pages table
+        result = transaction.read(pages_file)
+        if not result['success']:
+            print(result['error'])
+            return False
+        table_data = result['data']
+        if refresh_pages_table(table_data, rbac_data, filename):
+            transaction.stage(pages_file, table_data)
+
+        # Save RBAC and navigation data together
+        write_result = transaction.commit()
         if write_result['success']:
-            update_menu_nav_data(app)
-            return True
+            print("Updated navigation data" if nav_changed else "Navigation data unchanged")
         else:
             print("FAILED to update RBAC data")
             return False
 
+    # Recompile the per-role index once the new menu is in place
+    return update_nav_index(app)
+
+def handle_request(request_data):
+    """
+    Dispatch a decoded request payload to the matching RBAC action
+
+    Args:
+        request_data (dict): Request payload containing 'data' with an 'action_type'
+    """
+    data = request_data['data']
+    action_type = data.get('action_type')
+
+    if action_type == 'save_page_rbac':
+        save_page_rbac(data)
+    elif action_type == 'rebuild_menu_nav':
+        update_menu_nav_data(data.get('app'))
+        update_pages_table(data.get('app'))
+    elif action_type == 'query_table':
+        # DataTables server-side request for the admin pages table
+        pages_file = f"{WEB_ROOT}/{data.get('app')}/portal/config/{PAGES_TABLE_NAME}"
+        print(json.dumps(query_table(pages_file, "pages_table_data", data.get('params') or {})))
+    else:
+        print(f"Unknown action type: {action_type}")
+        sys.exit(1)
+
 def main():
     """
     Main function to handle RBAC operations
     """
     try:
+        logger = setup_logger('rbac')
+
+        # Full rebuild of the menu and pages table: rbac.py --rebuild app [app ...]
+        if sys.argv[1] == '--rebuild':
+            with RequestTrace("rbac.rebuild", logger, IMPORT_STARTED):
+                ok = all([update_menu_nav_data(app) and update_pages_table(app) for app in sys.argv[2:]])
+            sys.exit(0 if ok and len(sys.argv) > 2 else 1)
+
         payload = sys.argv[1]
         try:
             request_data = json.loads(payload)
@@ -252,16 +387,9 @@ def main():
             print(f"Error decoding JSON: {e}")
             sys.exit(1)
 
-        data = request_data['data']
-        action_type = data.get('action_type')
-
-        if action_type == 'save_page_rbac':
-            save_page_rbac(data)
-        elif action_type == 'delete':
-            delete_document(data, args)
-        else:
-            print(f"Unknown action type: {action_type}")
-            sys.exit(1)
+        action = f"rbac.{request_data.get('data', {}).get('action_type')}"
+        with RequestTrace(action, logger, IMPORT_STARTED):
+            handle_request(request_data)
 
     except Exception as e:
         print(f"Error in main: {e}")
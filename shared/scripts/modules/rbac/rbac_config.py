@@ -10,4 +10,12 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import shared configurations
-from modules_config import *
\ No newline at end of file
+from modules_config import *
+# Admin pages table served to DataTables from config/rbac_pages.json
+PAGES_TABLE_NAME = 'rbac_pages.json'
+PAGES_TABLE_HEADERS = ["Name", "File", "Type", "Roles", "Actions"]
+# Bumped when render_page_row changes, so cached rows are rendered again
+PAGES_TABLE_FORMAT = 2
+# Precompiled per-role menu and page access index read by includes/init.php
+NAV_INDEX_NAME = 'menu-index.json'
+NAV_INDEX_FORMAT = 1
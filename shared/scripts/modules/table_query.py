@@ -0,0 +1,276 @@
+"""
+Table Query
+DataTables server-side processing over the JSON table stores (docs.json,
+rbac_pages.json): global and per-column search, column sort and paging,
+answered from pre-sorted column indexes so a page request only materializes
+the visible slice.
+"""
+
+import re
+from html import unescape
+from modules_config import *
+from file_operations import FileLock, JsonCache, atomic_write
+
+# Upper bound on rows returned per request
+MAX_PAGE_LENGTH = 1000
+
+# Process-wide cache of per-table indexes, keyed by path and file signature
+table_index_cache = JsonCache(max_entries=16)
+
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+def cell_text(cell):
+    """
+    Get the searchable and sortable text of a table cell
+
+    Args:
+        cell: Cell value: text (possibly HTML), number or list of values
+
+    Returns:
+        str: Lowercased plain text
+    """
+    if isinstance(cell, list):
+        return ", ".join(cell_text(item) for item in cell)
+    if cell is None:
+        return ""
+    text = str(cell)
+    if '<' in text:
+        text = TAG_PATTERN.sub('', text)
+    if '&' in text:
+        text = unescape(text)
+    return text.strip().lower()
+
+def row_cell(row, column):
+    return row[column] if column < len(row) else None
+
+def sort_key(cell):
+    """
+    Build a sort key that orders numbers numerically before text
+
+    Args:
+        cell: Cell value
+
+    Returns:
+        tuple: Comparable key
+    """
+    if isinstance(cell, (int, float)) and not isinstance(cell, bool):
+        return (0, cell, "")
+    return (1, 0, cell_text(cell))
+
+class TableIndex:
+    """
+    Lazily built indexes over the rows of one version of a table.
+
+    Column orders (row positions sorted ascending by the column) are built
+    on first use and persisted in a .{name}.sort sidecar tagged with the
+    table's file signature, so short-lived CLI processes reuse them too.
+    """
+
+    def __init__(self, path, signature, rows):
+        """
+        Attach to a parsed table
+
+        Args:
+            path (str): Table file path
+            signature (tuple): File signature of the parsed version
+            rows (list): Table rows
+        """
+        self.path = path
+        self.signature = list(signature)
+        self.rows = rows
+        self.orders = None
+        self.texts = None
+        self.row_search_texts = None
+
+    @property
+    def sidecar_path(self):
+        directory, name = os.path.split(self.path)
+        return os.path.join(directory, f".{name}.sort")
+
+    def _load_orders(self):
+        self.orders = {}
+        try:
+            with open(self.sidecar_path, 'rb') as sidecar:
+                stored = json.load(sidecar)
+        except (OSError, ValueError):
+            return
+        if stored.get('signature') == self.signature:
+            self.orders = {int(column): order for column, order in stored.get('orders', {}).items()}
+
+    def order(self, column):
+        """
+        Get the row positions sorted ascending by a column
+
+        Args:
+            column (int): Column index
+
+        Returns:
+            list: Row positions
+        """
+        if self.orders is None:
+            self._load_orders()
+        order = self.orders.get(column)
+        if order is None or len(order) != len(self.rows):
+            rows = self.rows
+            order = sorted(range(len(rows)), key=lambda position: sort_key(row_cell(rows[position], column)))
+            self.orders[column] = order
+            self._save_orders()
+        return order
+
+    def _save_orders(self):
+        # Best effort: a missing sidecar only costs a re-sort
+        payload = json.dumps({"signature": self.signature, "orders": self.orders}, separators=(',', ':'))
+        try:
+            atomic_write(self.sidecar_path, payload.encode('utf-8'))
+        except OSError:
+            pass
+
+    def row_texts(self):
+        """
+        Get the lowercased text of every cell, built once per table version
+
+        Returns:
+            list: Per row, a list of cell texts
+        """
+        if self.texts is None:
+            self.texts = [[cell_text(cell) for cell in row] for row in self.rows]
+        return self.texts
+
+    def search_texts(self):
+        """
+        Get one string per row for global search, cells separated by a
+        character no search term contains
+
+        Returns:
+            list: Per row, the joined cell texts
+        """
+        if self.row_search_texts is None:
+            self.row_search_texts = ["\x00".join(texts) for texts in self.row_texts()]
+        return self.row_search_texts
+
+def load_table(path, data_key):
+    """
+    Read a table and its index under a shared lock
+
+    Args:
+        path (str): Table file path
+        data_key (str): Key of the row list in the file
+
+    Returns:
+        dict: Success status and the TableIndex, or an error message
+    """
+    with FileLock(path, mode=FileLock.READ) as file_lock:
+        result = file_lock.read()
+        if not result['success']:
+            return result
+        signature = file_lock.read_signature
+
+    index = table_index_cache.get(path, signature)
+    if index is JsonCache.MISSING:
+        index = TableIndex(path, signature, result['data'].get(data_key, []))
+        table_index_cache.put(path, signature, index)
+    return {"success": True, "index": index}
+
+def parse_order(params, column_count):
+    """
+    Get the requested (column, descending) sort specs
+
+    Args:
+        params (dict): DataTables request parameters
+        column_count (int): Number of columns in the table
+
+    Returns:
+        list: (column index, descending) tuples
+    """
+    specs = []
+    for spec in params.get('order') or []:
+        try:
+            column = int(spec.get('column', 0))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= column < column_count:
+            specs.append((column, spec.get('dir') == 'desc'))
+    return specs
+
+def query_table(path, data_key, params):
+    """
+    Answer a DataTables server-side request
+
+    Args:
+        path (str): Table file path
+        data_key (str): Key of the row list in the file
+        params (dict): DataTables request parameters: draw, start, length,
+            search.value, order[].column/dir and columns[].search.value
+
+    Returns:
+        dict: DataTables response with draw, recordsTotal, recordsFiltered
+              and the visible rows, or an error
+    """
+    try:
+        draw = int(params.get('draw', 0))
+    except (TypeError, ValueError):
+        draw = 0
+    result = load_table(path, data_key)
+    if not result['success']:
+        return {"draw": draw, "error": result['error']}
+    index = result['index']
+    rows = index.rows
+
+    try:
+        start = max(int(params.get('start', 0)), 0)
+        length = int(params.get('length', 25))
+    except (TypeError, ValueError):
+        return {"draw": draw, "error": "Invalid start or length"}
+    if length < 0 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+
+    column_count = max((len(row) for row in rows[:1]), default=0)
+    specs = parse_order(params, column_count)
+
+    # Ascending row positions in display order, read backwards when descending
+    descending = False
+    if not specs:
+        positions = range(len(rows))
+    elif len(specs) == 1:
+        column, descending = specs[0]
+        positions = index.order(column)
+    else:
+        # Stable sorts from the least to the most significant column
+        positions = list(range(len(rows)))
+        for column, column_descending in reversed(specs):
+            positions.sort(key=lambda position: sort_key(row_cell(rows[position], column)),
+                           reverse=column_descending)
+
+    # Global and per-column filters are case-insensitive substring matches
+    search = str((params.get('search') or {}).get('value') or '').strip().lower()
+    column_searches = []
+    for column, column_params in enumerate(params.get('columns') or []):
+        value = str(((column_params or {}).get('search') or {}).get('value') or '').strip().lower()
+        if value and column < column_count:
+            column_searches.append((column, value))
+
+    if search or column_searches:
+        texts = index.row_texts()
+        search_texts = index.search_texts()
+        matched = [
+            position for position in (reversed(positions) if descending else positions)
+            if (not search or search in search_texts[position])
+            and all(value in (row_cell(texts[position], column) or '') for column, value in column_searches)
+        ]
+        filtered_count = len(matched)
+        visible = matched[start:start + length]
+    else:
+        # Only the visible slice of the pre-sorted order is touched
+        filtered_count = len(rows)
+        if descending:
+            end = max(len(positions) - start, 0)
+            visible = positions[max(end - length, 0):end][::-1]
+        else:
+            visible = positions[start:start + length]
+
+    return {
+        "draw": draw,
+        "recordsTotal": len(rows),
+        "recordsFiltered": filtered_count,
+        "data": [rows[position] for position in visible]
+    }
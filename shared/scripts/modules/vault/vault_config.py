@@ -17,6 +17,34 @@ VAULT_ENV_FILE = '/etc/vault.env'
 DEFAULT_VAULT_URL = 'http://127.0.0.1:8200'
 DEFAULT_MOUNT_POINT = 'kv'
 
+# Secret cache: seconds a secret is served without asking Vault, with
+# overrides by key prefix; a secret's custom_metadata "cache_ttl" and a
+# non-zero lease duration also cap it
+VAULT_CACHE_TTL = int(os.getenv('PORTAL_VAULT_CACHE_TTL', '300'))
+VAULT_CACHE_TTLS = {}
+
+# Seconds past expiry a secret may still be served while Vault is slow or down
+VAULT_CACHE_STALE_SECONDS = 3600
+
+# Seconds to wait for Vault when refreshing an expired secret before serving the stale value
+VAULT_REVALIDATE_TIMEOUT = 1.0
+
+# After a refresh times out, expired secrets are served stale without
+# waiting for this many seconds while refreshes continue in the background
+VAULT_SLOW_BACKOFF_SECONDS = 30
+
+# Encrypted on-disk tier shared by the CLI scripts; empty disables it. Only
+# written inside a directory owned by the running user (apache)
+VAULT_CACHE_FILE = os.getenv('PORTAL_VAULT_CACHE_FILE', '/var/cache/portal/vault_cache.bin')
+VAULT_CACHE_FILE_MODE = 0o600
+
+# Default concurrent Vault requests of bulk fetches and tree walks
+VAULT_MAX_WORKERS = 8
+
+# Keep-alive connections kept by the shared HTTP session; concurrency above
+# this opens throwaway connections
+VAULT_MAX_CONNECTIONS = 32
+
 # Logging configuration for vault operations
 VAULT_LOG_LEVEL = 'INFO'
 VAULT_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
\ No newline at end of file
@@ -7,7 +7,21 @@ Manages interactions with HashiCorp Vault for secret management
 import hvac
 import warnings
 import os
+import time
+import json
+import base64
+import hashlib
 import logging
+import threading
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .vault_config import (
+    VAULT_CACHE_TTL, VAULT_CACHE_TTLS, VAULT_CACHE_STALE_SECONDS, VAULT_REVALIDATE_TIMEOUT,
+    VAULT_SLOW_BACKOFF_SECONDS, VAULT_MAX_WORKERS, VAULT_MAX_CONNECTIONS,
+    VAULT_CACHE_FILE, VAULT_CACHE_FILE_MODE
+)
+from file_operations import atomic_write
 
 # Suppress specific deprecation warning for hvac
 warnings.filterwarnings(
@@ -16,20 +30,202 @@ warnings.filterwarnings(
     message="The raise_on_deleted_version parameter will change its default value to False in hvac v3.0.0."
 )
 
+class SecretCache:
+    """
+    Cache of kv-v2 secrets in front of Vault.
+
+    Entries are kept in memory for the life of the process and, when the
+    cryptography package is available, mirrored to a Fernet-encrypted file
+    so short-lived CLI scripts share them. The file key is derived from the
+    Vault token, so rotating the token orphans the old file. The memoized
+    kv-v2 mount point is cached alongside the secrets.
+    """
+
+    FRESH = 'fresh'
+    STALE = 'stale'
+    MISSING = 'missing'
+
+    def __init__(self, cache_file=VAULT_CACHE_FILE):
+        """
+        Initialize the cache
+
+        Args:
+            cache_file (str): Path of the encrypted disk tier, empty to disable
+        """
+        self.cache_file = cache_file
+        self.entries = {}
+        self.mount_point = None
+        self.fernet = None
+        self.disk_loaded = False
+        self.refreshing = set()
+        self.slow_until = 0.0
+        self.lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "refreshes": 0,
+            "refresh_failures": 0
+        }
+
+    def configure_disk(self, token):
+        """
+        Enable the disk tier for a token if it can be kept private
+
+        Args:
+            token (str): Vault token the encryption key is derived from
+        """
+        if self.fernet is not None or not self.cache_file or not token:
+            return
+        directory = os.path.dirname(self.cache_file)
+        try:
+            if os.stat(directory).st_uid != os.geteuid():
+                return
+            from cryptography.fernet import Fernet
+        except (OSError, ImportError):
+            return
+        digest = hashlib.sha256(b"portal-vault-cache:" + token.encode('utf-8')).digest()
+        self.fernet = Fernet(base64.urlsafe_b64encode(digest))
+
+    def load_disk(self):
+        """
+        Merge entries from the disk tier into memory, once per process
+        """
+        if self.disk_loaded or self.fernet is None:
+            return
+        self.disk_loaded = True
+        try:
+            with open(self.cache_file, 'rb') as cache_file:
+                snapshot = json.loads(self.fernet.decrypt(cache_file.read()))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable vault cache {self.cache_file}: {e}")
+            return
+
+        self.mount_point = self.mount_point or snapshot.get("mount_point")
+        for key, entry in snapshot.get("entries", {}).items():
+            if key not in self.entries or self.entries[key]["fetched_at"] < entry["fetched_at"]:
+                self.entries[key] = entry
+
+    def save_disk(self):
+        """
+        Write the cache to the disk tier
+        """
+        if self.fernet is None:
+            return
+        with self.lock:
+            snapshot = {"mount_point": self.mount_point, "entries": dict(self.entries)}
+        try:
+            payload = self.fernet.encrypt(json.dumps(snapshot).encode('utf-8'))
+            atomic_write(self.cache_file, payload, file_mode=VAULT_CACHE_FILE_MODE)
+        except Exception as e:
+            logging.warning(f"Failed to write vault cache {self.cache_file}: {e}")
+
+    @staticmethod
+    def ttl_for(key, lease_duration=0, custom_metadata=None):
+        """
+        Get the cache lifetime of a secret
+
+        Args:
+            key (str): Secret path
+            lease_duration (int): Lease returned by Vault, 0 for none
+            custom_metadata (dict): Secret metadata, may set "cache_ttl"
+
+        Returns:
+            int: Seconds the secret may be served from cache
+        """
+        ttl = VAULT_CACHE_TTL
+        prefixes = [prefix for prefix in VAULT_CACHE_TTLS if key.startswith(prefix)]
+        if prefixes:
+            ttl = VAULT_CACHE_TTLS[max(prefixes, key=len)]
+        if custom_metadata and str(custom_metadata.get("cache_ttl", "")).isdigit():
+            ttl = int(custom_metadata["cache_ttl"])
+        if lease_duration:
+            ttl = min(ttl, lease_duration)
+        return ttl
+
+    def lookup(self, key):
+        """
+        Find a cached secret
+
+        Args:
+            key (str): Secret path
+
+        Returns:
+            tuple: (entry, SecretCache.FRESH|STALE|MISSING)
+        """
+        in_memory = key in self.entries
+        if not in_memory:
+            self.load_disk()
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None, self.MISSING
+
+        age = time.time() - entry["fetched_at"]
+        if age <= entry["ttl"]:
+            self.stats["hits" if in_memory else "disk_hits"] += 1
+            return entry, self.FRESH
+        if age <= entry["ttl"] + VAULT_CACHE_STALE_SECONDS:
+            return entry, self.STALE
+        self.stats["misses"] += 1
+        return None, self.MISSING
+
+    def store(self, key, data, ttl, save=True):
+        """
+        Cache a secret
+
+        Args:
+            key (str): Secret path
+            data (dict): Secret data
+            ttl (int): Seconds the secret stays fresh
+            save (bool): Write the disk tier now, False when the caller
+                saves once after a batch
+        """
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = {"data": data, "fetched_at": time.time(), "ttl": ttl}
+        if save:
+            self.save_disk()
+
+    def invalidate(self, key=None):
+        """
+        Drop one or all cached secrets
+
+        Args:
+            key (str): Secret path, None for all
+        """
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+        self.save_disk()
+
+# Process-wide cache shared by every VaultUtility instance
+secret_cache = SecretCache()
+
 class VaultUtility:
     """
     Utility class for interacting with HashiCorp Vault
     Handles authentication, secret management, and key-value operations
     """
     
-    def __init__(self, vault_url=None, token=None, env_file_path='/etc/vault.env'):
+    def __init__(self, vault_url=None, token=None, env_file_path='/etc/vault.env', cache=None):
         """
         Initialize VaultUtility with connection parameters
         
+        The Vault client is only created once a secret has to be fetched, so
+        fully cached lookups make no requests at all.
+
         Args:
             vault_url (str): URL of the Vault server
             token (str): Authentication token
             env_file_path (str): Path to environment file
+            cache (SecretCache): Secret cache, defaults to the process-wide one
         """
         # Set logging to ERROR only
         logging.basicConfig(level=logging.ERROR)
@@ -47,9 +243,30 @@ class VaultUtility:
                 logging.error("Failed to obtain Vault token")
                 raise Exception("VAULT_TOKEN environment variable not set")
 
-        # Initialize Vault client
-        self.client = self.authenticate_vault(self.vault_url, self.token)
-        self.kv_v2_mount_point = self.get_kv_v2_mount_point()
+        self.cache = cache or secret_cache
+        self.cache.configure_disk(self.token)
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        Authenticated Vault client, created on first use
+        """
+        if self._client is None:
+            self._client = self.authenticate_vault(self.vault_url, self.token)
+        return self._client
+
+    @property
+    def kv_v2_mount_point(self):
+        """
+        Mount point of the kv-v2 engine, memoized in the secret cache
+        """
+        if self.cache.mount_point is None:
+            self.cache.load_disk()
+        if self.cache.mount_point is None:
+            self.cache.mount_point = self.get_kv_v2_mount_point()
+            self.cache.save_disk()
+        return self.cache.mount_point
 
     def load_env_file(self, filepath):
         """
@@ -86,59 +303,123 @@ class VaultUtility:
         Raises:
             Exception: If authentication fails
         """
-        client = hvac.Client(url=vault_url, token=token)
+        # One keep-alive session sized for concurrent requests
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=VAULT_MAX_CONNECTIONS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        client = hvac.Client(url=vault_url, token=token, session=session)
         if not client.is_authenticated():
             raise Exception("Vault authentication failed")
         return client
 
-    def list_keys_recursively(self, path=""):
+    def iter_secrets(self, path="", keys_only=False, max_workers=VAULT_MAX_WORKERS, stats=None,
+                     progress=None):
         """
-        List all keys and values recursively for the kv-v2 engine
-        
+        Walk the kv-v2 tree concurrently, yielding secrets as they arrive
+
+        Directory listings and secret reads share one pool with at most
+        max_workers requests in flight. Results come in completion order, not
+        tree order. Paths that cannot be listed or read are logged and skipped.
+
         Args:
-            path (str): Starting path for recursion
-            
-        Returns:
-            dict: Dictionary of keys and their values
+            path (str): Starting path
+            keys_only (bool): Only list paths, without reading the values
+            max_workers (int): Maximum concurrent Vault requests
+            stats (dict): Updated in place with progress and timing counters
+            progress (callable): Called with stats after every completed request
+
+        Yields:
+            tuple: (path, data), data is None in keys_only mode
         """
-        try:
-            # List keys at the current path
+        if stats is None:
+            stats = {}
+        stats.update({"lists": 0, "reads": 0, "errors": 0, "yielded": 0,
+                      "max_in_flight": 0, "elapsed_s": 0.0})
+        start = time.monotonic()
+
+        def list_path(list_path):
             response = self.client.secrets.kv.v2.list_secrets(
                 mount_point=self.kv_v2_mount_point,
-                path=path
+                path=list_path
             )
-            
-            keys = response['data']['keys']
-            result = {}
-            
-            for key in keys:
-                full_path = f"{path}/{key}".strip('/')
-                
-                if key.endswith('/'):
-                    # Recurse into directories
-                    result.update(self.list_keys_recursively(full_path))
-                else:
-                    # Read secret value
+            return response['data']['keys']
+
+        def read_path(read_path):
+            secret = self.client.secrets.kv.v2.read_secret_version(
+                mount_point=self.kv_v2_mount_point,
+                path=read_path,
+                raise_on_deleted_version=True
+            )
+            return secret['data']['data']
+
+        # Create the client and mount point before the threads need them
+        self.kv_v2_mount_point
+
+        tasks = deque([('list', path.strip('/'))])
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        in_flight = {}
+        try:
+            while tasks or in_flight:
+                while tasks and len(in_flight) < max_workers:
+                    kind, task_path = tasks.popleft()
+                    function = list_path if kind == 'list' else read_path
+                    in_flight[executor.submit(function, task_path)] = (kind, task_path)
+                stats["max_in_flight"] = max(stats["max_in_flight"], len(in_flight))
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, task_path = in_flight.pop(future)
+                    stats["lists" if kind == 'list' else "reads"] += 1
                     try:
-                        secret = self.client.secrets.kv.v2.read_secret_version(
-                            mount_point=self.kv_v2_mount_point,
-                            path=full_path,
-                            raise_on_deleted_version=True
-                        )
-                        result[full_path] = secret['data']['data']
+                        result = future.result()
                     except hvac.exceptions.InvalidPath:
-                        logging.warning(f"Invalid path: {full_path}")
+                        stats["errors"] += 1
+                        logging.warning(f"Invalid path: {task_path}")
+                        continue
                     except Exception as e:
-                        logging.error(f"Error reading secret at {full_path}: {str(e)}")
-            
-            return result
+                        stats["errors"] += 1
+                        logging.error(f"Error {'listing keys at' if kind == 'list' else 'reading secret at'} "
+                                      f"{task_path}: {str(e)}")
+                        continue
+                    finally:
+                        stats["elapsed_s"] = time.monotonic() - start
+                        if progress:
+                            progress(stats)
+
+                    if kind == 'read':
+                        stats["yielded"] += 1
+                        yield task_path, result
+                        continue
+
+                    for key in result:
+                        full_path = f"{task_path}/{key}".strip('/')
+                        if key.endswith('/'):
+                            tasks.append(('list', full_path))
+                        elif keys_only:
+                            stats["yielded"] += 1
+                            yield full_path, None
+                        else:
+                            tasks.append(('read', full_path))
+        finally:
+            # Stop queued requests if the consumer abandons the generator
+            executor.shutdown(wait=False, cancel_futures=True)
+            stats["elapsed_s"] = time.monotonic() - start
+
+    def list_keys_recursively(self, path="", max_workers=VAULT_MAX_WORKERS, stats=None):
+        """
+        List all keys and values recursively for the kv-v2 engine
+        
+        Args:
+            path (str): Starting path for recursion
+            max_workers (int): Maximum concurrent Vault requests
+            stats (dict): Updated in place with progress and timing counters
             
-        except hvac.exceptions.InvalidPath:
-            logging.warning(f"Invalid path: {path}")
-            return {}
-        except Exception as e:
-            logging.error(f"Error listing keys: {str(e)}")
-            return {}
+        Returns:
+            dict: Dictionary of keys and their values
+        """
+        return dict(self.iter_secrets(path, max_workers=max_workers, stats=stats))
 
     def get_kv_v2_mount_point(self):
         """
@@ -167,28 +448,215 @@ class VaultUtility:
             logging.error(f"Failed to get kv-v2 mount point: {e}")
             raise
 
+    def read_secret(self, key, save=True):
+        """
+        Read a secret from Vault and cache it
+
+        Args:
+            key (str): Key to retrieve
+            save (bool): Write the disk tier of the cache immediately
+
+        Returns:
+            dict: Secret data
+
+        Raises:
+            hvac.exceptions.InvalidPath: If the secret does not exist
+            Exception: If Vault cannot be reached
+        """
+        secret = self.client.secrets.kv.v2.read_secret_version(
+            mount_point=self.kv_v2_mount_point,
+            path=key,
+            raise_on_deleted_version=True
+        )
+        data = secret['data']['data']
+        metadata = secret['data'].get('metadata') or {}
+        ttl = self.cache.ttl_for(key, secret.get('lease_duration') or 0, metadata.get('custom_metadata'))
+        self.cache.store(key, data, ttl, save=save)
+        return data
+
+    def fetch_secret(self, key):
+        """
+        Read a secret from Vault and cache it, logging failures
+
+        Args:
+            key (str): Key to retrieve
+
+        Returns:
+            dict: Secret data, or None if it could not be read
+        """
+        try:
+            return self.read_secret(key)
+        except hvac.exceptions.InvalidPath:
+            logging.warning(f"Invalid path: {key}")
+            return None
+        except Exception as e:
+            logging.error(f"Error retrieving value for key {key}: {str(e)}")
+            return None
+
+    def revalidate(self, key):
+        """
+        Refresh an expired secret, giving up after VAULT_REVALIDATE_TIMEOUT
+
+        The refresh keeps running in the background when it times out, so a
+        long-lived process picks up the new value on a later lookup. After a
+        timeout, refreshes stop waiting for VAULT_SLOW_BACKOFF_SECONDS.
+
+        Args:
+            key (str): Key to refresh
+
+        Returns:
+            dict: Fresh secret data, or None if Vault did not answer in time
+        """
+        with self.cache.lock:
+            if key in self.cache.refreshing:
+                return None
+            self.cache.refreshing.add(key)
+
+        result = {}
+
+        def refresh():
+            try:
+                result["data"] = self.fetch_secret(key)
+            finally:
+                with self.cache.lock:
+                    self.cache.refreshing.discard(key)
+
+        # Don't wait again while Vault is known to be slow
+        timeout = VAULT_REVALIDATE_TIMEOUT
+        if time.monotonic() < self.cache.slow_until:
+            timeout = 0
+
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            self.cache.slow_until = time.monotonic() + VAULT_SLOW_BACKOFF_SECONDS
+        data = result.get("data")
+        self.cache.stats["refreshes" if data is not None else "refresh_failures"] += 1
+        return data
+
     def get_value_for_key(self, key):
         """
         Get the value for a specific key in the kv-v2 engine
         
+        Fresh cached values are returned without contacting Vault. Expired
+        values are refreshed, falling back to the stale value if Vault is
+        slow or unavailable.
+
         Args:
             key (str): Key to retrieve
             
         Returns:
             str: Value associated with the key or None if not found
         """
+        entry, state = self.cache.lookup(key)
+        if state == SecretCache.FRESH:
+            data = entry["data"]
+        elif state == SecretCache.STALE:
+            data = self.revalidate(key)
+            if data is None:
+                self.cache.stats["stale"] += 1
+                logging.warning(f"Serving stale value for key {key}")
+                data = entry["data"]
+        else:
+            data = self.fetch_secret(key)
+            if data is None:
+                return None
+
         try:
-            secret = self.client.secrets.kv.v2.read_secret_version(
-                mount_point=self.kv_v2_mount_point,
-                path=key,
-                raise_on_deleted_version=True
-            )
-            value = secret['data']['data']
-            return value['value']
-            
-        except hvac.exceptions.InvalidPath:
-            logging.warning(f"Invalid path: {key}")
-            return None
-        except Exception as e:
+            return data['value']
+        except KeyError as e:
             logging.error(f"Error retrieving value for key {key}: {str(e)}")
             return None
+
+    def list_key_paths(self, path="", max_workers=VAULT_MAX_WORKERS, stats=None):
+        """
+        List the full paths of every secret below a path, without reading values
+
+        Args:
+            path (str): Starting path
+            max_workers (int): Maximum concurrent Vault requests
+            stats (dict): Updated in place with progress and timing counters
+
+        Returns:
+            list: Sorted secret paths
+        """
+        return sorted(key for key, _ in self.iter_secrets(path, keys_only=True,
+                                                          max_workers=max_workers, stats=stats))
+
+    def get_values_for_keys(self, keys=None, prefix=None, max_workers=VAULT_MAX_WORKERS):
+        """
+        Get the values of several keys at once
+
+        Cached keys are answered from the cache; the rest are fetched
+        concurrently over the client's shared keep-alive session. A failing
+        key is reported in "errors" without affecting the others.
+
+        Args:
+            keys (list): Keys to retrieve
+            prefix (str): Retrieve every key below this path instead
+            max_workers (int): Maximum concurrent Vault requests
+
+        Returns:
+            dict: {"values": {key: value or None}, "errors": {key: message}}
+        """
+        errors = {}
+        if keys is None:
+            try:
+                keys = self.list_key_paths(prefix or "")
+            except Exception as e:
+                return {"values": {}, "errors": {prefix or "": f"Failed to list keys: {e}"}}
+
+        lookups = {key: self.cache.lookup(key) for key in dict.fromkeys(keys)}
+        pending = [key for key, (_, state) in lookups.items() if state != SecretCache.FRESH]
+
+        def resolve(key):
+            entry, state = lookups[key]
+            if state == SecretCache.STALE:
+                data = self.revalidate(key)
+                if data is None:
+                    self.cache.stats["stale"] += 1
+                    data = entry["data"]
+                return data
+            return self.read_secret(key, save=False)
+
+        results = {key: entry["data"] for key, (entry, state) in lookups.items() if state == SecretCache.FRESH}
+        if pending:
+            try:
+                # Create the client and mount point before the threads need them
+                self.kv_v2_mount_point
+                with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+                    futures = {key: executor.submit(resolve, key) for key in pending}
+                    for key, future in futures.items():
+                        try:
+                            results[key] = future.result()
+                        except hvac.exceptions.InvalidPath:
+                            errors[key] = "Invalid path"
+                        except Exception as e:
+                            errors[key] = str(e)
+            except Exception as e:
+                for key in pending:
+                    errors.setdefault(key, str(e))
+            self.cache.save_disk()
+
+        values = {}
+        for key in lookups:
+            try:
+                values[key] = results[key]['value'] if key in results else None
+            except (KeyError, TypeError):
+                values[key] = None
+                errors[key] = "Secret has no 'value' field"
+
+        for key, message in errors.items():
+            logging.error(f"Error retrieving value for key {key}: {message}")
+        return {"values": values, "errors": errors}
+
+    def cache_stats(self):
+        """
+        Get secret cache counters
+
+        Returns:
+            dict: Cache counters and number of cached secrets
+        """
+        return dict(self.cache.stats, entries=len(self.cache.entries),
+                    disk_tier=self.cache.fernet is not None)
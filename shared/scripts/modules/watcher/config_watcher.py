@@ -0,0 +1,641 @@
+#!/opt/python-venv/bin/python3
+"""
+Config Watcher Daemon
+Watches each application's portal/config/ directory and keeps validated
+snapshots of the JSON files in WATCHER_FILES under portal/cache/snapshots/,
+so PHP includes a pre-serialized array through OPcache and Python reads a
+cached snapshot instead of decoding the file on every request
+
+Changes are picked up with inotify, or by stat polling where inotify is
+not available. A changed file is parsed and validated before it replaces
+its snapshot; a file that fails is recorded as rejected and readers keep
+the last valid version. Every accepted change gets a version higher than
+any before it, so consumers check "unchanged since version N" with one
+comparison. See config_snapshots.py for the layout and the readers.
+"""
+
+import sys
+import time
+import glob
+import errno
+import select
+import signal
+import struct
+import hashlib
+import argparse
+import ctypes
+import ctypes.util
+from watcher_config import *
+from file_operations import atomic_write, FileLock
+from logging_config import setup_logger, log_with_context
+from config_snapshots import (SNAPSHOT_FORMAT, portal_directory, snapshot_directory, snapshot_file,
+                              manifest_file, source_signature, parse_strict)
+from nav_index import nav_files, compile_nav_index
+
+logger = setup_logger('watcher')
+
+# inotify event masks from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+
+# struct inotify_event header: wd, mask, cookie, len
+INOTIFY_EVENT = struct.Struct('iIII')
+
+def compile_menu_index(app, nav_data, source):
+    """
+    Recompile menu-index.json from a validated menu-bar.json
+
+    The menu is not read again, so an edit still being written cannot be
+    compiled, or make FileLock restore a backup over it.
+
+    Args:
+        app (str): Application identifier
+        nav_data (dict): Validated menu-bar.json content
+        source (list): Signature of the menu-bar.json it was read from
+    """
+    _, index_file = nav_files(app)
+    with FileLock(index_file, compact=True, backup_generations=0) as index_lock:
+        write_result = index_lock.write(compile_nav_index(nav_data, source))
+    if not write_result['success']:
+        raise Exception(write_result['error'])
+
+# Run after an accepted change of a file with the application identifier,
+# the validated data and its source signature
+CHANGE_HOOKS = {
+    "config/menu-bar.json": compile_menu_index,
+}
+
+class Inotify:
+    """
+    Directory watches through the Linux inotify API, called with ctypes
+    """
+
+    def __init__(self):
+        """
+        Create the inotify instance
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        library = ctypes.util.find_library('c')
+        if library is None:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self.libc = ctypes.CDLL(library, use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+
+    def add_watch(self, directory):
+        """
+        Watch a directory for file changes
+
+        Args:
+            directory (str): Directory path
+
+        Raises:
+            OSError: If the watch cannot be added, e.g. the watch limit is reached
+        """
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_add_watch failed for {directory}: {os.strerror(error)}")
+        self.watches[wd] = directory
+
+    def read_events(self, timeout, wake_fd):
+        """
+        Wait for events
+
+        Args:
+            timeout (float): Maximum seconds to wait
+            wake_fd (int): Descriptor that ends the wait early when readable
+
+        Returns:
+            list: (directory, name, mask) tuples; directory is None for a
+                  queue overflow, after which everything must be rescanned
+        """
+        ready, _, _ = select.select([self.fd, wake_fd], [], [], timeout)
+        if self.fd not in ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(buffer):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            start = offset + INOTIFY_EVENT.size
+            name = os.fsdecode(buffer[start:start + length].rstrip(b'\0'))
+            offset = start + length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            events.append((self.watches.get(wd), name, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+def php_literal(value):
+    """
+    Serialize parsed JSON as a PHP expression equal to json_decode($json, true)
+
+    Args:
+        value: Parsed JSON data
+
+    Returns:
+        str: PHP source of the value
+    """
+    if isinstance(value, dict):
+        return "array(" + ",".join(
+            f"{php_literal(str(key))}=>{php_literal(item)}" for key, item in value.items()
+        ) + ")"
+    if isinstance(value, list):
+        return "array(" + ",".join(php_literal(item) for item in value) + ")"
+    if isinstance(value, str):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    return repr(value)
+
+def php_file(name, value):
+    return (f"<?php\n// Generated by config_watcher.py from {name}, do not edit\n"
+            f"return {php_literal(value)};\n").encode('utf-8')
+
+def validate(name, data):
+    """
+    Check that a parsed file can be served to readers
+
+    Args:
+        name (str): File path relative to the portal directory
+        data: Parsed JSON data
+
+    Raises:
+        ValueError: If the data is not acceptable
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Top level is not a JSON object")
+    missing = [key for key in WATCHER_REQUIRED_KEYS.get(name, ()) if key not in data]
+    if missing:
+        raise ValueError(f"Missing keys: {', '.join(missing)}")
+
+def stat_signature(stat_result):
+    # Full precision, so an in-place edit within the same second is noticed
+    return [stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino]
+
+def discover_apps():
+    """
+    Find every application with a portal config directory under WEB_ROOT
+
+    Returns:
+        list: Application identifiers
+    """
+    pattern = os.path.join(WEB_ROOT, '*', 'portal', 'config')
+    return sorted(os.path.relpath(path, WEB_ROOT).split(os.sep)[0] for path in glob.glob(pattern))
+
+class AppSnapshots:
+    """
+    Snapshots and manifest of one application
+    """
+
+    def __init__(self, app):
+        """
+        Load the manifest left by a previous run, so versions keep increasing
+
+        Args:
+            app (str): Application identifier
+        """
+        self.app = app
+        self.root = portal_directory(app)
+        self.manifest = self.load_manifest()
+        self.dirty = False
+        # Accepted files waiting for their CHANGE_HOOKS: (name, data, source)
+        self.hooks = []
+
+    def load_manifest(self):
+        try:
+            with open(manifest_file(self.app), 'rb') as manifest:
+                data = parse_strict(manifest.read())
+            if data.get('format') == SNAPSHOT_FORMAT:
+                data.setdefault('files', {})
+                data.setdefault('rejected', {})
+                data.setdefault('errors', {})
+                return data
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {"format": SNAPSHOT_FORMAT, "version": 0, "files": {}, "rejected": {}, "errors": {}}
+
+    def next_version(self):
+        """
+        Allocate a version higher than every previous one
+
+        Versions follow the clock in milliseconds, so they keep increasing
+        even if the snapshot directory is wiped.
+
+        Returns:
+            int: New application version
+        """
+        self.manifest['version'] = max(self.manifest['version'] + 1, int(time.time() * 1000))
+        return self.manifest['version']
+
+    def watched_files(self, directory):
+        """
+        List the watched files of a directory and the subdirectories holding more
+
+        Args:
+            directory (str): Absolute directory path
+
+        Returns:
+            tuple: (file names relative to the portal directory, subdirectory paths)
+        """
+        names = []
+        subdirectories = []
+        try:
+            entries = list(os.scandir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            return names, subdirectories
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            name = os.path.relpath(entry.path, self.root)
+            if entry.is_dir(follow_symlinks=False):
+                if any(watched.startswith(name + os.sep) for watched in WATCHER_FILES):
+                    subdirectories.append(entry.path)
+            elif name in WATCHER_FILES:
+                names.append(name)
+        return names, subdirectories
+
+    def scan(self, directory, watch=None, recursive=True):
+        """
+        Refresh the snapshots of the files in a directory that changed
+
+        Args:
+            directory (str): Absolute directory path
+            watch (callable): Called with every directory scanned, to watch it
+            recursive (bool): Scan subdirectories too
+
+        Returns:
+            list: Names of files whose content changed
+        """
+        names, subdirectories = self.watched_files(directory)
+        if watch is not None:
+            watch(directory)
+
+        changed = []
+        relative = os.path.relpath(directory, self.root)
+        # Files known in this directory that are gone
+        for name in list(self.manifest['files']) + list(self.manifest['rejected']):
+            if os.path.dirname(name) == relative and name not in names:
+                if self.remove(name):
+                    changed.append(name)
+        for name in names:
+            if self.refresh(name):
+                changed.append(name)
+        if recursive:
+            for subdirectory in subdirectories:
+                changed.extend(self.scan(subdirectory, watch))
+        return changed
+
+    def scan_all(self, watch=None):
+        changed = []
+        # Snapshots left by a run that watched more files
+        for name in list(self.manifest['files']) + list(self.manifest['rejected']):
+            if name not in WATCHER_FILES and self.remove(name):
+                changed.append(name)
+        for directory in WATCHER_DIRECTORIES:
+            changed.extend(self.scan(os.path.join(self.root, directory), watch))
+        return changed
+
+    def write_snapshot(self, name, entry, data):
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "name": name,
+            "version": entry['version'],
+            "etag": entry['etag'],
+            "source": entry['source'],
+            "data": data
+        }
+        os.makedirs(os.path.dirname(snapshot_file(self.app, name)), exist_ok=True)
+        atomic_write(snapshot_file(self.app, name, 'php'), php_file(name, snapshot), WATCHER_FILE_MODE)
+        atomic_write(snapshot_file(self.app, name),
+                     json.dumps(snapshot, separators=(',', ':')).encode('utf-8'), WATCHER_FILE_MODE)
+
+    def refresh(self, name):
+        """
+        Validate a file and replace its snapshot if its content changed
+
+        Args:
+            name (str): File path relative to the portal directory
+
+        Returns:
+            bool: True if readers see new content
+        """
+        path = os.path.join(self.root, name)
+        entry = self.manifest['files'].get(name)
+        try:
+            with open(path, 'rb') as source_file:
+                stat_result = os.fstat(source_file.fileno())
+                stat = stat_signature(stat_result)
+                if entry is not None and entry['stat'] == stat and os.path.exists(snapshot_file(self.app, name)):
+                    return False
+                if self.manifest['errors'].get(name, {}).get('stat') == stat:
+                    return False
+                if stat_result.st_size > WATCHER_MAX_FILE_BYTES:
+                    return self.remove(name)
+                payload = source_file.read()
+        except FileNotFoundError:
+            return self.remove(name)
+
+        source = source_signature(stat_result)
+        try:
+            data = parse_strict(payload)
+            validate(name, data)
+        except ValueError as e:
+            # Readers keep the last valid snapshot while this file is on disk
+            self.manifest['rejected'][name] = source
+            self.manifest['errors'][name] = {
+                "error": str(e),
+                "stat": stat,
+                "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self.dirty = True
+            log_with_context(logger, 'error', "Rejected invalid JSON", app=self.app, file=name, error=str(e))
+            return False
+
+        self.manifest['rejected'].pop(name, None)
+        self.manifest['errors'].pop(name, None)
+        # Key order is part of the content: menus are shown in file order
+        digest = hashlib.sha256(json.dumps(data, separators=(',', ':')).encode('utf-8')).hexdigest()
+        content_changed = entry is None or entry['digest'] != digest
+        if content_changed:
+            version = self.next_version()
+            entry = {"version": version, "etag": f'"{version:x}-{digest[:16]}"', "digest": digest}
+        entry.update({"source": source, "stat": stat})
+        self.manifest['files'][name] = entry
+
+        # An unchanged file that was only touched or rewritten keeps its version
+        self.write_snapshot(name, entry, data)
+        self.dirty = True
+        if name in CHANGE_HOOKS:
+            self.hooks.append((name, data, source))
+        if content_changed:
+            log_with_context(logger, 'info', "Snapshot updated", app=self.app, file=name, version=entry['version'])
+        return content_changed
+
+    def remove(self, name):
+        """
+        Drop the snapshot of a deleted or no longer watched file
+
+        Args:
+            name (str): File path relative to the portal directory
+
+        Returns:
+            bool: True if a snapshot was removed
+        """
+        if self.manifest['rejected'].pop(name, None) is not None:
+            self.manifest['errors'].pop(name, None)
+            self.dirty = True
+        if self.manifest['files'].pop(name, None) is None:
+            return False
+        for extension in ('php', 'json'):
+            try:
+                os.unlink(snapshot_file(self.app, name, extension))
+            except FileNotFoundError:
+                pass
+        self.next_version()
+        self.dirty = True
+        log_with_context(logger, 'info', "Snapshot removed", app=self.app, file=name)
+        return True
+
+    def commit(self):
+        """
+        Write the manifest if snapshots changed
+        """
+        if not self.dirty:
+            return
+        manifest = dict(self.manifest, updated=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        os.makedirs(snapshot_directory(self.app), exist_ok=True)
+        # Readers of manifest.php only need versions and rejected sources
+        php_manifest = {
+            "format": manifest['format'],
+            "version": manifest['version'],
+            "files": {name: {"version": entry['version'], "etag": entry['etag']}
+                      for name, entry in manifest['files'].items()},
+            "rejected": manifest['rejected']
+        }
+        atomic_write(manifest_file(self.app, 'php'), php_file("the watched files", php_manifest), WATCHER_FILE_MODE)
+        atomic_write(manifest_file(self.app),
+                     json.dumps(manifest, separators=(',', ':')).encode('utf-8'), WATCHER_FILE_MODE)
+        self.dirty = False
+
+    def run_hooks(self):
+        """
+        Run the CHANGE_HOOKS of the files accepted since the last call
+        """
+        hooks, self.hooks = self.hooks, []
+        for name, data, source in hooks:
+            try:
+                CHANGE_HOOKS[name](self.app, data, source)
+            except Exception as e:
+                log_with_context(logger, 'error', "Change hook failed", app=self.app, file=name, error=str(e))
+
+class ConfigWatcher:
+    """
+    Keeps the snapshots of several applications current
+    """
+
+    def __init__(self, apps, poll=False):
+        """
+        Args:
+            apps (list): Application identifiers
+            poll (bool): Use stat polling even if inotify is available
+        """
+        self.apps = {app: AppSnapshots(app) for app in apps}
+        self.inotify = None
+        self.running = True
+        # Signals write to this pipe, so a stop request ends the wait for events
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
+        if not poll:
+            try:
+                self.inotify = Inotify()
+            except OSError as e:
+                log_with_context(logger, 'warning', "inotify unavailable, polling", error=str(e))
+
+    def watch(self, directory):
+        """
+        Add an inotify watch, switching to polling if watches run out
+        """
+        if self.inotify is None or directory in self.inotify.watches.values():
+            return
+        try:
+            self.inotify.add_watch(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            # Removed while being scanned, or not created yet: the next full rescan picks it up
+            pass
+        except OSError as e:
+            log_with_context(logger, 'warning', "inotify watch failed, polling", directory=directory, error=str(e))
+            self.inotify.close()
+            self.inotify = None
+
+    def app_of(self, directory):
+        for app, snapshots in self.apps.items():
+            if directory == snapshots.root or directory.startswith(snapshots.root + os.sep):
+                return snapshots
+        return None
+
+    def scan_all(self):
+        """
+        Rescan every watched directory of every application
+        """
+        for snapshots in self.apps.values():
+            snapshots.scan_all(self.watch)
+            snapshots.commit()
+            snapshots.run_hooks()
+
+    def scan_directories(self, directories):
+        """
+        Rescan the directories events were reported for
+        """
+        touched = {}
+        for directory in directories:
+            snapshots = self.app_of(directory)
+            if snapshots is not None:
+                # Only new subdirectories are descended into; watched ones report their own events
+                snapshots.scan(directory, self.watch, recursive=False)
+                for subdirectory in snapshots.watched_files(directory)[1]:
+                    if self.inotify is not None and subdirectory not in self.inotify.watches.values():
+                        snapshots.scan(subdirectory, self.watch)
+                touched[snapshots.app] = snapshots
+        for snapshots in touched.values():
+            snapshots.commit()
+            snapshots.run_hooks()
+
+    def stop(self, signum=None, frame=None):
+        """
+        Ask run() to return; from another thread, also write to wake_write
+        """
+        self.running = False
+
+    def wait(self, timeout):
+        """
+        Sleep until the timeout or a signal
+        """
+        select.select([self.wake_read], [], [], timeout)
+        self.drain_wakeups()
+
+    def drain_wakeups(self):
+        try:
+            while os.read(self.wake_read, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def run(self):
+        """
+        Scan everything once, then apply changes until stopped
+        """
+        self.scan_all()
+        log_with_context(logger, 'info', "Watcher started", apps=",".join(self.apps),
+                         mode="inotify" if self.inotify else "polling", pid=os.getpid())
+
+        pending = {}
+        next_rescan = time.monotonic() + (WATCHER_RESCAN_SECONDS if self.inotify else WATCHER_POLL_SECONDS)
+        while self.running:
+            now = time.monotonic()
+            if self.inotify is None:
+                # Polling: stat every watched file each interval
+                self.wait(max(next_rescan - now, 0))
+                if self.running:
+                    self.scan_all()
+                next_rescan = time.monotonic() + WATCHER_POLL_SECONDS
+                continue
+
+            timeout = next_rescan - now
+            if pending:
+                timeout = min(timeout, min(pending.values()) + WATCHER_SETTLE_SECONDS - now)
+            events = self.inotify.read_events(max(timeout, 0), self.wake_read)
+            self.drain_wakeups()
+
+            now = time.monotonic()
+            for directory, name, mask in events:
+                if directory is None or mask & IN_Q_OVERFLOW:
+                    # Events were lost
+                    next_rescan = now
+                    continue
+                pending[directory] = now
+
+            if now >= next_rescan:
+                pending.clear()
+                self.scan_all()
+                next_rescan = time.monotonic() + WATCHER_RESCAN_SECONDS
+                continue
+
+            settled = [directory for directory, last in pending.items() if now - last >= WATCHER_SETTLE_SECONDS]
+            for directory in settled:
+                del pending[directory]
+            if settled:
+                self.scan_directories(settled)
+
+        if self.inotify is not None:
+            self.inotify.close()
+        log_with_context(logger, 'info', "Watcher stopped", pid=os.getpid())
+
+def main():
+    """
+    Main function to start the config watcher or refresh snapshots once
+    """
+    parser = argparse.ArgumentParser(description="Keep validated snapshots of portal config and data files")
+    parser.add_argument('apps', nargs='*', help="Applications to watch")
+    parser.add_argument('--all', action='store_true', help="Watch every application under WEB_ROOT")
+    parser.add_argument('--poll', action='store_true', help="Poll with stat instead of using inotify")
+    parser.add_argument('--once', action='store_true', help="Refresh the snapshots once and exit")
+    args = parser.parse_args()
+
+    apps = discover_apps() if args.all else args.apps
+    if not apps:
+        parser.error("No applications given")
+
+    watcher = ConfigWatcher(apps, poll=args.poll or args.once)
+    if not args.once:
+        signal.signal(signal.SIGTERM, watcher.stop)
+        signal.signal(signal.SIGINT, watcher.stop)
+        signal.set_wakeup_fd(watcher.wake_write)
+        watcher.run()
+        return
+
+    failed = False
+    for app, snapshots in watcher.apps.items():
+        try:
+            changed = snapshots.scan_all()
+            snapshots.commit()
+            snapshots.run_hooks()
+        except Exception as e:
+            failed = True
+            print(f"ERROR||{app}||{str(e)}")
+            continue
+        for name, error in snapshots.manifest['errors'].items():
+            print(f"ERROR||{app}||{name}||{error['error']}")
+        print(f"OK||{app}||{len(snapshots.manifest['files'])} snapshots, {len(changed)} changed, "
+              f"version {snapshots.manifest['version']}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Watcher Module Configuration
+Sets up Python path and settings for the config watcher daemon
+"""
+
+import sys
+import os
+
+# Add parent directory and the modules run on changes to Python path
+modules_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(modules_dir)
+sys.path.append(os.path.join(modules_dir, 'rbac'))
+
+# Import shared configurations
+from modules_config import *
+
+# Files snapshotted, relative to each application's portal directory: only
+# those with a snapshot reader (config_snapshot.php, config_snapshots.py),
+# so document saves under data/ cost no extra writes
+WATCHER_FILES = (
+    'config/menu-bar.json',
+    'config/menu-index.json',
+    'config/rbac.json',
+)
+
+# Directories watched for them
+WATCHER_DIRECTORIES = tuple(sorted({os.path.dirname(name) for name in WATCHER_FILES}))
+
+# Larger files are not snapshotted and stay with their own readers
+WATCHER_MAX_FILE_BYTES = int(os.getenv('PORTAL_WATCHER_MAX_FILE_BYTES', str(4 * 1024 * 1024)))
+
+# A changed directory is rescanned once it has been quiet this long, so a
+# file saved by an editor in several writes is not read half-way
+WATCHER_SETTLE_SECONDS = 0.2
+
+# Scan interval of the stat-polling fallback
+WATCHER_POLL_SECONDS = float(os.getenv('PORTAL_WATCHER_POLL_SECONDS', '2'))
+
+# Full rescan interval with inotify, in case events were lost
+WATCHER_RESCAN_SECONDS = 300
+
+# Top-level keys a file needs to be accepted, beyond being a JSON object
+WATCHER_REQUIRED_KEYS = {
+    "config/rbac.json": ("adom_groups", "category_list", "icon_list"),
+}
+
+# Permissions of snapshot files (readable by PHP)
+WATCHER_FILE_MODE = 0o644
@@ -0,0 +1,272 @@
+#!/opt/python-venv/bin/python3
+"""
+Portal Worker Daemon
+Long-lived prefork process that preloads the action modules once and serves
+run_python_script.php requests over a Unix socket
+"""
+
+import io
+import sys
+import os
+import json
+import signal
+import socket
+import argparse
+from contextlib import redirect_stdout
+from worker_config import *
+from logging_config import setup_logger, log_with_context, log_writer
+from instrumentation import RequestTrace
+
+# Preload action modules and their dependencies once per daemon
+import ldap
+import rbac
+import documents
+import ldap_auth
+
+# Request type to module dispatcher
+HANDLERS = {
+    'rbac': rbac.handle_request,
+    'documents': documents.handle_request,
+    'ldap': ldap_auth.handle_request,
+}
+
+logger = setup_logger('worker')
+
+# Per-process latency statistics keyed by "request_type.action_type"
+action_stats = {}
+
+def record_latency(action, elapsed_ms):
+    """
+    Record the latency of a single action in the per-process statistics
+
+    Args:
+        action (str): Action label in "request_type.action_type" form
+        elapsed_ms (float): Time spent handling the action in milliseconds
+    """
+    stats = action_stats.setdefault(action, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+def dispatch(request_payload):
+    """
+    Run a request payload against the preloaded action modules
+
+    Args:
+        request_payload (dict): Same payload run_python_script.php passes on the command line
+
+    Returns:
+        dict: Exit status, captured output, action label and latency
+    """
+    request_type = request_payload.get('request_type')
+    data = request_payload.get('data') or {}
+    action = f"{request_type}.{data.get('action_type')}"
+
+    # Worker introspection is answered directly
+    if request_type == 'worker':
+        return {
+            "status": 0,
+            "output": json.dumps({"pid": os.getpid(), "actions": action_stats}),
+            "action": action,
+            "elapsed_ms": 0.0
+        }
+
+    handler = HANDLERS.get(request_type)
+    if handler is None:
+        return {
+            "status": 1,
+            "output": f"Unknown request type: {request_type}",
+            "action": action,
+            "elapsed_ms": 0.0
+        }
+
+    # Capture printed output exactly as the CLI entry point would produce it;
+    # the trace logs the phase timings of the request
+    buffer = io.StringIO()
+    status = 0
+    with redirect_stdout(buffer), RequestTrace(action, logger) as trace:
+        try:
+            handler(request_payload)
+        except SystemExit as e:
+            # As the interpreter does: no code is success, a message is failure
+            if e.code is None:
+                status = trace.status = 0
+            else:
+                status = trace.status = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"Error in main: {e}")
+            status = trace.status = 1
+    elapsed_ms = trace.elapsed_ms
+
+    record_latency(action, elapsed_ms)
+
+    return {
+        "status": status,
+        "output": buffer.getvalue().rstrip('\n'),
+        "action": action,
+        "elapsed_ms": round(elapsed_ms, 3)
+    }
+
+def read_request(conn):
+    """
+    Read one newline-terminated JSON request from a client connection
+
+    Args:
+        conn (socket.socket): Accepted client connection
+
+    Returns:
+        bytes: Raw request bytes without the trailing newline
+    """
+    chunks = []
+    received = 0
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        received += len(chunk)
+        if received > WORKER_MAX_PAYLOAD:
+            raise ValueError("Request payload too large")
+        if b'\n' in chunk:
+            chunks.append(chunk.split(b'\n', 1)[0])
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+def serve_connection(conn):
+    """
+    Handle a single client connection: one request, one response
+
+    Args:
+        conn (socket.socket): Accepted client connection
+    """
+    conn.settimeout(WORKER_READ_TIMEOUT)
+    try:
+        raw = read_request(conn)
+        try:
+            request_payload = json.loads(raw)
+        except json.JSONDecodeError as e:
+            response = {"status": 1, "output": f"Error decoding JSON: {e}", "elapsed_ms": 0.0}
+        else:
+            response = dispatch(request_payload)
+        conn.sendall(json.dumps(response).encode('utf-8') + b'\n')
+    except Exception as e:
+        log_with_context(logger, 'error', "Failed to serve connection", error=e)
+    finally:
+        conn.close()
+
+def child_loop(server):
+    """
+    Accept and serve connections until the request budget is spent
+
+    Args:
+        server (socket.socket): Listening socket shared with the parent
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    for _ in range(WORKER_MAX_REQUESTS):
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            continue
+        serve_connection(conn)
+
+    # Recycle the process to bound memory growth; os._exit skips atexit,
+    # so flush queued log records first
+    log_writer.stop()
+    os._exit(0)
+
+def spawn_child(server):
+    """
+    Fork a worker child serving the shared listening socket
+
+    Args:
+        server (socket.socket): Listening socket
+
+    Returns:
+        int: Child process id
+    """
+    pid = os.fork()
+    if pid == 0:
+        try:
+            child_loop(server)
+        finally:
+            log_writer.stop()
+            os._exit(1)
+    return pid
+
+def serve(socket_path, processes):
+    """
+    Bind the Unix socket and supervise a pool of prefork children
+
+    Args:
+        socket_path (str): Filesystem path of the Unix socket
+        processes (int): Number of worker children to keep alive
+    """
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, WORKER_SOCKET_MODE)
+    server.listen(128)
+
+    children = set()
+    running = True
+
+    def shutdown(signum, frame):
+        nonlocal running
+        running = False
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    log_with_context(logger, 'info', "Worker started",
+                     socket=socket_path, processes=processes, pid=os.getpid())
+
+    try:
+        while running:
+            # Keep the pool at full size, respawning recycled or crashed children
+            while len(children) < processes:
+                children.add(spawn_child(server))
+            try:
+                pid, _ = os.wait()
+                children.discard(pid)
+            except ChildProcessError:
+                pass
+    finally:
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        server.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        log_with_context(logger, 'info', "Worker stopped", pid=os.getpid())
+
+def main():
+    """
+    Main function to start the worker daemon
+    """
+    parser = argparse.ArgumentParser(description="Portal Python worker daemon")
+    parser.add_argument('--socket', default=WORKER_SOCKET, help="Unix socket path")
+    parser.add_argument('--processes', type=int, default=WORKER_PROCESSES,
+                        help="Number of prefork worker processes")
+    args = parser.parse_args()
+
+    serve(args.socket, args.processes)
+
+if __name__ == "__main__":
+    main()
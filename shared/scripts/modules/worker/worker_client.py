@@ -0,0 +1,55 @@
+"""
+Worker Client
+Sends a request payload to the portal worker daemon from Python callers
+"""
+
+import sys
+import os
+import json
+import socket
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from worker_config import *
+
+def request_worker(request_payload, socket_path=WORKER_SOCKET, timeout=WORKER_READ_TIMEOUT):
+    """
+    Run a request on the worker daemon
+
+    Returns None only when the daemon cannot be reached, so callers can fall
+    back to running the request in-process without it having run twice.
+
+    Args:
+        request_payload (dict): Payload in the run_python_script.php format
+        socket_path (str): Worker Unix socket path
+        timeout (float): Seconds to wait for the response
+
+    Returns:
+        dict: Worker response with status and output, or None if unavailable
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return None
+
+        client.sendall(json.dumps(request_payload).encode('utf-8') + b'\n')
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if b'\n' in chunk:
+                break
+    except OSError as e:
+        return {"status": 1, "output": f"Worker request failed: {e}"}
+    finally:
+        client.close()
+
+    try:
+        return json.loads(b''.join(chunks).split(b'\n', 1)[0])
+    except json.JSONDecodeError as e:
+        return {"status": 1, "output": f"Invalid worker response: {e}"}
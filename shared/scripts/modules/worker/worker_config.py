@@ -0,0 +1,25 @@
+"""
+Worker Module Configuration
+Sets up Python path and settings for the long-lived portal worker daemon
+"""
+
+import sys
+import os
+
+# Add parent directory and action module directories to Python path
+modules_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(modules_dir)
+sys.path.append(os.path.join(modules_dir, 'rbac'))
+sys.path.append(os.path.join(modules_dir, 'documents'))
+sys.path.append(os.path.join(modules_dir, 'ldap'))
+
+# Import shared configurations
+from modules_config import *
+
+# Worker specific configurations
+WORKER_SOCKET = os.getenv('PORTAL_WORKER_SOCKET', '/run/portal/worker.sock')
+WORKER_PROCESSES = int(os.getenv('PORTAL_WORKER_PROCESSES', '4'))
+WORKER_MAX_REQUESTS = int(os.getenv('PORTAL_WORKER_MAX_REQUESTS', '1000'))
+WORKER_SOCKET_MODE = 0o660
+WORKER_READ_TIMEOUT = 10
+WORKER_MAX_PAYLOAD = 16 * 1024 * 1024
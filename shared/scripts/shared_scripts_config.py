@@ -6,17 +6,24 @@ Contains common imports and configurations used across multiple scripts
 # System and OS related imports
 import os
 import time
-import socket
-import subprocess
-import psutil
 
-# Data processing and analysis
+# Start of the import chain, used to time the import phase of CLI requests
+IMPORT_STARTED = time.perf_counter()
+
+# Data processing
 import json
-import pandas as pd
 
-# Encoding and requests
+# Encoding
 import base64
-import requests
 
 # Date and time handling
-from datetime import datetime, timedelta, timezone
\ No newline at end of file
+from datetime import datetime, timedelta, timezone
+
+# Heavy or rarely used modules are loaded on first attribute access
+from lazy_imports import lazy_import
+
+socket = lazy_import('socket')
+subprocess = lazy_import('subprocess')
+psutil = lazy_import('psutil')
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
@@ -0,0 +1,18 @@
+"""
+Test setup: module paths and a scratch WEB_ROOT shared by the tests, set
+before any portal module reads its configuration
+"""
+
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules'))
+sys.path.append(os.path.join(SCRIPTS_DIR, 'modules', 'rbac'))
+
+WEB_ROOT = tempfile.mkdtemp(prefix='portal-test-')
+os.environ['PORTAL_WEB_ROOT'] = WEB_ROOT
+atexit.register(shutil.rmtree, WEB_ROOT, ignore_errors=True)
@@ -0,0 +1,24 @@
+"""
+Tests for the exit status recorded by RequestTrace
+"""
+
+import sys
+import logging
+import pytest
+
+from instrumentation import RequestTrace
+
+@pytest.mark.parametrize("code, status", [(None, 0), (0, 0), (2, 2), ("failed", 1)])
+def test_sys_exit_status(code, status):
+    trace = RequestTrace("test.exit", logging.getLogger("test"))
+    with pytest.raises(SystemExit):
+        with trace:
+            sys.exit(code)
+    assert trace.status == status
+
+def test_exception_status():
+    trace = RequestTrace("test.error", logging.getLogger("test"))
+    with pytest.raises(ValueError):
+        with trace:
+            raise ValueError("failed")
+    assert trace.status == 1
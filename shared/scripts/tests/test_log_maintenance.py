@@ -0,0 +1,61 @@
+"""
+Tests for summarizing day logs that are damaged or hold unusable records
+"""
+
+import os
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from log_maintenance import maintain, summarize_python, summary_file
+
+def day(days_ago):
+    return (datetime.now() - timedelta(days=days_ago)).strftime('%Y%m%d')
+
+def python_lines(count):
+    return "".join(json.dumps({"level": "INFO", "logger": "rbac",
+                               "context": {"action": "rbac.save_page_rbac", "total_ms": n}}) + "\n"
+                   for n in range(count)).encode('utf-8')
+
+def write_gzip(logs_dir, name, payload):
+    os.makedirs(os.path.join(logs_dir, 'python'), exist_ok=True)
+    path = os.path.join(logs_dir, 'python', name)
+    with open(path, 'wb') as log_file:
+        log_file.write(payload)
+    return path
+
+def test_damaged_gzip_skips_only_its_day(tmp_path):
+    logs_dir = str(tmp_path)
+    good = gzip.compress(python_lines(10))
+    truncated = good[:-20]
+    # Reserved block type in the first deflate block header: zlib.error
+    corrupted = bytearray(good)
+    corrupted[10] |= 0x06
+
+    write_gzip(logs_dir, f"{day(4)}_rbac.log.gz", good)
+    write_gzip(logs_dir, f"{day(3)}_rbac.log.gz", truncated)
+    write_gzip(logs_dir, f"{day(2)}_rbac.log.gz", bytes(corrupted))
+    write_gzip(logs_dir, f"{day(1)}_rbac.log.gz", good)
+
+    result = maintain(logs_dir)
+
+    assert not result['success']
+    assert result['summarized'] == [day(4), day(1)]
+    assert day(3) in result['error'] and day(2) in result['error']
+    with open(summary_file(logs_dir, day(1))) as summary:
+        assert json.load(summary)['python']['actions']['rbac.save_page_rbac']['count'] == 10
+
+def test_unusable_timings_are_skipped(tmp_path):
+    records = [
+        {"level": "INFO", "logger": "rbac", "context": {"action": "rbac.query_table", "total_ms": "slow"}},
+        {"level": "INFO", "logger": "rbac", "context": {"action": "rbac.query_table", "total_ms": None}},
+        {"level": "INFO", "logger": "rbac", "context": {"action": "rbac.query_table", "total_ms": 4}},
+        {"level": "INFO", "logger": "rbac", "context": "not a dict"},
+    ]
+    path = tmp_path / f"{day(1)}_rbac.log"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + "{\"a\": [1\n")
+
+    summary = summarize_python([str(path)])
+
+    assert summary['per_level'] == {"INFO": 4}
+    assert summary['actions'] == {"rbac.query_table": {"count": 1, "errors": 0, "max_ms": 4.0, "avg_ms": 4.0}}
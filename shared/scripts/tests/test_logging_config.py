@@ -0,0 +1,37 @@
+"""
+Tests for the records handed to the background log writer
+"""
+
+import sys
+import json
+import logging
+
+from logging_config import WriterQueueHandler, JsonLinesFormatter
+
+def make_record(msg, args=(), exc_info=None):
+    return logging.LogRecord("test", logging.ERROR, __file__, 1, msg, args, exc_info)
+
+def test_arguments_are_formatted_when_queued():
+    items = [1]
+    record = WriterQueueHandler().prepare(make_record("items %s", (items,)))
+    items.append(2)
+
+    assert json.loads(JsonLinesFormatter().format(record))["message"] == "items [1]"
+
+def test_traceback_is_kept():
+    try:
+        raise ValueError("broken")
+    except ValueError:
+        record = make_record("failed", exc_info=sys.exc_info())
+    prepared = WriterQueueHandler().prepare(record)
+
+    assert prepared.exc_info is None
+    entry = json.loads(JsonLinesFormatter().format(prepared))
+    assert entry["message"] == "failed"
+    assert "ValueError: broken" in entry["exc"]
+
+def test_original_record_is_not_modified():
+    record = make_record("value %d", (5,))
+    WriterQueueHandler().prepare(record)
+
+    assert record.msg == "value %d" and record.args == (5,)
@@ -0,0 +1,35 @@
+"""
+Tests for the rendered rows of the admin pages table
+"""
+
+import re
+import html
+
+from pages_table import render_page_row, refresh_pages_table
+
+def onclick_script(row):
+    # What the browser runs: the attribute value after HTML decoding
+    match = re.search(r'onclick="([^"]*)"', row[4])
+    assert match is not None
+    return html.unescape(match.group(1))
+
+def test_onclick_arguments_stay_string_literals():
+    page = 'x");alert(1);//.php'
+    row = render_page_row(page, {"link_name": "<b>x</b>", "link_type": "single", "roles": ["admin"]})
+
+    assert onclick_script(row) == 'manage_page("x\\");alert(1);//", "x\\");alert(1);//.php", "edit")'
+    assert row[0] == "&lt;b&gt;x&lt;/b&gt;"
+
+def test_onclick_quotes_in_names():
+    row = render_page_row("it's.php", {"link_name": "it's", "link_type": "single", "roles": []})
+
+    assert onclick_script(row) == 'manage_page("it\'s", "it\'s.php", "edit")'
+
+def test_rows_of_older_format_are_rendered_again():
+    rbac_data = {"pages_version": 3, "pages": {
+        "a.php": {"link_name": "A", "link_type": "single", "roles": ["admin"], "revision": 1}
+    }}
+    table_data = {"version": 3, "row_index": {"a.php": [0, 1]}, "pages_table_data": [["stale"]]}
+
+    assert refresh_pages_table(table_data, rbac_data)
+    assert table_data["pages_table_data"][0][0] == "A"
@@ -0,0 +1,57 @@
+"""
+Tests for saving page RBAC settings into rbac.json and menu-bar.json
+"""
+
+import os
+import json
+import uuid
+
+import rbac
+from modules_config import WEB_ROOT
+
+def make_app():
+    app = f"app-{uuid.uuid4().hex[:8]}"
+    config_dir = os.path.join(WEB_ROOT, app, 'portal', 'config')
+    os.makedirs(config_dir)
+    with open(os.path.join(config_dir, 'rbac.json'), 'w') as rbac_file:
+        json.dump({"adom_groups": ["admin"], "roles": ["admin"], "category_list": [],
+                   "icon_list": ["fas fa-file"], "categories": {}, "pages": {}}, rbac_file)
+    with open(os.path.join(config_dir, 'menu-bar.json'), 'w') as nav_file:
+        json.dump({}, nav_file)
+    return app, config_dir
+
+def save_page(app, **fields):
+    data = {"app": app, "link_name": "Reports", "link_type": "single", "filename": "reports.php",
+            "old_adom_groups": [], "new_adom_groups": ["admin"], "image": "fas fa-chart-bar"}
+    data.update(fields)
+    assert rbac.save_page_rbac(data)
+
+def read_json(config_dir, name):
+    with open(os.path.join(config_dir, name)) as json_file:
+        return json.load(json_file)
+
+def test_single_page_keeps_its_icon():
+    app, config_dir = make_app()
+    save_page(app)
+
+    assert read_json(config_dir, 'rbac.json')['pages']['reports.php']['img'] == "fas fa-chart-bar"
+    assert read_json(config_dir, 'menu-bar.json')['Reports'] == {
+        "type": "single",
+        "urls": {"Reports": {"url": "reports.php", "roles": ["admin"]}},
+        "img": "fas fa-chart-bar"
+    }
+
+def test_single_page_icon_change():
+    app, config_dir = make_app()
+    save_page(app)
+    save_page(app, image="fas fa-list")
+
+    assert read_json(config_dir, 'menu-bar.json')['Reports']['img'] == "fas fa-list"
+
+def test_category_page_uses_category_icon():
+    app, config_dir = make_app()
+    save_page(app, link_type="category", category="Tools", image="fas fa-folder")
+
+    nav_data = read_json(config_dir, 'menu-bar.json')
+    assert nav_data['Tools']['img'] == "fas fa-folder"
+    assert nav_data['Tools']['urls']['Reports']['url'] == "reports.php"
@@ -24,8 +24,11 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
         // Determine upload directory based on request type
         switch ($request_type) {
             case 'documents':
-                $target_dir = "/var/www/html/framework/portal/data/framework/docs/images/";
-                $url_base = "/framework/portal/data/framework/docs/images/";
+                // Content-addressed blob store shared with inline images
+                // extracted from document bodies (blob_store.py)
+                $target_dir = "/var/www/html/framework/portal/data/framework/docs/blobs/";
+                $url_base = "/framework/portal/data/framework/docs/blobs/";
+                $content_addressed = true;
                 break;
             default:
                 $target_dir = "/var/www/html/framework/portal/uploads/others/";
@@ -33,6 +36,14 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
                 break;
         }
 
+        // Identical images are stored once, named by their SHA-256 and fanned
+        // out by its first two digits
+        if (!empty($content_addressed)) {
+            $digest = hash_file('sha256', $file['tmp_name']);
+            $target_dir .= substr($digest, 0, 2) . "/";
+            $url_base .= substr($digest, 0, 2) . "/";
+        }
+
         // Create upload directory if it doesn't exist
         if (!is_dir($target_dir)) {
             if (!mkdir($target_dir, 0777, true)) {
@@ -44,7 +55,11 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
         // Process file name and extension
         $file_name = basename($file['name']);
         $file_extension = strtolower(pathinfo($file['name'], PATHINFO_EXTENSION));
-        $new_file_name = generate_uuid() . '.' . $file_extension;
+        if (!empty($content_addressed)) {
+            $new_file_name = $digest . '.' . ($file_extension === 'jpeg' ? 'jpg' : $file_extension);
+        } else {
+            $new_file_name = generate_uuid() . '.' . $file_extension;
+        }
         $target_file = $target_dir . $new_file_name;
         $imageFileType = strtolower(pathinfo($target_file, PATHINFO_EXTENSION));
 
@@ -52,8 +67,15 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST') {
         $valid_extensions = array("jpg", "jpeg", "png", "gif");
         
         if (in_array($imageFileType, $valid_extensions)) {
+            // Reuse an identical stored image, refreshing its garbage collection grace period
+            if (!empty($content_addressed) && file_exists($target_file)) {
+                touch($target_file);
+                echo json_encode([
+                    'success' => true,
+                    'url' => $url_base . $new_file_name
+                ]);
             // Attempt to move uploaded file
-            if (move_uploaded_file($file['tmp_name'], $target_file)) {
+            } else if (move_uploaded_file($file['tmp_name'], $target_file)) {
                 // Return success response with file URL
                 $image_url = $url_base . $new_file_name;
                 echo json_encode([